@@ -1,8 +1,7 @@
 import streamlit as st
 import pandas as pd
 import os
-import chromadb
-from chromadb.utils import embedding_functions
+import sys
 import joblib
 from datetime import timedelta, datetime
 from groq import Groq
@@ -13,23 +12,26 @@ st.set_page_config(page_title="AgroIA - Diagnóstico Inteligente", page_icon="
 
 # --- AJUSTE DE CAMINHOS ---
 BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-PARQUET_FILE = os.path.join(BASE_PATH, "data", "processed", "dataset_gold_mvp.parquet")
+PARQUET_FILE = os.path.join(BASE_PATH, "data", "processed", "dataset_gold_mvp.parquet") # Formato antigo
+GOLD_DATASET = os.path.join(BASE_PATH, "data", "processed", "dataset_gold")
 MODEL_PATH = os.path.join(BASE_PATH, "models", "modelo_produtividade.joblib")
-DB_PATH = os.path.join(BASE_PATH, "data", "chroma_db")
+DATA_PATH = os.path.join(BASE_PATH, "data")
+BACKEND_VETORES = "chroma" # "chroma", "milvus", "numpy" (busca exata em memória) ou "int8"/"float16" (memmap, pouca RAM)
+CACHE_EMBEDDINGS = os.path.join(BASE_PATH, "data", "cache", "embeddings")
+CUBO_DATASET = os.path.join(BASE_PATH, "data", "processed", "cubo_economico")
+TABELA_ECONOMICA = os.path.join(BASE_PATH, "data", "regras", "cenarios_economicos.csv")
+
+# Módulos compartilhados do pipeline (src/)
+sys.path.insert(0, os.path.join(BASE_PATH, "src"))
+from particoes import ler_particionado, listar_particoes
+from embedding_chroma import EmbeddingComCache
+from armazem_vetores import abrir_colecao, caminho_padrao
+from indice_lexical import abrir_busca, caminho_indice
+from cache_consultas import CacheConsultas, caminho_versao
+from economia import ConsultaCenarios, CENARIOS, CENARIO_PADRAO, carregar_tabela_economica, gerar_cubo_economico
 
 # --- DADOS ECONÔMICOS E TÉCNICOS ---
-PRECO_VENDA = {
-    "Soja": 130.00, "Milho": 60.00, "Banana": 40.00, "Laranja": 35.00, 
-    "Tomate Mesa": 75.00, "Cenoura": 55.00, "Pimentão": 45.00, 
-    "Abacaxi": 5.00, "Maracujá": 50.00, "Alface": 2.00
-}
-
-FATOR_CUSTO = {
-    "Soja": 1.0, "Milho": 1.0, "Banana": 1.2, "Laranja": 1.2, 
-    "Tomate Mesa": 2.0, "Cenoura": 1.5, "Pimentão": 1.8, 
-    "Abacaxi": 1.5, "Maracujá": 1.3, "Alface": 1.3 
-}
-
+# Preço de venda e custo por hectare vêm do cubo de cenários (data/regras/cenarios_economicos.csv)
 FATOR_PRODUTIVIDADE = {
     "Soja": 1.0, "Milho": 1.2, "Banana": 35.0, "Laranja": 25.0, 
     "Tomate Mesa": 80.0, "Cenoura": 60.0, "Pimentão": 50.0, 
@@ -71,16 +73,36 @@ def get_decendio(data):
     else: parte_mes = 3
     return (mes - 1) * 3 + parte_mes
 
+# Colunas usadas pelo simulador (o resto do dataset nem é lido do disco)
+COLUNAS_DASHBOARD = ['municipio', 'cultura', 'decendio', 'risco_numerico', 'custo_ha_est',
+                     'chuva_acumulada_decendio', 'temp']
+
+@st.cache_data
+def listar_municipios():
+    return listar_particoes(GOLD_DATASET, "municipio", PARQUET_FILE)
+
 @st.cache_data
-def carregar_dados():
-    if not os.path.exists(PARQUET_FILE): return None
-    df = pd.read_parquet(PARQUET_FILE)
+def carregar_dados(cidade):
+    # Lê só a partição do município escolhido (predicate pushdown no pyarrow)
+    df = ler_particionado(GOLD_DATASET, PARQUET_FILE, colunas=COLUNAS_DASHBOARD, municipio=cidade)
+    if df is None or df.empty: return None
     mapa = {'chuva_acumulada_decendio': 'chuva_media_mm', 'temp': 'temp_media_c'}
     df.rename(columns=mapa, inplace=True)
     if 'decendio' in df.columns: df.rename(columns={'decendio': 'periodo'}, inplace=True)
     elif 'periodo' not in df.columns: df['periodo'] = 1 
     return df
 
+@st.cache_resource
+def carregar_cenarios(cidade):
+    # Cubo pré-calculado pelo passo 03: trocar cenário/data vira consulta em array
+    cubo = ler_particionado(CUBO_DATASET, municipio=cidade)
+    if cubo is None or cubo.empty:
+        # Cubo ainda não gerado: monta na hora a partir do gold + tabela de cenários
+        df = ler_particionado(GOLD_DATASET, PARQUET_FILE, colunas=['municipio', 'cultura', 'solo', 'decendio', 'risco_numerico'], municipio=cidade)
+        if df is None or df.empty: return None
+        cubo = gerar_cubo_economico(df, carregar_tabela_economica(TABELA_ECONOMICA))
+    return ConsultaCenarios(cubo)
+
 @st.cache_resource
 def carregar_ml():
     if os.path.exists(MODEL_PATH): return joblib.load(MODEL_PATH)
@@ -96,10 +118,17 @@ def carregar_chroma():
     except ImportError: pass
     
     try:
-        if not os.path.exists(DB_PATH): return None
-        client = chromadb.PersistentClient(path=DB_PATH)
-        emb_fn = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
-        return client.get_collection(name="manual_tecnico_agricola", embedding_function=emb_fn)
+        caminho = caminho_padrao(BACKEND_VETORES, DATA_PATH)
+        if not os.path.exists(caminho): return None
+        emb_fn = EmbeddingComCache(CACHE_EMBEDDINGS, model_name="all-MiniLM-L6-v2")
+
+        def abrir():
+            colecao = abrir_colecao(BACKEND_VETORES, caminho, "manual_tecnico_agricola", emb_fn, criar=False)
+            # Busca híbrida (BM25 + vetores), se o índice lexical já foi gerado pelo 05_populate_chroma
+            return abrir_busca(colecao, caminho_indice(DATA_PATH, BACKEND_VETORES))
+
+        # Cache de consultas: a mesma busca por cultura não volta ao banco; repopular o banco esvazia o cache
+        return CacheConsultas(abrir(), emb_fn, arquivo_versao=caminho_versao(DATA_PATH, BACKEND_VETORES), reabrir=abrir)
     except: return None
 
 # --- LLAMA 3.3 (AGORA COM RAG CONECTADO) ---
@@ -130,7 +159,7 @@ def consultar_llama_online(cultura, cidade, lucro, risco, clima_texto, area_calc
     - {alerta_irrigacao}
 
     TRECHO DO MANUAL TÉCNICO (Use como referência extra):
-    "{texto_tecnico[:1000]}"  # Limitamos a 1000 caracteres para não estourar
+    "{texto_tecnico}"
 
     SUA MISSÃO (Responda em 3 frases curtas):
     1. Valide o clima/irrigação para a data.
@@ -150,7 +179,8 @@ def consultar_llama_online(cultura, cidade, lucro, risco, clima_texto, area_calc
         return f"IA Indisponível."
 
 # --- CÁLCULO INTELIGENTE ---
-def recomendar_cultura(df, modelo, cidade, area_input, orcamento_max, ignorar_lista, data_plantio, usar_todo_orcamento):
+def recomendar_cultura(df, modelo, cidade, area_input, orcamento_max, ignorar_lista, data_plantio, usar_todo_orcamento,
+                       cenarios=None, cenario=CENARIO_PADRAO):
     resultados = []
     df_cidade = df[df['municipio'] == cidade]
     culturas_existentes = df_cidade['cultura'].unique().tolist()
@@ -192,7 +222,13 @@ def recomendar_cultura(df, modelo, cidade, area_input, orcamento_max, ignorar_li
             if modelo:
                 prod_score = modelo.predict([[risco, chuva, temp, custo_base_ha, solo_val]])[0]
 
-        custo_por_ha = custo_base_ha * FATOR_CUSTO.get(cultura, 1.0)
+        # Custo (já com o fator da cultura) e preço do cenário escolhido, direto do cubo
+        if cenarios:
+            custo_por_ha = cenarios.valor('custo_ha', cenario, cultura, decendio_alvo,
+                                          custo_base_ha * cenarios.valor('fator_custo', cenario, cultura, decendio_alvo, 1.0))
+            preco_venda = cenarios.valor('preco_venda', cenario, cultura, decendio_alvo, 0)
+        else:
+            custo_por_ha, preco_venda = custo_base_ha, 0
         
         if usar_todo_orcamento:
             area_real = orcamento_max / custo_por_ha
@@ -207,7 +243,7 @@ def recomendar_cultura(df, modelo, cidade, area_input, orcamento_max, ignorar_li
         if risco >= 50: perda_pct = 0.95
         elif risco > 30: perda_pct = 0.50
             
-        receita = prod_bruta * (1 - perda_pct) * PRECO_VENDA.get(cultura, 0)
+        receita = prod_bruta * (1 - perda_pct) * preco_venda
         lucro = receita - custo_total
         roi = (lucro / custo_total) * 100 if custo_total > 0 else 0
         
@@ -246,17 +282,21 @@ def card_metrica(titulo, valor, cor="#000000"):
 def main():
     st.title(f"AgroIA - Diagnóstico Inteligente")
     
-    df = carregar_dados()
+    municipios = listar_municipios()
     modelo = carregar_ml()
     chroma = carregar_chroma() # Aqui carregamos o banco de vetores
     
-    if df is None: st.error("Erro: Dados não encontrados."); st.stop()
+    if not municipios: st.error("Erro: Dados não encontrados."); st.stop()
 
     with st.sidebar:
         st.header("📍 Configuração")
-        cidade = st.selectbox("Município:", df['municipio'].unique())
-        culturas = df[df['municipio'] == cidade]['cultura'].unique()
+        cidade = st.selectbox("Município:", municipios)
+        df = carregar_dados(cidade)
+        if df is None: st.error("Erro: Dados não encontrados."); st.stop()
+        culturas = df['cultura'].unique()
+        cenarios = carregar_cenarios(cidade)
         data_plantio = st.date_input("Data Plantio:", datetime.today())
+        cenario = st.selectbox("Cenário de Preços:", CENARIOS, index=CENARIOS.index(CENARIO_PADRAO))
         
         st.divider()
         st.write("💰 **Defina o Orçamento:**")
@@ -281,7 +321,8 @@ def main():
 
     if btn:
         with st.spinner("Simulando cenários..."):
-            df_res, _ = recomendar_cultura(df, modelo, cidade, area, orcamento, ignorar, data_plantio, usar_todo_orcamento)
+            df_res, _ = recomendar_cultura(df, modelo, cidade, area, orcamento, ignorar, data_plantio, usar_todo_orcamento,
+                                           cenarios, cenario)
             
             if df_res.empty: st.error("Sem dados.")
             else:
@@ -305,6 +346,14 @@ def main():
                     with c4: card_metrica("Colheita", campeao['Colheita'])
                     with c5: card_metrica("Condição", campeao['Clima'], "#fd7e14")
                     
+                    # --- E SE? (consulta direta no cubo de cenários) ---
+                    if cenarios:
+                        with st.expander("📈 E se os preços mudarem? (por hectare)"):
+                            df_cen = cenarios.comparar(campeao['Cultura'], get_decendio(data_plantio))
+                            df_cen = df_cen[['cenario', 'custo_ha', 'receita_esperada_ha', 'lucro_ha', 'roi']]
+                            df_cen.columns = ['Cenário', 'Custo/ha', 'Receita Esperada/ha', 'Lucro/ha', 'ROI']
+                            st.dataframe(df_cen, hide_index=True, use_container_width=True)
+                    
                     # --- BUSCA NO KNOWLEDGE BASE (RAG) ---
                     texto_tecnico = ""
                     if chroma:
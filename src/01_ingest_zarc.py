@@ -1,139 +1,88 @@
-import pandas as pd
 import os
-import random
+import argparse
+
+from motor_regras import carregar_regras, culturas_das_regras
+from zarc_vetorizado import gerar_matriz_zarc, salvar_parquet, benchmark_geracao
+from zarc_streaming import ingerir_zarc_streaming, TAMANHO_CHUNK_PADRAO
 
 # --- CONFIGURAÇÃO DE CAMINHOS ---
 BASE_PATH = r"C:\Users\standisley.costa\Documents\Repos\Standis\agricultura_ia"
 RAW_PATH = os.path.join(BASE_PATH, "data", "raw")
+RAW_DATASET = os.path.join(RAW_PATH, "zarc_portarias") # Dataset particionado (tábuas oficiais)
 
 # Cria a pasta data/raw se ela não existir
 os.makedirs(RAW_PATH, exist_ok=True)
 
-def ingest_zarc_data():
-    """
-    Função principal de Ingestão de Dados (Versão Ampliada 2.0).
-    Simula ZARC para Grãos, Frutas Variadas e Hortaliças.
-    """
-    print(f"--- Iniciando Ingestão ZARC (10 Culturas) em: {RAW_PATH} ---")
-
-    # 1. Definição do Escopo
-    municipios = [
-        {"cod_ibge": 5218805, "nome": "Rio Verde", "uf": "GO"},
-        {"cod_ibge": 5211909, "nome": "Jataí", "uf": "GO"},
-        {"cod_ibge": 5206206, "nome": "Cristalina", "uf": "GO"}, # Capital da Cenoura/Alho
-        {"cod_ibge": 5213103, "nome": "Mineiros", "uf": "GO"},
-        {"cod_ibge": 5205109, "nome": "Catalão", "uf": "GO"}
-    ]
-    
-    # Lista expandida: 2 Grãos + 4 Frutas + 4 Hortaliças
-    culturas = [
-        # Grãos
-        "Soja", "Milho",
-        # Frutas
-        "Banana", "Laranja", "Abacaxi", "Maracujá",
-        # Hortaliças
-        "Tomate Mesa", "Alface", "Cenoura", "Pimentão"
-    ]
-    
-    # Solos
-    tipos_solo = ["AD1", "AD2", "AD3"]
-
-    dados_zarc = []
+# --- ESCOPO PADRÃO ---
+MUNICIPIOS = [
+    {"cod_ibge": 5218805, "nome": "Rio Verde", "uf": "GO"},
+    {"cod_ibge": 5211909, "nome": "Jataí", "uf": "GO"},
+    {"cod_ibge": 5206206, "nome": "Cristalina", "uf": "GO"}, # Capital da Cenoura/Alho
+    {"cod_ibge": 5213103, "nome": "Mineiros", "uf": "GO"},
+    {"cod_ibge": 5205109, "nome": "Catalão", "uf": "GO"}
+]
 
-    print("Gerando matriz de riscos diversificada...")
-    
-    for mun in municipios:
-        for cultura in culturas:
-            for solo in tipos_solo:
-                for decendio in range(1, 37):
-                    
-                    # --- Lógica de Negócio (Simulação) ---
-                    mes = (decendio - 1) // 3 + 1
-                    risco = 20 # Risco base (ótimo)
-                    
-                    # --- GRUPO 1: GRÃOS ---
-                    if cultura == "Soja":
-                        if 4 <= mes <= 9: risco = 40 # Seca
-                        elif solo == "AD1": risco = 30
-                    
-                    elif cultura == "Milho":
-                        if mes > 3 and mes < 10: risco = 30
-                    
-                    # --- GRUPO 2: FRUTAS ---
-                    elif cultura == "Banana":
-                        # Sensível a frio (Jun-Ago)
-                        if 6 <= mes <= 8: risco = 30 
-                    
-                    elif cultura == "Laranja":
-                        # Florada Set/Out precisa de água
-                        if mes == 9 or mes == 10: risco = 30
-                    
-                    elif cultura == "Abacaxi":
-                        # Muito rústico, mas plantio na seca extrema atrasa ciclo
-                        if mes == 7 or mes == 8: risco = 30
-                        # Solo AD1 (Areia) é bom para abacaxi (não apodrece raiz), mantém risco baixo
-                    
-                    elif cultura == "Maracujá":
-                        # Risco alto de doenças fúngicas em chuvas extremas (Jan/Fev)
-                        # E precisa de água na seca (Ago/Set)
-                        if mes <= 2: risco = 30
-                        if mes == 8 or mes == 9: risco = 30
+# Culturas e suas regras de risco vêm de um arquivo (ver src/motor_regras.py).
+# Para adicionar uma cultura basta incluir linhas nesse arquivo, sem mexer no código.
+REGRAS_FILE = os.path.join(BASE_PATH, "data", "regras", "regras_risco_zarc.csv")
 
-                    # --- GRUPO 3: HORTALIÇAS ---
-                    elif cultura == "Tomate Mesa":
-                        # Odeia chuva excessiva
-                        if mes <= 2 or mes == 12: risco = 40 
-                        else: risco = 20
-                            
-                    elif cultura == "Alface":
-                        # Odeia calor/sol forte e chuva na cabeça
-                        if mes == 1 or mes == 12: risco = 30
-                    
-                    elif cultura == "Cenoura":
-                        # Raiz: Se o solo encharcar, apodrece.
-                        # Verão chuvoso em GO (Dez-Fev) é péssimo (Risco Alto)
-                        if mes == 12 or mes <= 2: 
-                            risco = 40
-                        # Inverno seco (com irrigação) é a safra de ouro em Cristalina
-                        elif 5 <= mes <= 8:
-                            risco = 20
-                    
-                    elif cultura == "Pimentão":
-                        # Parente do tomate, mas exige calor constante.
-                        # Frio de Junho/Julho trava o desenvolvimento
-                        if 6 <= mes <= 7: risco = 30
-                        # Chuva excessiva também mancha fruto
-                        if mes == 1: risco = 30
-                    
-                    # --- Fim das Lógicas ---
+# Solos
+TIPOS_SOLO = ["AD1", "AD2", "AD3"]
 
-                    # Variação aleatória
-                    if random.random() > 0.96: risco += 10
-                    
-                    # Formatação
-                    nota_risco = str(risco)
-                    if risco > 40: nota_risco = "INAPTO"
+def ingest_zarc_data(seed=None):
+    """
+    Função principal de Ingestão de Dados (Versão 3.0 - Regras Tabeladas).
+    Simula ZARC para as culturas definidas no arquivo de regras e salva o CSV bruto.
+    """
+    regras = carregar_regras(REGRAS_FILE)
+    culturas = culturas_das_regras(regras)
+    print(f"--- Iniciando Ingestão ZARC ({len(culturas)} Culturas) em: {RAW_PATH} ---")
 
-                    dados_zarc.append({
-                        "uf": mun["uf"],
-                        "municipio": mun["nome"],
-                        "cod_ibge": mun["cod_ibge"],
-                        "cultura": cultura,
-                        "safra": "2025/2026",
-                        "solo": solo,
-                        "decendio": decendio,
-                        "risco": nota_risco
-                    })
+    print("Gerando matriz de riscos diversificada...")
+    tabela = gerar_matriz_zarc(MUNICIPIOS, culturas, TIPOS_SOLO, regras, seed=seed)
 
-    # 3. Salvamento
-    df = pd.DataFrame(dados_zarc)
+    # Salvamento
+    df = tabela.to_pandas()
     arquivo_destino = os.path.join(RAW_PATH, "zarc_goias_bruto.csv")
     
     df.to_csv(arquivo_destino, index=False, sep=";", encoding="utf-8")
     
     print(f"Sucesso! Arquivo salvo: {arquivo_destino}")
-    print(f"Novas culturas adicionadas: Abacaxi, Maracujá, Cenoura, Pimentão.")
+    print(f"Culturas: {', '.join(culturas)}")
     print(f"Total de registros: {len(df)}")
 
+def ingest_zarc_vetorizado(municipios=None, seed=None):
+    """
+    Modo vetorizado (NumPy broadcast): gera o cubo inteiro de uma vez
+    e grava direto em Parquet. Indicado para centenas/milhares de municípios.
+    """
+    regras = carregar_regras(REGRAS_FILE)
+    culturas = culturas_das_regras(regras)
+    municipios = municipios or MUNICIPIOS
+    print(f"--- Iniciando Ingestão ZARC Vetorizada ({len(municipios)} municípios x {len(culturas)} culturas) ---")
+
+    tabela = gerar_matriz_zarc(municipios, culturas, TIPOS_SOLO, regras, seed=seed)
+    arquivo_destino = salvar_parquet(tabela, os.path.join(RAW_PATH, "zarc_goias_bruto.parquet"))
+
+    print(f"Sucesso! Arquivo salvo: {arquivo_destino}")
+    print(f"Total de registros: {tabela.num_rows}")
+
 if __name__ == "__main__":
-    ingest_zarc_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Ingestão (simulada) da matriz de riscos ZARC.")
+    parser.add_argument("--vetorizado", action="store_true", help="Gera a matriz com NumPy e salva em Parquet.")
+    parser.add_argument("--seed", type=int, default=None, help="Semente do gerador aleatório.")
+    parser.add_argument("--portaria", nargs="+", metavar="CSV", help="Ingere tábuas oficiais do ZARC em streaming.")
+    parser.add_argument("--tamanho-chunk", type=int, default=TAMANHO_CHUNK_PADRAO, help="Linhas por chunk no modo --portaria.")
+    parser.add_argument("--encoding", default="utf-8", help="Encoding das tábuas (ex: latin-1).")
+    parser.add_argument("--benchmark", action="store_true", help="Mede a vazão do modo vetorizado com 10M+ linhas.")
+    args = parser.parse_args()
+
+    if args.portaria:
+        ingerir_zarc_streaming(args.portaria, RAW_DATASET, tamanho_chunk=args.tamanho_chunk, encoding=args.encoding)
+    elif args.benchmark:
+        regras = carregar_regras(REGRAS_FILE)
+        benchmark_geracao(culturas_das_regras(regras), TIPOS_SOLO, regras, pasta_saida=RAW_PATH)
+    elif args.vetorizado:
+        ingest_zarc_vetorizado(seed=args.seed)
+    else:
+        ingest_zarc_data(seed=args.seed)
\ No newline at end of file
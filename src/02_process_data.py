@@ -1,10 +1,22 @@
 import pandas as pd
+import numpy as np
 import os
+import sys
+
+from manifesto import Manifesto, assinar_particoes, mascara_particoes, particoes_alteradas, chave_particao, separar_chave
+from particoes import caminho_particao, escrever_particao, remover_particao, abrir_dataset, ler_fatias
 
 # --- CONFIGURAÇÃO ---
 BASE_PATH = r"C:\Users\standisley.costa\Documents\Repos\Standis\agricultura_ia"
 RAW_FILE = os.path.join(BASE_PATH, "data", "raw", "zarc_goias_bruto.csv")
+RAW_PARQUET = os.path.join(BASE_PATH, "data", "raw", "zarc_goias_bruto.parquet") # Saída do modo vetorizado
+RAW_DATASET = os.path.join(BASE_PATH, "data", "raw", "zarc_portarias") # Tábuas oficiais (streaming)
 PROCESSED_PATH = os.path.join(BASE_PATH, "data", "processed")
+ZARC_DATASET = os.path.join(PROCESSED_PATH, "zarc_tratado") # Particionado: uf=/municipio=/<cultura>.parquet
+MANIFEST_FILE = os.path.join(PROCESSED_PATH, "manifesto.json")
+ETAPA = "02_process_data"
+CHAVES_PARTICAO = ['uf', 'municipio', 'cultura']
+FATIA_BRUTO = ['uf', 'cultura'] # Pedaço do bruto na memória por vez (é o particionamento das tábuas oficiais)
 
 os.makedirs(PROCESSED_PATH, exist_ok=True)
 
@@ -25,48 +37,137 @@ def converter_decendio_para_data(decendio):
     
     return f"{meses[indice_mes]}/{sufixos[parte]}"
 
-def processar_dados():
-    print(f"--- Iniciando Processamento (Limpeza) ---")
-    
-    # 1. Leitura do CSV Bruto
-    if not os.path.exists(RAW_FILE):
-        print("ERRO: Arquivo bruto não encontrado. Rode o passo 01 primeiro.")
-        return
+# --- TABELAS DE CONSULTA (indexadas pelo decêndio / categoria) ---
+# Rótulo legível de cada decêndio: PERIODOS_LEGIVEIS[decendio - 1]
+PERIODOS_LEGIVEIS = [converter_decendio_para_data(d) for d in range(1, 37)]
 
-    df = pd.read_csv(RAW_FILE, sep=";", encoding="utf-8")
-    print(f"Lido arquivo bruto com {len(df)} linhas.")
+MAPA_SOLO = {
+    "AD1": "Arenoso (Risco Alto)",
+    "AD2": "Médio",
+    "AD3": "Argiloso (Risco Baixo)"
+}
+
+# Colunas de texto repetitivo que viram categorias (guardam só um código por linha)
+COLUNAS_CATEGORICAS = ['uf', 'municipio', 'cultura', 'safra', 'solo', 'risco']
+
+def gerar_features(df):
+    """
+    Engenharia de features vetorizada (sem .apply linha a linha).
+    As conversões são feitas uma vez por categoria/decêndio e espalhadas pelos códigos.
+    """
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype('category')
 
-    # 2. Engenharia de Features (Criar colunas novas)
-    
     # A. Tratamento do Risco (Para IA/Gráficos)
     # Cria uma coluna numérica: 20, 30, 40. Se for INAPTO, vira 100.
-    df['risco_numerico'] = df['risco'].apply(lambda x: 100 if x == 'INAPTO' else int(x))
-    
+    # Converte só as poucas categorias ("20", "30", "INAPTO"...) e indexa pelos códigos.
+    categorias_risco = df['risco'].cat.categories
+    valores_risco = pd.to_numeric(pd.Series(categorias_risco.astype(str)), errors='coerce').fillna(100).to_numpy(dtype='int16')
+    valores_risco = np.append(valores_risco, np.int16(100)) # Código -1 (vazio) cai aqui = INAPTO
+    df['risco_numerico'] = valores_risco[df['risco'].cat.codes.to_numpy()]
+
     # B. Flag de Viabilidade (Binário)
     # 1 = Plantável (Risco <= 40), 0 = Não Plantável
-    df['e_plantavel'] = df['risco_numerico'].apply(lambda x: 1 if x <= 40 else 0)
+    df['e_plantavel'] = (df['risco_numerico'] <= 40).astype('int8')
 
-    # C. Data Legível
-    df['periodo_legivel'] = df['decendio'].apply(converter_decendio_para_data)
+    # C. Data Legível (consulta direta no array de rótulos pelo decêndio)
+    codigos = df['decendio'].to_numpy(dtype='int64') - 1
+    codigos[(codigos < 0) | (codigos >= len(PERIODOS_LEGIVEIS))] = -1
+    df['periodo_legivel'] = pd.Categorical.from_codes(codigos, categories=PERIODOS_LEGIVEIS, ordered=True)
 
-    # D. Descrição do Solo
-    mapa_solo = {
-        "AD1": "Arenoso (Risco Alto)",
-        "AD2": "Médio",
-        "AD3": "Argiloso (Risco Baixo)"
-    }
-    df['solo_desc'] = df['solo'].map(mapa_solo)
+    # D. Descrição do Solo (mapeia só as categorias)
+    df['solo_desc'] = df['solo'].map(MAPA_SOLO).astype('category')
 
-    # 3. Salvamento Otimizado (Parquet)
-    arquivo_destino = os.path.join(PROCESSED_PATH, "zarc_tratado.parquet")
-    
-    # O Parquet mantém os tipos de dados (int fica int, string fica string)
-    df.to_parquet(arquivo_destino, index=False)
+    return df
+
+def _modificado_em(caminho):
+    """Data de modificação do arquivo ou, numa pasta, do arquivo mais novo dentro dela."""
+    if os.path.isdir(caminho):
+        return max((os.path.getmtime(os.path.join(pasta, nome)) for pasta, _, nomes in os.walk(caminho) for nome in nomes),
+                   default=0.0)
+    return os.path.getmtime(caminho)
+
+def escolher_bruto():
+    """
+    Fonte do bruto mais recente entre as tábuas oficiais (dataset particionado), o Parquet do
+    modo vetorizado e o CSV clássico: um Parquet esquecido de uma execução antiga não esconde
+    um CSV regerado depois. Retorna o caminho (None se não houver nenhum).
+    """
+    existentes = [c for c in (RAW_DATASET, RAW_PARQUET, RAW_FILE) if os.path.exists(c)]
+    return max(existentes, key=_modificado_em, default=None)
+
+def processar_dados(forcar=False):
+    """
+    Processamento incremental: só recalcula as partições (uf, município, cultura)
+    cujo bruto mudou desde a última execução (ver manifesto.json).
+    O bruto é lido fatia a fatia (uf, cultura), nunca inteiro na memória.
+    forcar=True ignora o manifesto e reprocessa tudo.
+    """
+    print(f"--- Iniciando Processamento (Limpeza) ---")
     
+    # 1. Qual bruto? (o mais novo; fica registrado no manifesto)
+    fonte = escolher_bruto()
+    if fonte is None:
+        print("ERRO: Arquivo bruto não encontrado. Rode o passo 01 primeiro.")
+        return
+
+    manifesto = Manifesto(MANIFEST_FILE)
+    etapa = manifesto.etapa(ETAPA)
+    if etapa.get("fonte") not in (None, os.path.basename(fonte)):
+        print(f"🔄 Fonte do bruto mudou: {etapa['fonte']} -> {os.path.basename(fonte)}")
+    etapa["fonte"] = os.path.basename(fonte)
+    print(f"Lendo bruto de: {fonte}")
+
+    def existe_saida(chave):
+        return os.path.exists(caminho_particao(ZARC_DATASET, *separar_chave(chave)))
+
+    antigas = {} if forcar else dict(etapa["entradas"])
+    vistas, total_linhas, total_alteradas, amostra = set(), 0, 0, None
+
+    for _, df in ler_fatias(abrir_dataset(fonte), FATIA_BRUTO):
+        total_linhas += len(df)
+
+        # 2. O que mudou nesta fatia? (assinatura de conteúdo por partição)
+        assinaturas = assinar_particoes(df, CHAVES_PARTICAO)
+        vistas.update(assinaturas)
+        alteradas, _ = particoes_alteradas(assinaturas, antigas, existe_saida)
+        if not alteradas:
+            continue
+        total_alteradas += len(alteradas)
+
+        # 3. Engenharia de Features só nas partições alteradas (uma passada vetorizada)
+        df = gerar_features(df[mascara_particoes(df, CHAVES_PARTICAO, alteradas)].copy())
+
+        # 4. Salvamento Otimizado (Parquet particionado)
+        # O Parquet mantém os tipos de dados (categorias viram colunas dictionary-encoded)
+        for (uf, municipio, cultura), grupo in df.groupby(CHAVES_PARTICAO, observed=True):
+            escrever_particao(grupo, ZARC_DATASET, uf, municipio, cultura)
+            chave = chave_particao(uf, municipio, cultura)
+            etapa["entradas"][chave] = assinaturas[chave]
+        etapa["saidas"].update(assinar_particoes(df, CHAVES_PARTICAO))
+        if amostra is None:
+            amostra = df[['cultura', 'periodo_legivel', 'risco', 'risco_numerico']].head()
+
+    # Partições que sumiram do bruto
+    removidas = [chave for chave in etapa["entradas"] if chave not in vistas]
+    print(f"Lido bruto com {total_linhas} linhas.")
+    print(f"Partições: {len(vistas)} | Alteradas: {total_alteradas} | Removidas: {len(removidas)}")
+
+    for chave in removidas:
+        remover_particao(ZARC_DATASET, *separar_chave(chave))
+        etapa["entradas"].pop(chave, None)
+        etapa["saidas"].pop(chave, None)
+
+    manifesto.salvar()
+
     print(f"✅ Processamento concluído!")
-    print(f"Arquivo limpo salvo em: {arquivo_destino}")
-    print("Amostra dos dados tratados:")
-    print(df[['cultura', 'periodo_legivel', 'risco', 'risco_numerico']].head())
+    print(f"Dataset limpo salvo em: {ZARC_DATASET}")
+    if amostra is not None:
+        print("Amostra dos dados tratados:")
+        print(amostra)
+    else:
+        print("Nenhuma partição mudou: nada a reprocessar.")
 
 if __name__ == "__main__":
-    processar_dados()
\ No newline at end of file
+    processar_dados(forcar="--forcar" in sys.argv)
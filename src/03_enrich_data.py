@@ -1,13 +1,38 @@
 import pandas as pd
-import requests
 import os
-import time
-from datetime import datetime
+import sys
+
+from clima import ClienteClima
+from historico_clima import HistoricoClima
+from economia import carregar_tabela_economica, versao_tabela, adicionar_dados_economicos, gerar_cubo_economico
+from climatologia import climatologia_em_blocos, VERSAO_CLIMATOLOGIA
+
+from manifesto import Manifesto, assinar_particoes, mascara_particoes, particoes_alteradas, chave_particao, separar_chave
+from particoes import caminho_particao, escrever_particao, remover_particao, ler_particionado
+from indice_janelas import atualizar_indice_janelas
 
 # --- CONFIGURAÇÃO ---
 BASE_PATH = r"C:\Users\standisley.costa\Documents\Repos\Standis\agricultura_ia"
-INPUT_FILE = os.path.join(BASE_PATH, "data", "processed", "zarc_tratado.parquet")
+INPUT_FILE = os.path.join(BASE_PATH, "data", "processed", "zarc_tratado.parquet") # Formato antigo (arquivo único)
+INPUT_DATASET = os.path.join(BASE_PATH, "data", "processed", "zarc_tratado")
 OUTPUT_PATH = os.path.join(BASE_PATH, "data", "processed")
+GOLD_DATASET = os.path.join(OUTPUT_PATH, "dataset_gold") # Particionado: uf=/municipio=/<cultura>.parquet
+INDICE_JANELAS = os.path.join(OUTPUT_PATH, "indice_janelas.parquet") # Melhor janela por (município, cultura, decêndio) para os agentes
+MANIFEST_FILE = os.path.join(OUTPUT_PATH, "manifesto.json")
+ETAPA = "03_enrich_data"
+CHAVES_PARTICAO = ['uf', 'municipio', 'cultura']
+
+# Clima: histórico 2020-2023, cache das respostas brutas e limite de requisições simultâneas
+# Para estender a climatologia basta mudar o período: só os dias novos são baixados.
+CACHE_CLIMA = os.path.join(BASE_PATH, "data", "cache", "clima")
+HISTORICO_CLIMA = os.path.join(BASE_PATH, "data", "clima_historico")
+MAX_REQUISICOES = 8
+INICIO_HISTORICO = "2020-01-01"
+FIM_HISTORICO = "2023-12-31"
+
+# Estimativas econômicas por hectare: tabela versionada de cenários (pessimista/base/otimista, por mês)
+TABELA_ECONOMICA = os.path.join(BASE_PATH, "data", "regras", "cenarios_economicos.csv")
+CUBO_DATASET = os.path.join(OUTPUT_PATH, "cubo_economico") # uf=/municipio=/<cultura>.parquet, uma linha por cenário
 
 # Coordenadas Reais dos Municípios (Lat/Lon)
 COORDENADAS = {
@@ -18,115 +43,83 @@ COORDENADAS = {
     "Catalão":    {"lat": -18.17, "lon": -47.94}
 }
 
-def get_decendio(date_obj):
-    """Calcula o decêndio (1-36) a partir de uma data."""
-    day = date_obj.day
-    month = date_obj.month
-    
-    # Decêndio dentro do mês (0, 1 ou 2)
-    dec_mes = 0 if day <= 10 else (1 if day <= 20 else 2)
-    
-    # Decêndio do ano (1 a 36)
-    return (month - 1) * 3 + dec_mes + 1
-
-def buscar_clima_historico(cidade, lat, lon):
+def main(forcar=False):
     """
-    Busca 4 anos de dados reais no Open-Meteo e calcula a média por decêndio.
+    Enriquecimento incremental: só refaz as partições (uf, município, cultura) cujo ZARC
+    tratado, tabela econômica ou histórico climático mudou. Do clima, só baixa os dias que faltam.
     """
-    print(f"🌍 Baixando histórico real para {cidade}...")
+    print(f"--- Iniciando Enriquecimento com DADOS REAIS ---")
     
-    # URL da API de Histórico (Gratuita) - Pegando de 2020 a 2023
-    url = "https://archive-api.open-meteo.com/v1/archive"
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "start_date": "2020-01-01",
-        "end_date": "2023-12-31",
-        "daily": ["temperature_2m_mean", "precipitation_sum"],
-        "timezone": "America/Sao_Paulo"
+    # 1. Carregar ZARC
+    df_zarc = ler_particionado(INPUT_DATASET, INPUT_FILE)
+    if df_zarc is None:
+        print(f"ERRO: Dataset {INPUT_DATASET} não encontrado. Rode o passo 02.")
+        return
+
+    # 2. Atualizar o histórico climático local dos municípios
+    # Só baixa os dias que ainda faltam (sem rede nenhuma se já estiver completo)
+    locais = {
+        cidade: (COORDENADAS[cidade]['lat'], COORDENADAS[cidade]['lon'])
+        for cidade in df_zarc['municipio'].unique() if cidade in COORDENADAS
     }
-    
-    try:
-        response = requests.get(url, params=params)
-        data = response.json()
-        
-        # Cria DataFrame temporário com os dados diários
-        df_diario = pd.DataFrame({
-            "time": data["daily"]["time"],
-            "temp": data["daily"]["temperature_2m_mean"],
-            "chuva": data["daily"]["precipitation_sum"]
-        })
-        
-        # Converte para data real e calcula o decêndio de cada linha
-        df_diario['date'] = pd.to_datetime(df_diario['time'])
-        df_diario['decendio'] = df_diario['date'].apply(get_decendio)
-        
-        # AGRUPAMENTO (A Mágica da Climatologia)
-        # Queremos saber: "Em média, quanto chove no decêndio 1 em Rio Verde?"
-        climatologia = df_diario.groupby('decendio').agg({
-            'temp': 'mean',          # Temperatura média do período
-            'chuva': 'mean'          # Chuva média diária (multiplicaremos por 10 depois para ter o acumulado)
-        }).reset_index()
-        
-        # A API retorna chuva diária média. O decêndio tem 10 dias.
-        climatologia['chuva_acumulada_decendio'] = climatologia['chuva'] * 10
-        climatologia['municipio'] = cidade
-        
-        return climatologia[['municipio', 'decendio', 'temp', 'chuva_acumulada_decendio']]
-
-    except Exception as e:
-        print(f"❌ Erro ao baixar dados para {cidade}: {e}")
-        return None
-
-def adicionar_dados_economicos(df):
-    print("... Adicionando estimativas econômicas ...")
-    tabela_precos = {
-        "Soja": {"custo": 4500, "receita": 6500},
-        "Milho": {"custo": 3800, "receita": 5200},
-        "Banana": {"custo": 12000, "receita": 25000},
-        "Laranja": {"custo": 15000, "receita": 30000},
-        "Tomate Mesa": {"custo": 25000, "receita": 60000},
-        "Alface": {"custo": 8000, "receita": 18000},
-        "Cenoura": {"custo": 18000, "receita": 40000},
-        "Pimentão": {"custo": 22000, "receita": 50000},
-        "Abacaxi": {"custo": 14000, "receita": 32000},
-        "Maracujá": {"custo": 16000, "receita": 35000}
+    print(f"🌍 Atualizando histórico climático de {len(locais)} municípios...")
+    cliente = ClienteClima(CACHE_CLIMA, MAX_REQUISICOES)
+    historico = HistoricoClima(HISTORICO_CLIMA, cliente)
+    novos, erros = historico.atualizar_varios(locais, INICIO_HISTORICO, FIM_HISTORICO)
+    cliente.fechar()
+
+    for cidade, erro in erros.items():
+        print(f"❌ Erro ao baixar dados para {cidade}: {erro}")
+    print(f"... {sum(novos.values())} dias novos baixados ...")
+    versao_clima = {cidade: historico.versao(lat, lon) for cidade, (lat, lon) in locais.items()}
+
+    # 3. O que mudou? Entrada de cada partição = conteúdo ZARC + tabela econômica + histórico do município
+    manifesto = Manifesto(MANIFEST_FILE)
+    etapa = manifesto.etapa(ETAPA)
+    tabela_economica = carregar_tabela_economica(TABELA_ECONOMICA)
+    versao_economia = versao_tabela(tabela_economica)
+    assinaturas = {
+        chave: f"{assinatura}:{versao_economia}:{VERSAO_CLIMATOLOGIA}:{versao_clima.get(separar_chave(chave)[1], '-')}"
+        for chave, assinatura in assinar_particoes(df_zarc, CHAVES_PARTICAO).items()
     }
-    df['custo_ha_est'] = df['cultura'].map(lambda x: tabela_precos.get(x, {}).get('custo', 0))
-    df['receita_ha_est'] = df['cultura'].map(lambda x: tabela_precos.get(x, {}).get('receita', 0))
-    df['roi_potencial'] = (df['receita_ha_est'] - df['custo_ha_est']) / df['custo_ha_est']
-    return df
 
-def main():
-    print(f"--- Iniciando Enriquecimento com DADOS REAIS ---")
-    
-    # 1. Carregar ZARC
-    if not os.path.exists(INPUT_FILE):
-        print(f"ERRO: Arquivo {INPUT_FILE} não encontrado. Rode o passo 02.")
+    def existe_saida(chave):
+        return all(os.path.exists(caminho_particao(raiz, *separar_chave(chave))) for raiz in (GOLD_DATASET, CUBO_DATASET))
+
+    antigas = {} if forcar else etapa["entradas"]
+    alteradas, removidas = particoes_alteradas(assinaturas, antigas, existe_saida)
+    print(f"Partições: {len(assinaturas)} | Alteradas: {len(alteradas)} | Removidas: {len(removidas)}")
+
+    for chave in removidas:
+        remover_particao(GOLD_DATASET, *separar_chave(chave))
+        remover_particao(CUBO_DATASET, *separar_chave(chave))
+        etapa["entradas"].pop(chave, None)
+        etapa["saidas"].pop(chave, None)
+
+    pares_removidos = [separar_chave(chave)[1:] for chave in removidas]
+    if not alteradas:
+        if removidas or not os.path.exists(INDICE_JANELAS):
+            atualizar_indice_janelas(INDICE_JANELAS, pares_removidos=pares_removidos, raiz_gold=GOLD_DATASET)
+        manifesto.salvar()
+        print("Nenhuma partição mudou: nada a enriquecer.")
         return
-    df_zarc = pd.read_parquet(INPUT_FILE)
-    
-    # 2. Baixar Clima para cada cidade (Loop)
-    dfs_clima = []
-    cidades_unicas = df_zarc['municipio'].unique()
+
+    df_zarc = df_zarc[mascara_particoes(df_zarc, CHAVES_PARTICAO, alteradas)]
     
-    for cidade in cidades_unicas:
-        if cidade in COORDENADAS:
-            coords = COORDENADAS[cidade]
-            df_clim = buscar_clima_historico(cidade, coords['lat'], coords['lon'])
-            if df_clim is not None:
-                dfs_clima.append(df_clim)
-            # Pausa para ser gentil com a API
-            time.sleep(1) 
+    # 4. Climatologia das cidades das partições alteradas, direto das séries diárias em disco (memmap)
+    # Motor vetorizado: todas as cidades numa passada, em blocos para limitar a memória
+    cidades_clima = [c for c in df_zarc['municipio'].unique() if c in locais and c not in erros]
+    df_clima_completo = climatologia_em_blocos({cidade: historico.serie(*locais[cidade]) for cidade in cidades_clima})
     
-    # Junta todos os dados climáticos num tabelão
-    if not dfs_clima:
+    if df_clima_completo.empty:
         print("Erro crítico: Nenhum dado climático baixado.")
+        manifesto.salvar()
         return
         
-    df_clima_completo = pd.concat(dfs_clima)
+    # Mesmo tipo categórico do ZARC, para o merge manter a coluna compacta
+    df_clima_completo['municipio'] = df_clima_completo['municipio'].astype(df_zarc['municipio'].dtype)
     
-    # 3. Cruzamento (Merge) ZARC + CLIMA
+    # 5. Cruzamento (Merge) ZARC + CLIMA
     # Juntamos pela chave composta: MUNICÍPIO + DECÊNDIO
     print("... Cruzando ZARC com CLIMA ...")
     df_final = pd.merge(
@@ -136,20 +129,30 @@ def main():
         how='left'
     )
     
-    # 4. Adicionar Economia
-    df_final = adicionar_dados_economicos(df_final)
+    # 6. Adicionar Economia (cenário base no dataset gold + cubo com todos os cenários)
+    print("... Adicionando estimativas econômicas e cubo de cenários ...")
+    df_final = adicionar_dados_economicos(df_final, tabela_economica)
+    df_cubo = gerar_cubo_economico(df_final, tabela_economica)
+    cubos = dict(iter(df_cubo.groupby(CHAVES_PARTICAO, observed=True)))
     
-    # 5. Salvar
-    arquivo_final = os.path.join(OUTPUT_PATH, "dataset_gold_mvp.parquet")
-    df_final.to_parquet(arquivo_final, index=False)
+    # 7. Salvar (só as partições alteradas)
+    for (uf, municipio, cultura), grupo in df_final.groupby(CHAVES_PARTICAO, observed=True):
+        escrever_particao(grupo, GOLD_DATASET, uf, municipio, cultura)
+        escrever_particao(cubos[(uf, municipio, cultura)], CUBO_DATASET, uf, municipio, cultura)
+        chave = chave_particao(uf, municipio, cultura)
+        etapa["entradas"][chave] = assinaturas[chave]
+    etapa["saidas"].update(assinar_particoes(df_final, CHAVES_PARTICAO))
+    # Índice das melhores janelas: só os (município, cultura) reprocessados são trocados
+    atualizar_indice_janelas(INDICE_JANELAS, df_final, pares_removidos, raiz_gold=GOLD_DATASET)
+    manifesto.salvar()
     
-    print(f"\n✅ SUCESSO! Dataset enriquecido salvo em: {arquivo_final}")
+    print(f"\n✅ SUCESSO! Dataset enriquecido salvo em: {GOLD_DATASET}")
     print("Exemplo de dado real recuperado (Cristalina - Decêndio 1):")
     amostra = df_final[
         (df_final['municipio']=='Cristalina') & 
         (df_final['decendio']==1)
     ].head(1)
-    print(amostra[['municipio', 'decendio', 'temp', 'chuva_acumulada_decendio']].to_string(index=False))
+    print(amostra[['municipio', 'decendio', 'temp', 'chuva_acumulada_decendio', 'chuva_p10', 'chuva_p90', 'veranicos']].to_string(index=False))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(forcar="--forcar" in sys.argv)
@@ -1,10 +1,12 @@
 import os
-import requests
-import time
+import sys
+from baixador import BaixadorDocumentos, VERIFICADO, INALTERADO, RETOMADO
 
 # --- CONFIGURAÇÃO ---
 BASE_PATH = r"C:\Users\standisley.costa\Documents\Repos\Standis\agricultura_ia"
 KNOWLEDGE_PATH = os.path.join(BASE_PATH, "data", "knowledge")
+REGISTRO_DOWNLOADS = os.path.join(KNOWLEDGE_PATH, "registro_downloads.json") # Tamanho, sha256, ETag de cada PDF
+MAX_CONEXOES = 8 # Downloads simultâneos (uma sessão com pool de conexões compartilhado)
 
 os.makedirs(KNOWLEDGE_PATH, exist_ok=True)
 
@@ -32,54 +34,37 @@ MANUAIS = {
     "pimentao_cultivo.pdf": "https://www.infoteca.cnptia.embrapa.br/infoteca/bitstream/doc/111863/1/ct-52.pdf"
 }
 
-def baixar_pdfs():
-    print(f"--- 📚 Iniciando Download da Biblioteca Técnica (11 Arquivos) ---")
+def baixar_pdfs(revalidar=False):
+    """
+    Baixa a biblioteca em paralelo. Arquivos já baixados são conferidos pelo registro
+    (tamanho + sha256); downloads interrompidos continuam do ponto onde pararam.
+    revalidar=True pergunta ao servidor (ETag/Last-Modified) se algum PDF mudou.
+    """
+    print(f"--- 📚 Iniciando Download da Biblioteca Técnica ({len(MANUAIS)} Arquivos) ---")
     print(f"Destino: {KNOWLEDGE_PATH}\n")
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
+    baixador = BaixadorDocumentos(KNOWLEDGE_PATH, REGISTRO_DOWNLOADS, MAX_CONEXOES)
+    resultados, erros = baixador.baixar_varios(MANUAIS, revalidar=revalidar)
+    baixador.fechar()
 
-    sucessos = 0
-    falhas = 0
-
-    for nome_arquivo, url in MANUAIS.items():
-        caminho_final = os.path.join(KNOWLEDGE_PATH, nome_arquivo)
-        
-        # Se o arquivo já existe e tem tamanho > 0, pula
-        if os.path.exists(caminho_final) and os.path.getsize(caminho_final) > 0:
-            print(f"⚠️  [Já Existe] {nome_arquivo}")
-            sucessos += 1
-            continue
-            
-        print(f"⬇️  Baixando: {nome_arquivo}...")
-        
-        try:
-            response = requests.get(url, headers=headers, stream=True, timeout=60)
-            
-            if response.status_code == 200:
-                with open(caminho_final, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                print(f"   ✅ Download concluído.")
-                sucessos += 1
-            else:
-                print(f"   ❌ Erro {response.status_code} no link da Embrapa.")
-                falhas += 1
-                
-        except Exception as e:
-            print(f"   ❌ Falha de conexão: {e}")
-            falhas += 1
-        
-        # Pausa de 1 segundo para não sobrecarregar o servidor da Embrapa
-        time.sleep(1)
+    for nome_arquivo, situacao in sorted(resultados.items()):
+        if situacao == VERIFICADO:
+            print(f"⚠️  [Já Existe] {nome_arquivo} (conferido)")
+        elif situacao == INALTERADO:
+            print(f"⚠️  [Sem Mudança] {nome_arquivo}")
+        elif situacao == RETOMADO:
+            print(f"⬇️  {nome_arquivo}: ✅ Download retomado e concluído.")
+        else:
+            print(f"⬇️  {nome_arquivo}: ✅ Download concluído.")
+    for nome_arquivo, erro in sorted(erros.items()):
+        print(f"   ❌ {nome_arquivo}: {erro}")
 
     print("\n" + "="*40)
     print(f"RELATÓRIO FINAL:")
-    print(f"✅ Arquivos prontos: {sucessos}")
-    print(f"❌ Falhas: {falhas}")
+    print(f"✅ Arquivos prontos: {len(resultados)}")
+    print(f"❌ Falhas: {len(erros)}")
     print(f"📂 Verifique a pasta: {KNOWLEDGE_PATH}")
     print("="*40)
 
 if __name__ == "__main__":
-    baixar_pdfs()
\ No newline at end of file
+    baixar_pdfs(revalidar="--revalidar" in sys.argv)
\ No newline at end of file
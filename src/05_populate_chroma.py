@@ -1,66 +1,81 @@
 import os
-import chromadb
-from chromadb.utils import embedding_functions
+import sys
+
+from indice_incremental import sincronizar_colecao, ETAPA_INDICE
+from armazem_vetores import abrir_colecao, caminho_padrao, BACKENDS, BACKENDS_QUANTIZADOS, BACKEND_PADRAO
+from indice_quantizado import exportar_colecao
+from embedding_chroma import EmbeddingComCache
+from indice_lexical import IndiceBM25, caminho_indice
+from cache_consultas import marcar_versao
 
 # --- CONFIGURAÇÃO ---
 BASE_PATH = r"C:\Users\standisley.costa\Documents\Repos\Standis\agricultura_ia"
 KNOWLEDGE_PATH = os.path.join(BASE_PATH, "data", "knowledge")
+DATA_PATH = os.path.join(BASE_PATH, "data")
 DB_PATH = os.path.join(BASE_PATH, "data", "chroma_db") # Pasta onde o banco vai ficar
+CACHE_EMBEDDINGS = os.path.join(BASE_PATH, "data", "cache", "embeddings") # Vetores compartilhados com Milvus e agentes
+MANIFEST_FILE = os.path.join(BASE_PATH, "data", "processed", "manifesto.json") # Hash de cada manual e ids dos seus fragmentos
+TAMANHO_LOTE = 256 # Fragmentos por inserção (a memória não cresce com o tamanho dos manuais)
+MAX_PROCESSOS = None # Processos para extrair os PDFs (None = todos os núcleos)
+
+def main(max_processos=MAX_PROCESSOS, forcar=False, backend=BACKEND_PADRAO, quantizar=None):
+    print(f"--- 🧠 Iniciando Banco Vetorial ({backend}) ---")
 
-print("--- 🧠 Iniciando Banco Vetorial (ChromaDB) ---")
+    # Função de Embedding (A IA que transforma texto em número)
+    # Usamos o modelo padrão 'all-MiniLM-L6-v2' que é leve e rápido
+    # Com cache em disco: trecho já vetorizado (por este ou outro script) não passa pelo modelo de novo
+    emb_fn = EmbeddingComCache(CACHE_EMBEDDINGS, model_name="all-MiniLM-L6-v2")
 
-# 1. INICIALIZAÇÃO
-# Cria um banco persistente no disco (não apaga quando fecha o python)
-client = chromadb.PersistentClient(path=DB_PATH)
+    # 1. INICIALIZAÇÃO
+    # Cria ou recupera a coleção num banco persistente no disco (Chroma, Milvus Lite ou matriz NumPy)
+    caminho = DB_PATH if backend == "chroma" else caminho_padrao(backend, DATA_PATH)
+    collection = abrir_colecao(backend, caminho, "manual_tecnico_agricola", emb_fn)
 
-# Função de Embedding (A IA que transforma texto em número)
-# Usamos o modelo padrão 'all-MiniLM-L6-v2' que é leve e rápido
-emb_fn = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
+    print(f"✅ Banco conectado em: {caminho}")
 
-# Cria ou recupera a coleção
-collection = client.get_or_create_collection(
-    name="manual_tecnico_agricola",
-    embedding_function=emb_fn
-)
+    # 2. SINCRONIZAR (.txt sintéticos + PDFs da Embrapa, em fluxo)
+    # Ids = hash do conteúdo: só trechos novos/alterados são vetorizados, trechos que
+    # sumiram dos manuais são apagados e manuais que não mudaram nem são relidos.
+    print(f"📖 Sincronizando manuais de {KNOWLEDGE_PATH}...")
+    # Cada backend tem a sua seção no manifesto (o Chroma mantém a original)
+    etapa = ETAPA_INDICE if backend == "chroma" else f"{ETAPA_INDICE}_{backend}"
+    resumo = sincronizar_colecao(collection, KNOWLEDGE_PATH, MANIFEST_FILE, max_processos, TAMANHO_LOTE, forcar, etapa)
 
-print(f"✅ Banco conectado em: {DB_PATH}")
+    print(f"📄 Documentos relidos: {resumo['documentos_relidos']}")
+    print(f"🚀 Fragmentos novos: {resumo['novos']} | Mantidos: {resumo['mantidos']} | Removidos: {resumo['removidos']}")
+    if resumo['novos'] or resumo['removidos']:
+        print(f"✅ Sucesso! Dados salvos e indexados.")
+    else:
+        print("⚠️ Nenhum dado novo encontrado para inserir.")
 
-# 2. PROCESSAR ARQUIVOS
-arquivos = [f for f in os.listdir(KNOWLEDGE_PATH) if f.endswith('.txt')]
-print(f"📖 Lendo {len(arquivos)} manuais sintéticos...")
+    # 3. ÍNDICE LEXICAL (BM25) com os mesmos trechos, para a busca híbrida dos agentes
+    pasta_bm25 = caminho_indice(DATA_PATH, backend)
+    if resumo['novos'] or resumo['removidos'] or not os.path.exists(pasta_bm25):
+        IndiceBM25.da_colecao(collection).salvar(pasta_bm25)
+        print(f"🔤 Índice BM25 atualizado em: {pasta_bm25}")
+    if resumo['novos'] or resumo['removidos']:
+        marcar_versao(DATA_PATH, backend)  # Caches de consulta dos agentes/dashboard se esvaziam sozinhos
 
-ids = []
-documentos = []
-metadados = []
+    # 4. (opcional) CÓPIA QUANTIZADA (int8/float16 em memmap) para rodar o dashboard com pouca RAM
+    if quantizar:
+        pasta_quantizada = caminho_padrao(quantizar, DATA_PATH)
+        total = exportar_colecao(collection, os.path.join(pasta_quantizada, "manual_tecnico_agricola"), quantizar)
+        IndiceBM25.da_colecao(collection).salvar(caminho_indice(DATA_PATH, quantizar))
+        marcar_versao(DATA_PATH, quantizar)
+        print(f"🗜️ Índice {quantizar} com {total} vetores em: {pasta_quantizada}")
 
-for arquivo in arquivos:
-    caminho = os.path.join(KNOWLEDGE_PATH, arquivo)
-    
-    with open(caminho, 'r', encoding='utf-8') as f:
-        texto_completo = f.read()
-    
-    # Fatiamento por parágrafos duplos
-    paragrafos = texto_completo.split('\n\n')
-    
-    for i, paragrafo in enumerate(paragrafos):
-        paragrafo = paragrafo.strip()
-        if len(paragrafo) < 20: continue 
-        
-        # Prepara listas para inserção em lote (batch)
-        id_unico = f"{arquivo}_{i}" # ID ex: soja_manual.txt_0
-        
-        ids.append(id_unico)
-        documentos.append(paragrafo) # O Chroma vetoriza isso automaticamente
-        metadados.append({"fonte": arquivo, "topico": arquivo.replace(".txt", "")})
+    cache = emb_fn.estatisticas()
+    print(f"🗃️ Cache de embeddings: {cache['acertos']} acertos | {cache['faltas']} vetorizados | {cache['vetores']} guardados")
 
-# 3. INSERÇÃO NO BANCO
-if documentos:
-    print(f"🚀 Inserindo {len(documentos)} fragmentos de conhecimento...")
-    collection.add(
-        ids=ids,
-        documents=documentos,
-        metadatas=metadados
-    )
-    print(f"✅ Sucesso! Dados salvos e indexados.")
-else:
-    print("⚠️ Nenhum dado novo encontrado para inserir.")
\ No newline at end of file
+if __name__ == "__main__":
+    # Guarda obrigatória: os processos do pool (spawn no Windows) reimportam este arquivo
+    # --backend numpy|milvus: mesma sincronização, outro banco (padrão: chroma)
+    backend = sys.argv[sys.argv.index("--backend") + 1] if "--backend" in sys.argv else BACKEND_PADRAO
+    if backend not in BACKENDS:
+        sys.exit(f"❌ Backend desconhecido: {backend} (opções: {', '.join(BACKENDS)})")
+    # --quantizar int8|float16: também gera a cópia quantizada (BACKEND_VETORES = "int8" nos agentes)
+    quantizar = sys.argv[sys.argv.index("--quantizar") + 1] if "--quantizar" in sys.argv else None
+    if quantizar and quantizar not in BACKENDS_QUANTIZADOS:
+        sys.exit(f"❌ Quantização desconhecida: {quantizar} (opções: {', '.join(BACKENDS_QUANTIZADOS)})")
+    main(int(sys.argv[sys.argv.index("--processos") + 1]) if "--processos" in sys.argv else MAX_PROCESSOS,
+         forcar="--forcar" in sys.argv, backend=backend, quantizar=quantizar)
@@ -1,80 +1,131 @@
 import os
+import time
+import argparse
+import tempfile
 from pymilvus import MilvusClient
-from sentence_transformers import SentenceTransformer
 from tqdm import tqdm # Barra de progresso
 
+from ingestao_documentos import gerar_fragmentos, fragmentos_txt, listar_documentos, em_lotes
+from armazem_vetores import ColecaoMilvus
+from indice_incremental import id_fragmento
+from cache_consultas import marcar_versao
+from indice_lexical import IndiceBM25, caminho_indice
+from vetorizacao import Codificador, MODELO_PADRAO, DIMENSAO_PADRAO, TAMANHO_BATCH_PADRAO
+
 # --- CONFIGURAÇÃO ---
 BASE_PATH = r"C:\Users\standisley.costa\Documents\Repos\Standis\agricultura_ia"
+DATA_PATH = os.path.join(BASE_PATH, "data")
 KNOWLEDGE_PATH = os.path.join(BASE_PATH, "data", "knowledge")
 DB_PATH = os.path.join(BASE_PATH, "data", "milvus_agro.db") # O arquivo do banco
-
-# --- 1. INICIALIZAÇÃO ---
-print("--- 🧠 Iniciando Banco Vetorial (Milvus Lite) ---")
-
-# Inicializa o Milvus em um arquivo local (Ideal para MVP)
-client = MilvusClient(DB_PATH)
+CACHE_EMBEDDINGS = os.path.join(BASE_PATH, "data", "cache", "embeddings") # Vetores compartilhados com Chroma e agentes
 
 # Nome da Coleção (Tabela)
 COLLECTION_NAME = "manual_tecnico_agricola"
+TAMANHO_LOTE_CODIFICACAO = 1024 # Fragmentos entregues de uma vez ao encode (divididos em batches/processos)
+TAMANHO_LOTE_INSERCAO = 256 # Fragmentos por insert no Milvus (tamanho fixo, memória constante)
+MAX_PROCESSOS = None # Processos para extrair os PDFs (None = todos os núcleos)
+
+def criar_colecao(client, nome=COLLECTION_NAME, dimensao=DIMENSAO_PADRAO):
+    # Se já existe, apaga para recriar limpo (Reset do MVP)
+    # Vetores de tamanho 384 (Padrão do modelo MiniLM), id = hash do conteúdo (o mesmo do 05_populate_chroma)
+    return ColecaoMilvus(client, nome, dimensao=dimensao, recriar=True)
+
+def popular(colecao, codificador, fragmentos, progresso=True):
+    """Vetoriza os fragmentos em lotes e insere em lotes de tamanho fixo. Retorna quantos entraram."""
+    inseridos, vistos = 0, set()
+    lotes = em_lotes(fragmentos, TAMANHO_LOTE_CODIFICACAO)
+    for lote in (tqdm(lotes, desc="Lotes") if progresso else lotes):
+        # Mesmo texto duas vezes na mesma página/arquivo entra uma vez só (o id inclui fonte e página)
+        unicos = []
+        for f in lote:
+            fid = id_fragmento(f)
+            if fid not in vistos:
+                vistos.add(fid)
+                unicos.append((fid, f))
+        lote = unicos
+
+        # A MÁGICA: Transforma o lote inteiro de textos em vetores (batches / pool de processos)
+        vetores = codificador.codificar([f["texto"] for _, f in lote])
+
+        for inicio in range(0, len(lote), TAMANHO_LOTE_INSERCAO):
+            pacote = lote[inicio:inicio + TAMANHO_LOTE_INSERCAO]
+            colecao.upsert(
+                ids=[fid for fid, _ in pacote],
+                documents=[f["texto"] for _, f in pacote],
+                metadatas=[{k: v for k, v in f.items() if k not in ("id", "texto")} for _, f in pacote],
+                embeddings=vetores[inicio:inicio + TAMANHO_LOTE_INSERCAO]
+            )
+            inseridos += len(pacote)
+    return inseridos
+
+def main(max_processos=MAX_PROCESSOS, batch_size=TAMANHO_BATCH_PADRAO, processos_encode=0):
+    # --- 1. INICIALIZAÇÃO ---
+    print("--- 🧠 Iniciando Banco Vetorial (Milvus Lite) ---")
+
+    # Inicializa o Milvus em um arquivo local (Ideal para MVP)
+    client = MilvusClient(DB_PATH)
+    colecao = criar_colecao(client)
+    print(f"✅ Coleção '{COLLECTION_NAME}' criada com sucesso!")
+
+    # --- 2. CARREGAR MODELO DE EMBEDDING ---
+    print("📥 Carregando modelo de IA (sentence-transformers)...")
+    # Modelo pequeno, rápido e gratuito para rodar no seu PC
+    # Com cache em disco: reconstruir a coleção só vetoriza os trechos que mudaram
+    codificador = Codificador(MODELO_PADRAO, batch_size=batch_size, processos=processos_encode,
+                              pasta_cache=CACHE_EMBEDDINGS)
+
+    # --- 3. PROCESSAR ARQUIVOS E INSERIR (em fluxo, lote a lote) ---
+    # .txt sintéticos + PDFs da Embrapa (extraídos página a página num pool de processos)
+    print(f"📖 Lendo manuais de {KNOWLEDGE_PATH}...")
+    inseridos = popular(colecao, codificador, gerar_fragmentos(KNOWLEDGE_PATH, max_processos))
+    codificador.fechar()
+
+    print(f"✅ Sucesso! Inseridos: {inseridos} vetores.")
+    cache = codificador.cache.estatisticas()
+    print(f"🗃️ Cache de embeddings: {cache['acertos']} acertos | {cache['faltas']} vetorizados")
+
+    # --- 4. ÍNDICE LEXICAL (BM25) com os mesmos trechos (a busca híbrida responde direto dele) ---
+    pasta_bm25 = caminho_indice(DATA_PATH, "milvus")
+    IndiceBM25.da_colecao(colecao).salvar(pasta_bm25)
+    print(f"🔤 Índice BM25 atualizado em: {pasta_bm25}")
+    marcar_versao(DATA_PATH, "milvus")  # Caches de consulta dos agentes se esvaziam sozinhos
+    print(f"💾 Banco salvo em: {DB_PATH}")
+    print("O sistema agora 'sabe' ler e recomendar com base técnica.")
+
+def fragmentos_sinteticos(n):
+    """n fragmentos distintos a partir dos parágrafos dos manuais .txt (para o benchmark)."""
+    base = [f for a in listar_documentos(KNOWLEDGE_PATH) if a.endswith(".txt")
+            for f in fragmentos_txt(os.path.join(KNOWLEDGE_PATH, a))]
+    for i in range(n):
+        f = base[i % len(base)]
+        yield {**f, "texto": f"{f['texto']} (trecho {i})"}
+
+def benchmark(tamanhos=(1_000, 10_000, 100_000), batch_size=TAMANHO_BATCH_PADRAO, processos_encode=0):
+    """Fragmentos/segundo (encode + insert) num Milvus Lite temporário, só CPU (sem cache: mede o modelo)."""
+    print(f"--- ⏱️ Benchmark populate_milvus (batch={batch_size}, processos encode={processos_encode or 1}) ---")
+    codificador = Codificador(MODELO_PADRAO, batch_size=batch_size, processos=processos_encode)
+    with tempfile.TemporaryDirectory() as pasta:
+        client = MilvusClient(os.path.join(pasta, "benchmark.db"))
+        for n in tamanhos:
+            colecao = criar_colecao(client, "benchmark", codificador.dimensao)
+            inicio = time.perf_counter()
+            inseridos = popular(colecao, codificador, fragmentos_sinteticos(n), progresso=False)
+            segundos = time.perf_counter() - inicio
+            print(f"{n:>7,} fragmentos: {segundos:7.1f}s | {inseridos / segundos:,.0f} fragmentos/s")
+        client.close()
+    codificador.fechar()
+
+if __name__ == "__main__":
+    # Guarda obrigatória: os processos dos pools (spawn no Windows) reimportam este arquivo
+    parser = argparse.ArgumentParser(description="Popula o Milvus Lite com os manuais técnicos")
+    parser.add_argument("--processos", type=int, default=MAX_PROCESSOS, help="Processos para extrair os PDFs")
+    parser.add_argument("--batch", type=int, default=TAMANHO_BATCH_PADRAO, help="Tamanho do batch do encode")
+    parser.add_argument("--processos-encode", type=int, default=0,
+                        help="Processos para o encode (0 = um só; ex: número de núcleos para bases grandes)")
+    parser.add_argument("--benchmark", action="store_true", help="Mede fragmentos/s com 1k, 10k e 100k fragmentos")
+    args = parser.parse_args()
 
-# Se já existe, apaga para recriar limpo (Reset do MVP)
-if client.has_collection(collection_name=COLLECTION_NAME):
-    client.drop_collection(collection_name=COLLECTION_NAME)
-
-# Cria a coleção configurada para vetores de tamanho 384 (Padrão do modelo MiniLM)
-client.create_collection(
-    collection_name=COLLECTION_NAME,
-    dimension=384,
-    metric_type="COSINE", # Métrica para encontrar similaridade
-    auto_id=True
-)
-
-print(f"✅ Coleção '{COLLECTION_NAME}' criada com sucesso!")
-
-# --- 2. CARREGAR MODELO DE EMBEDDING ---
-print("📥 Carregando modelo de IA (sentence-transformers)...")
-# Modelo pequeno, rápido e gratuito para rodar no seu PC
-model = SentenceTransformer('all-MiniLM-L6-v2') 
-
-# --- 3. PROCESSAR ARQUIVOS E INSERIR ---
-arquivos = [f for f in os.listdir(KNOWLEDGE_PATH) if f.endswith('.txt')]
-dados_para_inserir = []
-
-print(f"📖 Lendo {len(arquivos)} manuais sintéticos...")
-
-for arquivo in arquivos:
-    caminho = os.path.join(KNOWLEDGE_PATH, arquivo)
-    
-    with open(caminho, 'r', encoding='utf-8') as f:
-        texto_completo = f.read()
-    
-    # Estratégia de Chunking (Fatiamento):
-    # Vamos quebrar o texto por parágrafos duplos para ter contextos melhores
-    paragrafos = texto_completo.split('\n\n')
-    
-    for i, paragrafo in enumerate(paragrafos):
-        paragrafo = paragrafo.strip()
-        if len(paragrafo) < 20: continue # Pula parágrafos muito curtos
-        
-        # A MÁGICA: Transforma texto em vetor
-        vetor = model.encode(paragrafo).tolist()
-        
-        # Prepara o pacote de dados
-        dados_para_inserir.append({
-            "vector": vetor,
-            "texto": paragrafo,
-            "fonte": arquivo,
-            "topico": arquivo.replace("_manual.txt", "").replace(".txt", "")
-        })
-
-# --- 4. INSERÇÃO NO BANCO ---
-print(f"🚀 Inserindo {len(dados_para_inserir)} fragmentos de conhecimento no Milvus...")
-
-res = client.insert(
-    collection_name=COLLECTION_NAME,
-    data=dados_para_inserir
-)
-
-print(f"✅ Sucesso! Inseridos: {res['insert_count']} vetores.")
-print(f"💾 Banco salvo em: {DB_PATH}")
-print("O sistema agora 'sabe' ler e recomendar com base técnica.")
\ No newline at end of file
+    if args.benchmark:
+        benchmark(batch_size=args.batch, processos_encode=args.processos_encode)
+    else:
+        main(args.processos, args.batch, args.processos_encode)
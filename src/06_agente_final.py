@@ -1,61 +1,78 @@
 import os
-import pandas as pd
-import chromadb
-from chromadb.utils import embedding_functions
+import sys
+import time
+
+from recursos_agente import (Recurso, criar_embedding, abrir_busca_manuais, carregar_janelas, carregar_modelo_embedding,
+                             aquecer as aquecer_recursos)
+from respostas_lote import TAMANHO_LOTE, buscar_trechos_lote, responder_em_lote, ler_perguntas, salvar_respostas
 
 # --- CONFIGURAÇÃO ---
 BASE_PATH = r"C:\Users\standisley.costa\Documents\Repos\Standis\agricultura_ia"
-DB_PATH = os.path.join(BASE_PATH, "data", "chroma_db")
-PARQUET_PATH = os.path.join(BASE_PATH, "data", "processed", "dataset_gold_mvp.parquet")
-
-print("🤖 Inicializando Agente AgroIA (Com Filtro de Contexto)...")
+DATA_PATH = os.path.join(BASE_PATH, "data")
+BACKEND_VETORES = "chroma" # "chroma", "milvus", "numpy" (busca exata em memória) ou "int8"/"float16" (memmap, pouca RAM)
+CACHE_EMBEDDINGS = os.path.join(BASE_PATH, "data", "cache", "embeddings") # Vetores já calculados (perguntas e trechos)
+PARQUET_PATH = os.path.join(BASE_PATH, "data", "processed", "dataset_gold_mvp.parquet") # Formato antigo
+GOLD_DATASET = os.path.join(BASE_PATH, "data", "processed", "dataset_gold")
+INDICE_JANELAS = os.path.join(BASE_PATH, "data", "processed", "indice_janelas.parquet") # Gerado pelo 03_enrich_data
 
-client = chromadb.PersistentClient(path=DB_PATH)
-emb_fn = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
-collection = client.get_collection(name="manual_tecnico_agricola", embedding_function=emb_fn)
+# Nada pesado no import: o banco (e o modelo de embedding) só abre na primeira pergunta ou no aquecer()
+embedding = Recurso("função de embedding", lambda: criar_embedding(CACHE_EMBEDDINGS))
+busca_manuais = Recurso("busca nos manuais técnicos",
+                        lambda: abrir_busca_manuais(DATA_PATH, BACKEND_VETORES, embedding.obter()))
+janelas = Recurso("índice de janelas ZARC", lambda: carregar_janelas(INDICE_JANELAS, GOLD_DATASET, PARQUET_PATH))
 
-if os.path.exists(PARQUET_PATH):
-    df_zarc = pd.read_parquet(PARQUET_PATH)
-else:
-    df_zarc = pd.DataFrame()
+def aquecer(carregar_modelo=False):
+    """Abre tudo antes da primeira pergunta (ex: na subida de um serviço). Retorna {recurso: segundos}."""
+    print("🤖 Inicializando Agente AgroIA (Com Filtro de Contexto)...")
+    tempos = aquecer_recursos(busca_manuais, janelas)
+    if carregar_modelo:
+        inicio = time.perf_counter()
+        carregar_modelo_embedding(embedding.obter())
+        tempos["modelo de embedding"] = time.perf_counter() - inicio
+    return tempos
 
 # --- MAPA DE CONTEXTO ---
-# Conecta o nome simples (App) ao nome do arquivo técnico (Banco)
+# Conecta o nome simples (App) ao campo "cultura" dos trechos no Banco (prefixo do nome do
+# arquivo: soja_manual_tecnico.txt e soja_manejo.pdf -> "soja"), então o .txt e os PDFs da
+# Embrapa da mesma cultura entram na busca.
 # Isso garante que quem pede SOJA não receba dica de MARACUJÁ.
-MAPA_ARQUIVOS = {
-    "Soja": "soja_manual_tecnico",
-    "Milho": "milho_safrinha_manual",
-    "Banana": "banana_irrigada",
-    "Laranja": "laranja_citros",
-    "Tomate Mesa": "tomate_mesa_manual",
-    "Cenoura": "cenoura_cerrado_manual",
-    "Pimentão": "pimentao_campo_aberto",
-    "Abacaxi": "abacaxi_perola",
-    "Maracujá": "maracuja_azedo",
-    "Alface": "alface_hidroponia_campo"
+MAPA_CULTURAS = {
+    "Soja": "soja",
+    "Milho": "milho",
+    "Banana": "banana",
+    "Laranja": "laranja",
+    "Tomate Mesa": "tomate",
+    "Cenoura": "cenoura",
+    "Pimentão": "pimentao",
+    "Abacaxi": "abacaxi",
+    "Maracujá": "maracuja",
+    "Alface": "alface"
 }
 
 def buscar_conhecimento_tecnico(pergunta, cultura_filtro):
     """
-    Busca no ChromaDB aplicando FILTRO por cultura.
+    Busca no banco vetorial (+ BM25) aplicando FILTRO por cultura.
     Assim a IA não mistura Maracujá com Soja.
     """
-    # Descobre qual o arquivo técnico correto
-    arquivo_alvo = MAPA_ARQUIVOS.get(cultura_filtro)
+    # Descobre qual a cultura dos manuais técnicos
+    cultura_alvo = MAPA_CULTURAS.get(cultura_filtro)
     
-    if not arquivo_alvo:
+    if not cultura_alvo:
         return f"⚠️ Sem manual técnico cadastrado para {cultura_filtro}."
 
-    # AQUI ESTÁ O PULO DO GATO: where={"topico": ...}
-    results = collection.query(
+    # AQUI ESTÁ O PULO DO GATO: where={"cultura": ...}
+    results = busca_manuais.obter().query(
         query_texts=[pergunta],
         n_results=2,
-        where={"topico": arquivo_alvo} # <--- O Filtro Rígido
+        where={"cultura": cultura_alvo} # <--- O Filtro Rígido
     )
     
+    return formatar_contexto(results['documents'][0] if results['documents'] else [])
+
+def formatar_contexto(documentos):
     contexto = ""
-    if results['documents'] and results['documents'][0]:
-        for i, doc in enumerate(results['documents'][0]):
+    if documentos:
+        for doc in documentos:
             contexto += f"- {doc}\n\n"
     else:
         contexto = "Não encontrei informações específicas no manual sobre isso."
@@ -63,18 +80,14 @@ def buscar_conhecimento_tecnico(pergunta, cultura_filtro):
     return contexto
 
 def buscar_dados_zarc(cidade, cultura):
-    if df_zarc.empty: return "Dados ZARC indisponíveis."
-    
-    filtro = df_zarc[
-        (df_zarc['municipio'] == cidade) & 
-        (df_zarc['cultura'] == cultura)
-    ]
-    
-    if filtro.empty:
+    indice = janelas.obter()
+    if indice is None: return "Dados ZARC indisponíveis."
+
+    # Melhor janela já calculada pelo pipeline: consulta direta, sem ler nem ordenar o dataset
+    melhor = indice.melhor(cidade, cultura)
+    if melhor is None:
         return f"Sem dados ZARC para {cultura}."
     
-    melhor = filtro.sort_values('risco_numerico').iloc[0]
-    
     return f"""
     📊 VIABILIDADE ECONÔMICA (ZARC):
     - Melhor Janela: {melhor['periodo_legivel']}
@@ -95,6 +108,9 @@ def agente_consultor(pergunta, cidade, cultura):
     # 2. Busca Numérica
     dados_zarc = buscar_dados_zarc(cidade, cultura)
     
+    return montar_resposta(cultura, dados_zarc, contexto_tecnico)
+
+def montar_resposta(cultura, dados_zarc, contexto_tecnico):
     resposta = f"""
     --- 🚜 RESPOSTA OFICIAL ---
     
@@ -105,7 +121,35 @@ def agente_consultor(pergunta, cidade, cultura):
     """
     return resposta
 
+# --- LOTE (FAQ) ---
+def _responder_lote(lote):
+    perguntas, cidades, culturas = zip(*lote)
+    trechos = buscar_trechos_lote(busca_manuais.obter(), embedding.obter(), perguntas, culturas, MAPA_CULTURAS, n_results=2)
+    respostas = []
+    for cidade, cultura, documentos in zip(cidades, culturas, trechos):
+        if documentos is None:
+            contexto = f"⚠️ Sem manual técnico cadastrado para {cultura}."
+        else:
+            contexto = formatar_contexto(documentos)
+        respostas.append(montar_resposta(cultura, buscar_dados_zarc(cidade, cultura), contexto))
+    return respostas
+
+def agente_consultor_lote(perguntas, tamanho_lote=TAMANHO_LOTE):
+    """
+    Mesma resposta do agente_consultor para uma lista (ou iterador) de (pergunta, cidade, cultura)
+    ou dicts com essas chaves: embeddings num lote só e uma consulta ao banco por cultura.
+    """
+    return responder_em_lote(perguntas, _responder_lote, tamanho_lote)
+
 if __name__ == "__main__":
+    aquecer()
+    if "--lote" in sys.argv:
+        # python 06_agente_final.py --lote perguntas.csv  ->  perguntas.respostas.jsonl
+        arquivo = sys.argv[sys.argv.index("--lote") + 1]
+        perguntas = list(ler_perguntas(arquivo))
+        respostas = agente_consultor_lote(perguntas)
+        salvar_respostas(os.path.splitext(arquivo)[0] + ".respostas.jsonl", perguntas, respostas)
+        sys.exit(0)
     # Teste Corrigido
     resp = agente_consultor(
         "Como evitar doenças fúngicas e qual o melhor solo?", 
@@ -6,9 +6,12 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error
 import joblib
 
+from particoes import ler_particionado
+
 # --- CONFIGURAÇÃO ---
 BASE_PATH = r"C:\Users\standisley.costa\Documents\Repos\Standis\agricultura_ia"
-PARQUET_PATH = os.path.join(BASE_PATH, "data", "processed", "dataset_gold_mvp.parquet")
+PARQUET_PATH = os.path.join(BASE_PATH, "data", "processed", "dataset_gold_mvp.parquet") # Formato antigo
+GOLD_DATASET = os.path.join(BASE_PATH, "data", "processed", "dataset_gold")
 MODEL_PATH = os.path.join(BASE_PATH, "models")
 
 os.makedirs(MODEL_PATH, exist_ok=True)
@@ -17,11 +20,11 @@ def treinar_modelo_produtividade():
     print("--- 🧠 Treinando IA Preditiva (Random Forest) ---")
     
     # 1. Carregar Dados
-    if not os.path.exists(PARQUET_PATH):
+    df = ler_particionado(GOLD_DATASET, PARQUET_PATH)
+    if df is None:
         print("Erro: Dataset não encontrado.")
         return
-    
-    df = pd.read_parquet(PARQUET_PATH)
+
     print(f"Dados carregados. Colunas originais: {df.columns.tolist()}")
 
     # --- CORREÇÃO DE COLUNAS (O FIX DO ERRO) ---
@@ -1,37 +1,54 @@
 import os
-import pandas as pd
-import joblib
-import chromadb
-from chromadb.utils import embedding_functions
+import sys
+import time
+import asyncio
+import statistics
+
+from recursos_agente import (Recurso, criar_embedding, abrir_busca_manuais, carregar_janelas, carregar_joblib,
+                             carregar_modelo_embedding, aquecer as aquecer_recursos)
+from respostas_lote import TAMANHO_LOTE, buscar_trechos_lote, responder_em_lote, ler_perguntas, salvar_respostas
 
 # --- CONFIGURAÇÃO ---
 BASE_PATH = r"C:\Users\standisley.costa\Documents\Repos\Standis\agricultura_ia"
-DB_PATH = os.path.join(BASE_PATH, "data", "chroma_db")
+DATA_PATH = os.path.join(BASE_PATH, "data")
+BACKEND_VETORES = "chroma" # "chroma", "milvus", "numpy" (busca exata em memória) ou "int8"/"float16" (memmap, pouca RAM)
+CACHE_EMBEDDINGS = os.path.join(BASE_PATH, "data", "cache", "embeddings") # Vetores já calculados (perguntas e trechos)
 MODEL_PATH = os.path.join(BASE_PATH, "models", "modelo_produtividade.joblib")
-PARQUET_PATH = os.path.join(BASE_PATH, "data", "processed", "dataset_gold_mvp.parquet")
-
-print("🚀 Inicializando Agente Híbrido (ML + RAG + LLM)...")
+PARQUET_PATH = os.path.join(BASE_PATH, "data", "processed", "dataset_gold_mvp.parquet") # Formato antigo
+GOLD_DATASET = os.path.join(BASE_PATH, "data", "processed", "dataset_gold")
+TIMEOUT_S = 30.0 # Tempo máximo de uma pergunta no agente assíncrono
+INDICE_JANELAS = os.path.join(BASE_PATH, "data", "processed", "indice_janelas.parquet") # Gerado pelo 03_enrich_data
 
-client = chromadb.PersistentClient(path=DB_PATH)
-emb_fn = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
-collection = client.get_collection(name="manual_tecnico_agricola", embedding_function=emb_fn)
+# Nada pesado no import: banco, modelo de ML e modelo de embedding só carregam no primeiro uso ou no aquecer()
+embedding = Recurso("função de embedding", lambda: criar_embedding(CACHE_EMBEDDINGS))
+busca_manuais = Recurso("busca nos manuais técnicos",
+                        lambda: abrir_busca_manuais(DATA_PATH, BACKEND_VETORES, embedding.obter()))
+modelo_ml = Recurso("modelo de produtividade", lambda: carregar_joblib(MODEL_PATH))
+janelas = Recurso("índice de janelas ZARC", lambda: carregar_janelas(INDICE_JANELAS, GOLD_DATASET, PARQUET_PATH))
 
-modelo_ml = joblib.load(MODEL_PATH)
-df_zarc = pd.read_parquet(PARQUET_PATH)
+def aquecer(carregar_modelo=False):
+    """Carrega banco e modelo de ML em paralelo antes da primeira pergunta. Retorna {recurso: segundos}."""
+    print("🚀 Inicializando Agente Híbrido (ML + RAG + LLM)...")
+    tempos = aquecer_recursos(busca_manuais, modelo_ml, janelas)
+    if carregar_modelo:
+        inicio = time.perf_counter()
+        carregar_modelo_embedding(embedding.obter())
+        tempos["modelo de embedding"] = time.perf_counter() - inicio
+    return tempos
 
 # --- CORREÇÃO DE COLUNAS NO AGENTE TAMBÉM ---
 mapa_colunas = {
     'chuva_acumulada_decendio': 'chuva_media_mm',
     'temp': 'temp_media_c'
 }
-df_zarc.rename(columns=mapa_colunas, inplace=True)
-
-MAPA_ARQUIVOS = {
-    "Soja": "soja_manual_tecnico", "Milho": "milho_safrinha_manual",
-    "Banana": "banana_irrigada", "Laranja": "laranja_citros",
-    "Tomate Mesa": "tomate_mesa_manual", "Cenoura": "cenoura_cerrado_manual",
-    "Pimentão": "pimentao_campo_aberto", "Abacaxi": "abacaxi_perola",
-    "Maracujá": "maracuja_azedo", "Alface": "alface_hidroponia_campo"
+
+# Nome no App -> campo "cultura" dos trechos (.txt sintético + PDFs da Embrapa da mesma cultura)
+MAPA_CULTURAS = {
+    "Soja": "soja", "Milho": "milho",
+    "Banana": "banana", "Laranja": "laranja",
+    "Tomate Mesa": "tomate", "Cenoura": "cenoura",
+    "Pimentão": "pimentao", "Abacaxi": "abacaxi",
+    "Maracujá": "maracuja", "Alface": "alface"
 }
 
 def chamar_llm_real(prompt):
@@ -47,44 +64,183 @@ def chamar_llm_real(prompt):
     Recomendo monitorar o clima local.
     """
 
-def agente_supremo(pergunta, cidade, cultura):
-    print(f"\n🧠 Processando: '{pergunta}' | {cultura} em {cidade}...")
-    
-    # 1. Dados
-    filtro = df_zarc[(df_zarc['municipio'] == cidade) & (df_zarc['cultura'] == cultura)]
-    if filtro.empty: return "Sem dados ZARC encontrados."
-    dado_real = filtro.sort_values('risco_numerico').iloc[0]
-    
-    # 2. ML Predict
+def entrada_ml(melhor):
+    """Linha de features do modelo de produtividade a partir da melhor janela ZARC."""
+    dado_real = {mapa_colunas.get(coluna, coluna): valor for coluna, valor in melhor.items()}
     solo_map = {"AD1": 1, "AD2": 2, "AD3": 3}
     solo_val = solo_map.get(dado_real['solo'], 2)
     
     # Agora usa os nomes corrigidos
-    input_ml = [[
+    return [
         dado_real['risco_numerico'], 
         dado_real['chuva_media_mm'], 
         dado_real['temp_media_c'], 
         dado_real['custo_ha_est'],
         solo_val
-    ]]
-    
-    previsao = modelo_ml.predict(input_ml)[0]
-    
-    # 3. RAG
-    arquivo_alvo = MAPA_ARQUIVOS.get(cultura)
-    docs = collection.query(query_texts=[pergunta], n_results=1, where={"topico": arquivo_alvo})
-    texto_tecnico = docs['documents'][0][0] if docs['documents'] else "Sem manual."
+    ]
 
-    # 4. Prompt
-    prompt = f"""
+def montar_prompt(cidade, cultura, previsao, texto_tecnico):
+    return f"""
     Cultura: {cultura} | Cidade: {cidade}
     Produtividade Prevista: {previsao:.1f}
     CONTEXTO TÉCNICO (EMBRAPA):
     {texto_tecnico}
     """
+
+def agente_supremo(pergunta, cidade, cultura):
+    print(f"\n🧠 Processando: '{pergunta}' | {cultura} em {cidade}...")
+    
+    # 1. Dados (melhor janela já calculada pelo pipeline: consulta direta no índice)
+    indice = janelas.obter()
+    melhor = indice.melhor(cidade, cultura) if indice is not None else None
+    if melhor is None: return "Sem dados ZARC encontrados."
+    
+    # 2. ML Predict
+    previsao = modelo_ml.obter().predict([entrada_ml(melhor)])[0]
+    
+    # 3. RAG
+    cultura_alvo = MAPA_CULTURAS.get(cultura)
+    docs = busca_manuais.obter().query(query_texts=[pergunta], n_results=1, where={"cultura": cultura_alvo})
+    texto_tecnico = docs['documents'][0][0] if docs['documents'] else "Sem manual."
+
+    # 4. Prompt
+    prompt = montar_prompt(cidade, cultura, previsao, texto_tecnico)
     
     return chamar_llm_real(prompt)
 
+# --- LOTE (FAQ) ---
+def _responder_lote(lote):
+    indice = janelas.obter()
+    pares = {(cidade, cultura) for _, cidade, cultura in lote}
+    melhores = {par: indice.melhor(*par) if indice is not None else None for par in pares}
+    com_dados = [par for par in pares if melhores[par] is not None]
+    
+    # Uma predição vetorizada só, uma linha por (cidade, cultura) distinta do lote
+    previsoes = {}
+    if com_dados:
+        saidas = modelo_ml.obter().predict([entrada_ml(melhores[par]) for par in com_dados])
+        previsoes = dict(zip(com_dados, saidas))
+    
+    validas = [i for i, (_, cidade, cultura) in enumerate(lote) if (cidade, cultura) in previsoes]
+    trechos = buscar_trechos_lote(busca_manuais.obter(), embedding.obter(), [lote[i][0] for i in validas],
+                                  [lote[i][2] for i in validas], MAPA_CULTURAS, n_results=1)
+    textos = {i: documentos[0] if documentos else "Sem manual." for i, documentos in zip(validas, trechos)}
+    
+    respostas = []
+    for i, (_, cidade, cultura) in enumerate(lote):
+        if i not in textos:
+            respostas.append("Sem dados ZARC encontrados.")
+        else:
+            prompt = montar_prompt(cidade, cultura, previsoes[(cidade, cultura)], textos[i])
+            respostas.append(chamar_llm_real(prompt))
+    return respostas
+
+def agente_supremo_lote(perguntas, tamanho_lote=TAMANHO_LOTE):
+    """
+    agente_supremo para uma lista (ou iterador) de (pergunta, cidade, cultura) ou dicts:
+    embeddings num lote só, uma consulta ao banco por cultura e um único predict por lote.
+    """
+    return responder_em_lote(perguntas, _responder_lote, tamanho_lote)
+
+# --- VERSÃO ASSÍNCRONA ---
+# Os dois ramos independentes rodam ao mesmo tempo: (janela ZARC -> predict) e (busca nos manuais).
+# Tudo que bloqueia (banco, modelo, LLM) vai para o pool de threads com asyncio.to_thread, então
+# o laço de eventos continua atendendo outras perguntas. A LLM é chamada assim que os dois ramos
+# terminam; sem dados ZARC a busca nos manuais é cancelada na hora.
+# Cancelamento/timeout: as tarefas pendentes são canceladas e o resultado de uma thread que já
+# estava rodando é descartado (a thread em si termina o passo em que está).
+
+async def _previsao_async(cidade, cultura):
+    indice = await asyncio.to_thread(janelas.obter)
+    melhor = indice.melhor(cidade, cultura) if indice is not None else None
+    if melhor is None:
+        return None
+    modelo = await asyncio.to_thread(modelo_ml.obter)
+    saida = await asyncio.to_thread(modelo.predict, [entrada_ml(melhor)])
+    return saida[0]
+
+async def _texto_tecnico_async(pergunta, cultura):
+    busca = await asyncio.to_thread(busca_manuais.obter)
+    docs = await asyncio.to_thread(busca.query, query_texts=[pergunta], n_results=1,
+                                   where={"cultura": MAPA_CULTURAS.get(cultura)})
+    return docs['documents'][0][0] if docs['documents'] else "Sem manual."
+
+async def _pipeline_async(pergunta, cidade, cultura):
+    previsao_tarefa = asyncio.create_task(_previsao_async(cidade, cultura))
+    texto_tarefa = asyncio.create_task(_texto_tecnico_async(pergunta, cultura))
+    try:
+        previsao = await previsao_tarefa
+        if previsao is None:
+            return "Sem dados ZARC encontrados."
+        texto_tecnico = await texto_tarefa
+    finally:
+        # Timeout, cancelamento externo, erro num ramo ou saída antecipada: nada fica rodando solto
+        for tarefa in (previsao_tarefa, texto_tarefa):
+            tarefa.cancel()
+        await asyncio.gather(previsao_tarefa, texto_tarefa, return_exceptions=True)
+    return await asyncio.to_thread(chamar_llm_real, montar_prompt(cidade, cultura, previsao, texto_tecnico))
+
+async def agente_supremo_async(pergunta, cidade, cultura, timeout_s=TIMEOUT_S):
+    """
+    Mesma resposta do agente_supremo, com latência ~ max(ZARC + ML, RAG) + LLM em vez da soma.
+    Para cancelar, cancele a tarefa que aguarda esta corrotina.
+    """
+    print(f"\n🧠 Processando (async): '{pergunta}' | {cultura} em {cidade}...")
+    try:
+        return await asyncio.wait_for(_pipeline_async(pergunta, cidade, cultura), timeout_s)
+    except asyncio.TimeoutError:
+        return f"⏱️ Tempo esgotado ({timeout_s:g}s) ao responder sobre {cultura} em {cidade}."
+
+def _percentis(tempos):
+    tempos = sorted(tempos)
+    return statistics.median(tempos) * 1000, tempos[min(len(tempos) - 1, int(0.95 * len(tempos)))] * 1000
+
+def benchmark_latencia(perguntas, repeticoes=5):
+    """
+    Latência por pergunta (p50/p95): agente_supremo sequencial x agente_supremo_async, e o tempo
+    total de responder todas as perguntas juntas (uma de cada vez x todas concorrentes no asyncio).
+    """
+    aquecer()
+    sequencial, assincrono = [], []
+    for _ in range(repeticoes):
+        for pergunta in perguntas:
+            inicio = time.perf_counter()
+            agente_supremo(*pergunta)
+            sequencial.append(time.perf_counter() - inicio)
+            inicio = time.perf_counter()
+            asyncio.run(agente_supremo_async(*pergunta))
+            assincrono.append(time.perf_counter() - inicio)
+
+    async def todas():
+        return await asyncio.gather(*(agente_supremo_async(*p) for p in perguntas))
+
+    inicio = time.perf_counter()
+    for pergunta in perguntas:
+        agente_supremo(*pergunta)
+    total_sequencial = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    asyncio.run(todas())
+    total_assincrono = time.perf_counter() - inicio
+
+    print(f"\n--- ⏱️ Latência do agente ({len(perguntas)} perguntas x {repeticoes}) ---")
+    for nome, tempos in (("Sequencial", sequencial), ("Assíncrono", assincrono)):
+        p50, p95 = _percentis(tempos)
+        print(f"{nome:<11} p50 {p50:8.1f} ms | p95 {p95:8.1f} ms")
+    print(f"Todas juntas: sequencial {total_sequencial:.2f}s | asyncio concorrente {total_assincrono:.2f}s")
+
 if __name__ == "__main__":
+    if "--benchmark-async" in sys.argv:
+        benchmark_latencia([("Quais doenças devo preocupar?", "Rio Verde", "Soja"),
+                            ("Qual a adubação recomendada?", "Cristalina", "Milho"),
+                            ("Como controlar pragas?", "Rio Verde", "Tomate Mesa")])
+        sys.exit(0)
+    aquecer()
+    if "--lote" in sys.argv:
+        # python 08_agente_llm.py --lote perguntas.csv  ->  perguntas.respostas.jsonl
+        arquivo = sys.argv[sys.argv.index("--lote") + 1]
+        perguntas = list(ler_perguntas(arquivo))
+        respostas = agente_supremo_lote(perguntas)
+        salvar_respostas(os.path.splitext(arquivo)[0] + ".respostas.jsonl", perguntas, respostas)
+        sys.exit(0)
     resp = agente_supremo("Quais doenças devo preocupar?", "Rio Verde", "Soja")
     print(resp)
\ No newline at end of file
@@ -0,0 +1,522 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import tracemalloc
+import numpy as np
+
+from vetorizacao import DIMENSAO_PADRAO
+
+# --- ARMAZÉNS DE VETORES INTERCAMBIÁVEIS (CHROMA, MILVUS LITE, NUMPY) ---
+# Todos os backends falam o mesmo subconjunto da API de coleção do Chroma que o projeto já usa:
+#   upsert(ids, documents, metadatas, embeddings=None), delete(ids), count(),
+#   get(ids=None, where=None, include=[...], limit=None, offset=0),
+#   query(query_texts=None, query_embeddings=None, n_results=10, where=None)
+# Para ler a coleção inteira use paginas(colecao, ...): no Milvus, offset + limit não pode passar
+# de 16.384 linhas, então lá a leitura vai por query_iterator em vez de offset.
+# Assim a sincronização incremental (indice_incremental.py) e os agentes trocam de banco
+# mudando só o BACKEND_VETORES. Filtros: igualdade ({"topico": "x"}, {"campo": {"$eq": v}}, "$and").
+# Distância devolvida: 1 - cosseno (NumPy e Milvus); no Chroma, a do espaço da coleção.
+#
+# NumPy = busca exata: matriz normalizada x vetor da pergunta (um produto escalar), sem arquivo
+# de banco. Para alguns milhares de trechos costuma ser mais rápida que HNSW/SQLite.
+
+BACKENDS = ("chroma", "milvus", "numpy")
+BACKENDS_QUANTIZADOS = ("int8", "float16") # Só leitura: exportados de outro backend (indice_quantizado.py)
+BACKEND_PADRAO = "chroma"
+CAMINHOS_PADRAO = {"chroma": "chroma_db", "milvus": "milvus_agro.db", "numpy": "vetores_numpy", # Dentro de data/
+                   "int8": "vetores_int8", "float16": "vetores_float16"}
+TAMANHO_MAXIMO_ID = 256
+JANELA_CONSULTA_MILVUS = 16384 # offset + limit máximo de um query() do Milvus
+TAMANHO_PAGINA = 5000
+CAMPO_TEXTO = "texto"  # Campo do texto no Milvus (o mesmo que o 05_populate_milvus sempre usou)
+
+
+def caminho_padrao(backend, pasta_dados):
+    return os.path.join(pasta_dados, CAMINHOS_PADRAO[backend])
+
+
+def condicoes_filtro(where):
+    """{"a": 1, "$and": [{"b": {"$eq": 2}}]} -> [("a", 1), ("b", 2)]. Só igualdade é suportada."""
+    condicoes = []
+    for campo, valor in (where or {}).items():
+        if campo == "$and":
+            for parte in valor:
+                condicoes += condicoes_filtro(parte)
+        elif isinstance(valor, dict):
+            if set(valor) != {"$eq"}:
+                raise ValueError(f"Filtro não suportado: {campo}={valor} (use igualdade)")
+            condicoes.append((campo, valor["$eq"]))
+        elif campo.startswith("$"):
+            raise ValueError(f"Operador não suportado: {campo}")
+        else:
+            condicoes.append((campo, valor))
+    return condicoes
+
+
+def paginas(colecao, include=("documents", "metadatas"), tamanho_pagina=TAMANHO_PAGINA, where=None):
+    """
+    Toda a coleção, em páginas no formato do get(). Usa colecao.iterar() quando o backend tem
+    (Milvus: sem limite de janela); nos outros, get() com limit/offset.
+    """
+    if hasattr(colecao, "iterar"):
+        yield from colecao.iterar(include, tamanho_pagina, where)
+        return
+    inicio = 0
+    while True:
+        pagina = colecao.get(where=where, include=list(include), limit=tamanho_pagina, offset=inicio)
+        if len(pagina["ids"]):
+            yield pagina
+        if len(pagina["ids"]) < tamanho_pagina:
+            return
+        inicio += tamanho_pagina
+
+
+def normalizar_linhas(vetores):
+    vetores = np.asarray(vetores, dtype=np.float32)
+    if vetores.ndim == 1:
+        vetores = vetores[None, :]
+    normas = np.linalg.norm(vetores, axis=1, keepdims=True)
+    return vetores / np.where(normas == 0, 1, normas)
+
+
+class ColecaoNumpy:
+    """Busca exata em memória. Persistência opcional numa pasta (vetores.npy + itens.json)."""
+
+    def __init__(self, pasta=None, embedding_function=None):
+        self.pasta = pasta
+        self.embedding_function = embedding_function
+        self.ids, self.documentos, self.metadados = [], [], []
+        self._linha = {}
+        self._vetores = None
+        self._ativos = np.empty(0, dtype=bool)
+        self._n = 0
+        self._indice_filtro = {}
+        if pasta and os.path.exists(os.path.join(pasta, "itens.json")):
+            self._carregar()
+
+    # --- ARQUIVOS ---
+    def _carregar(self):
+        with open(os.path.join(self.pasta, "itens.json"), "r", encoding="utf-8") as f:
+            itens = json.load(f)
+        self.ids, self.documentos, self.metadados = itens["ids"], itens["documentos"], itens["metadados"]
+        self._n = len(self.ids)
+        self._vetores = np.load(os.path.join(self.pasta, "vetores.npy"))
+        self._ativos = np.ones(self._n, dtype=bool)
+        self._linha = {fid: i for i, fid in enumerate(self.ids)}
+
+    def salvar(self):
+        """Compacta (tira as linhas apagadas) e grava com escrita atômica."""
+        if not self.pasta:
+            return
+        self._compactar()
+        os.makedirs(self.pasta, exist_ok=True)
+        temporario = os.path.join(self.pasta, "vetores.tmp.npy")
+        vetores = self._vetores[:self._n] if self._vetores is not None else np.empty((0, 0), dtype=np.float32)
+        np.save(temporario, vetores)
+        os.replace(temporario, os.path.join(self.pasta, "vetores.npy"))
+        temporario = os.path.join(self.pasta, "itens.tmp")
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "documentos": self.documentos, "metadados": self.metadados}, f, ensure_ascii=False)
+        os.replace(temporario, os.path.join(self.pasta, "itens.json"))
+
+    def _compactar(self):
+        if self._ativos[:self._n].all():
+            return
+        manter = np.flatnonzero(self._ativos[:self._n])
+        self.ids = [self.ids[i] for i in manter]
+        self.documentos = [self.documentos[i] for i in manter]
+        self.metadados = [self.metadados[i] for i in manter]
+        self._vetores = self._vetores[manter]
+        self._n = len(manter)
+        self._ativos = np.ones(self._n, dtype=bool)
+        self._linha = {fid: i for i, fid in enumerate(self.ids)}
+        self._indice_filtro = {}
+
+    # --- ESCRITA ---
+    def _vetores_de(self, textos, embeddings):
+        if embeddings is None:
+            if self.embedding_function is None:
+                raise ValueError("Sem embedding_function: passe os vetores em embeddings=")
+            embeddings = self.embedding_function(list(textos))
+        return normalizar_linhas(embeddings)
+
+    def _reservar(self, quantidade, dimensao):
+        if self._vetores is None or self._vetores.size == 0:
+            self._vetores = np.empty((max(quantidade, 1024), dimensao), dtype=np.float32)
+        elif self._n + quantidade > len(self._vetores):
+            novo = np.empty((max(self._n + quantidade, 2 * len(self._vetores)), dimensao), dtype=np.float32)
+            novo[:self._n] = self._vetores[:self._n]
+            self._vetores = novo
+        if len(self._ativos) < len(self._vetores):
+            ativos = np.zeros(len(self._vetores), dtype=bool)
+            ativos[:len(self._ativos)] = self._ativos
+            self._ativos = ativos
+
+    def upsert(self, ids, documents=None, metadatas=None, embeddings=None):
+        ids = list(ids)
+        documents = list(documents) if documents is not None else [None] * len(ids)
+        metadatas = list(metadatas) if metadatas is not None else [None] * len(ids)
+        vetores = self._vetores_de(documents, embeddings)
+        self._reservar(len(ids), vetores.shape[1])
+        for fid, documento, metadado, vetor in zip(ids, documents, metadatas, vetores):
+            linha = self._linha.get(fid)
+            if linha is None:
+                linha = self._n
+                self._n += 1
+                self.ids.append(fid)
+                self.documentos.append(documento)
+                self.metadados.append(metadado or {})
+                self._linha[fid] = linha
+            else:
+                self.documentos[linha] = documento
+                self.metadados[linha] = metadado or {}
+            self._vetores[linha] = vetor
+            self._ativos[linha] = True
+        self._indice_filtro = {}
+
+    add = upsert
+
+    def delete(self, ids):
+        for fid in ids:
+            linha = self._linha.pop(fid, None)
+            if linha is not None:
+                self._ativos[linha] = False
+
+    # --- LEITURA ---
+    def count(self):
+        return len(self._linha)
+
+    def _linhas_com(self, campo, valor):
+        """Linhas cujo metadado `campo` == valor (índice montado na primeira consulta ao campo)."""
+        if campo not in self._indice_filtro:
+            grupos = {}
+            for linha, metadado in enumerate(self.metadados):
+                if campo in metadado:
+                    grupos.setdefault(metadado[campo], []).append(linha)
+            self._indice_filtro[campo] = {v: np.array(ls, dtype=np.int64) for v, ls in grupos.items()}
+        return self._indice_filtro[campo].get(valor, np.empty(0, dtype=np.int64))
+
+    def _candidatas(self, where=None, ids=None):
+        """Linhas ativas que passam no filtro (em ordem de inserção)."""
+        if ids is not None:
+            linhas = np.array(sorted(self._linha[i] for i in ids if i in self._linha), dtype=np.int64)
+        else:
+            linhas = np.flatnonzero(self._ativos[:self._n])
+        for campo, valor in condicoes_filtro(where):
+            linhas = np.intersect1d(linhas, self._linhas_com(campo, valor), assume_unique=True)
+        return linhas
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas"), limit=None, offset=0):
+        linhas = self._candidatas(where, ids)
+        linhas = linhas[offset:offset + limit if limit is not None else None]
+        resultado = {"ids": [self.ids[i] for i in linhas]}
+        if "documents" in include:
+            resultado["documents"] = [self.documentos[i] for i in linhas]
+        if "metadatas" in include:
+            resultado["metadatas"] = [self.metadados[i] for i in linhas]
+        if "embeddings" in include:
+            resultado["embeddings"] = self._vetores[linhas]
+        return resultado
+
+    def query(self, query_texts=None, query_embeddings=None, n_results=10, where=None,
+              include=("documents", "metadatas", "distances")):
+        consultas = self._vetores_de(query_texts, query_embeddings)
+        linhas = self._candidatas(where)
+        vazio = {"ids": [[] for _ in consultas], "documents": [[] for _ in consultas],
+                 "metadatas": [[] for _ in consultas], "distances": [[] for _ in consultas]}
+        if len(linhas) == 0:
+            return vazio
+
+        # Sem filtro nem linhas apagadas: usa a matriz direto (sem cópia)
+        matriz = self._vetores[:self._n] if len(linhas) == self._n else self._vetores[linhas]
+        similaridades = consultas @ matriz.T
+        k = min(n_results, len(linhas))
+        melhores = np.argpartition(-similaridades, k - 1, axis=1)[:, :k]
+        ordem = np.take_along_axis(similaridades, melhores, axis=1).argsort(axis=1)[:, ::-1]
+        melhores = np.take_along_axis(melhores, ordem, axis=1)
+
+        for q, posicoes in enumerate(melhores):
+            escolhidas = linhas[posicoes]
+            vazio["ids"][q] = [self.ids[i] for i in escolhidas]
+            vazio["documents"][q] = [self.documentos[i] for i in escolhidas]
+            vazio["metadatas"][q] = [self.metadados[i] for i in escolhidas]
+            vazio["distances"][q] = (1.0 - similaridades[q, posicoes]).tolist()
+        return vazio
+
+
+class ColecaoMilvus:
+    """Coleção do Milvus (Lite) com id texto, vetor, campo `texto` e metadados como campos dinâmicos."""
+
+    def __init__(self, client, nome, embedding_function=None, dimensao=DIMENSAO_PADRAO, recriar=False):
+        self.client = client
+        self.nome = nome
+        self.embedding_function = embedding_function
+        if recriar and client.has_collection(collection_name=nome):
+            client.drop_collection(collection_name=nome)
+        if not client.has_collection(collection_name=nome):
+            client.create_collection(
+                collection_name=nome,
+                dimension=dimensao,
+                id_type="string",
+                max_length=TAMANHO_MAXIMO_ID,
+                metric_type="COSINE", # Métrica para encontrar similaridade
+                auto_id=False
+            )
+
+    def _vetores_de(self, textos, embeddings):
+        if embeddings is None:
+            embeddings = self.embedding_function(list(textos))
+        return np.asarray(embeddings, dtype=np.float32)
+
+    @staticmethod
+    def _expressao(where):
+        return " and ".join(f"{campo} == {json.dumps(valor, ensure_ascii=False)}" for campo, valor in condicoes_filtro(where))
+
+    @staticmethod
+    def _separar(entidade):
+        metadados = {k: v for k, v in entidade.items() if k not in ("id", "vector", CAMPO_TEXTO)}
+        return entidade.get(CAMPO_TEXTO), metadados
+
+    def upsert(self, ids, documents=None, metadatas=None, embeddings=None):
+        ids = list(ids)
+        metadatas = metadatas or [{}] * len(ids)
+        vetores = self._vetores_de(documents, embeddings)
+        dados = [
+            {"id": fid, "vector": vetor.tolist(), CAMPO_TEXTO: documento, **(metadado or {})}
+            for fid, documento, metadado, vetor in zip(ids, documents or [None] * len(ids), metadatas, vetores)
+        ]
+        self.client.upsert(collection_name=self.nome, data=dados)
+
+    add = upsert
+
+    def delete(self, ids):
+        self.client.delete(collection_name=self.nome, ids=list(ids))
+
+    def count(self):
+        return self.client.query(collection_name=self.nome, filter="", output_fields=["count(*)"])[0]["count(*)"]
+
+    @staticmethod
+    def _campos(include):
+        return ["id"] if not include else ["*", "vector"] if "embeddings" in include else ["*"]
+
+    def _resultado(self, linhas, include):
+        resultado = {"ids": [linha["id"] for linha in linhas]}
+        separados = [self._separar(linha) for linha in linhas]
+        if "documents" in include:
+            resultado["documents"] = [texto for texto, _ in separados]
+        if "metadatas" in include:
+            resultado["metadatas"] = [metadados for _, metadados in separados]
+        if "embeddings" in include:
+            resultado["embeddings"] = np.array([linha["vector"] for linha in linhas], dtype=np.float32)
+        return resultado
+
+    def iterar(self, include=("documents", "metadatas"), tamanho_pagina=TAMANHO_PAGINA, where=None):
+        """Páginas no formato do get() pela coleção inteira (query_iterator: sem a janela de 16.384 linhas)."""
+        iterador = self.client.query_iterator(collection_name=self.nome, batch_size=tamanho_pagina,
+                                              filter=self._expressao(where), output_fields=self._campos(include))
+        try:
+            while True:
+                linhas = iterador.next()
+                if not linhas:
+                    return
+                yield self._resultado(linhas, include)
+        finally:
+            iterador.close()
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas"), limit=None, offset=0):
+        if ids is not None:
+            linhas = self.client.query(collection_name=self.nome, filter=self._expressao(where),
+                                       output_fields=self._campos(include), ids=list(ids))
+            return self._resultado(linhas, include)
+        if limit is not None and offset + limit <= JANELA_CONSULTA_MILVUS:
+            linhas = self.client.query(collection_name=self.nome, filter=self._expressao(where),
+                                       output_fields=self._campos(include), limit=limit, offset=offset)
+            return self._resultado(linhas, include)
+        # Além da janela do Milvus (ou sem limit): percorre pelo iterador e recorta
+        resultado, pulados = {campo: [] for campo in ("ids", "documents", "metadatas", "embeddings")}, 0
+        for pagina in self.iterar(include, where=where):
+            n = len(pagina["ids"])
+            inicio = min(max(offset - pulados, 0), n)
+            pulados += n
+            fim = n if limit is None else min(n, inicio + limit - len(resultado["ids"]))
+            for campo, valores in pagina.items():
+                resultado[campo].extend(valores[inicio:fim])
+            if limit is not None and len(resultado["ids"]) >= limit:
+                break
+        resultado = {campo: valores for campo, valores in resultado.items() if campo == "ids" or campo in include}
+        if "embeddings" in resultado:
+            resultado["embeddings"] = np.array(resultado["embeddings"], dtype=np.float32)
+        return resultado
+
+    def query(self, query_texts=None, query_embeddings=None, n_results=10, where=None,
+              include=("documents", "metadatas", "distances")):
+        consultas = self._vetores_de(query_texts, query_embeddings)
+        respostas = self.client.search(collection_name=self.nome, data=consultas.tolist(), limit=n_results,
+                                       filter=self._expressao(where), output_fields=["*"])
+        resultado = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for acertos in respostas:
+            separados = [self._separar(a["entity"]) for a in acertos]
+            resultado["ids"].append([a["id"] for a in acertos])
+            resultado["documents"].append([texto for texto, _ in separados])
+            resultado["metadatas"].append([metadados for _, metadados in separados])
+            resultado["distances"].append([1.0 - a["distance"] for a in acertos]) # COSINE devolve similaridade
+        return resultado
+
+
+def abrir_colecao(backend, caminho, nome, embedding_function=None, criar=True, dimensao=DIMENSAO_PADRAO):
+    """
+    Coleção no backend escolhido. criar=False: a coleção precisa existir (ValueError se não existir),
+    como o get_collection do Chroma que os agentes usavam.
+    """
+    if backend == "chroma":
+        import chromadb
+        client = chromadb.PersistentClient(path=caminho)
+        if criar:
+            return client.get_or_create_collection(name=nome, embedding_function=embedding_function)
+        return client.get_collection(name=nome, embedding_function=embedding_function)
+
+    if backend == "milvus":
+        from pymilvus import MilvusClient
+        client = MilvusClient(caminho)
+        if not criar and not client.has_collection(collection_name=nome):
+            raise ValueError(f"Coleção {nome} não existe em {caminho}")
+        return ColecaoMilvus(client, nome, embedding_function, dimensao)
+
+    if backend == "numpy":
+        pasta = os.path.join(caminho, nome)
+        if not criar and not os.path.exists(os.path.join(pasta, "itens.json")):
+            raise ValueError(f"Coleção {nome} não existe em {caminho}")
+        return ColecaoNumpy(pasta, embedding_function)
+
+    if backend in BACKENDS_QUANTIZADOS:
+        from indice_quantizado import IndiceQuantizado
+        pasta = os.path.join(caminho, nome)
+        if not os.path.exists(os.path.join(pasta, "meta.json")):
+            raise ValueError(f"Índice {backend} {nome} não existe em {caminho} (gere com 05_populate_chroma --quantizar)")
+        return IndiceQuantizado(pasta, embedding_function)
+
+    raise ValueError(f"Backend desconhecido: {backend} (opções: {', '.join(BACKENDS + BACKENDS_QUANTIZADOS)})")
+
+
+def salvar_colecao(colecao):
+    """Chroma e Milvus gravam a cada operação; a NumPy só quando pedido."""
+    if hasattr(colecao, "salvar"):
+        colecao.salvar()
+
+
+# --- BENCHMARK ---
+def corpus_sintetico(n_fragmentos=5000, dimensao=DIMENSAO_PADRAO, n_topicos=10, seed=42):
+    """Vetores agrupados por tópico (como trechos de manuais de culturas diferentes)."""
+    rng = np.random.default_rng(seed)
+    centros = rng.normal(size=(n_topicos, dimensao)).astype(np.float32)
+    topicos = rng.integers(0, n_topicos, n_fragmentos)
+    vetores = normalizar_linhas(centros[topicos] + rng.normal(scale=1.5, size=(n_fragmentos, dimensao)))
+    metadados = [{"topico": f"topico_{t}"} for t in topicos]
+    textos = [f"trecho {i} do topico {t}" for i, t in enumerate(topicos)]
+    return [f"frag_{i}" for i in range(n_fragmentos)], vetores, textos, metadados
+
+
+def consultas_sinteticas(vetores, metadados, n_consultas=200, seed=7):
+    """Perguntas = trechos do corpus com ruído, filtradas pelo tópico do trecho (como os agentes fazem)."""
+    rng = np.random.default_rng(seed)
+    origem = rng.integers(0, len(vetores), n_consultas)
+    consultas = normalizar_linhas(vetores[origem] + rng.normal(scale=0.05, size=(n_consultas, vetores.shape[1])))
+    return consultas, [{"topico": metadados[i]["topico"]} for i in origem]
+
+
+def _tamanho_em_disco(caminho):
+    if os.path.isfile(caminho):
+        return os.path.getsize(caminho)
+    return sum(os.path.getsize(os.path.join(raiz, a)) for raiz, _, arquivos in os.walk(caminho) for a in arquivos)
+
+
+def _memoria_processo():
+    """RSS do processo (psutil, se instalado); sem ele, só a memória Python/NumPy via tracemalloc."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return tracemalloc.get_traced_memory()[0]
+
+
+def _exatos(vetores, metadados, consultas, filtros, k):
+    """Gabarito: os k vizinhos reais (força bruta) de cada pergunta dentro do seu filtro."""
+    gabarito = []
+    for consulta, filtro in zip(consultas, filtros):
+        linhas = np.array([i for i, m in enumerate(metadados) if all(m.get(c) == v for c, v in filtro.items())])
+        similaridades = vetores[linhas] @ consulta
+        gabarito.append(set(linhas[np.argsort(-similaridades)[:k]].tolist()))
+    return gabarito
+
+
+def benchmark_armazens(n_fragmentos=5000, n_consultas=200, k=5, backends=BACKENDS, filtrar=True, corpus=None):
+    """Tempo de construção, memória, disco, latência p50/p99 e recall@k de cada backend no mesmo corpus."""
+    ids, vetores, textos, metadados = corpus or corpus_sintetico(n_fragmentos)
+    consultas, filtros = consultas_sinteticas(vetores, metadados, n_consultas)
+    if not filtrar:
+        filtros = [{} for _ in filtros]
+    gabarito = _exatos(vetores, metadados, consultas, filtros, k)
+    posicao = {fid: i for i, fid in enumerate(ids)}
+    print(f"--- ⏱️ Benchmark armazéns de vetores: {len(ids):,} trechos x {vetores.shape[1]} dims | "
+          f"{n_consultas} perguntas | k={k} | filtro={'sim' if filtrar else 'não'} ---")
+
+    resultados = []
+    for backend in backends:
+        pasta = tempfile.mkdtemp()
+        caminho = os.path.join(pasta, CAMINHOS_PADRAO[backend])
+        try:
+            tracemalloc.start()
+            memoria_antes = _memoria_processo()
+            inicio = time.perf_counter()
+            colecao = abrir_colecao(backend, caminho, "benchmark", dimensao=vetores.shape[1])
+            for comeco in range(0, len(ids), 256):
+                fatia = slice(comeco, comeco + 256)
+                colecao.upsert(ids=ids[fatia], documents=textos[fatia], metadatas=metadados[fatia], embeddings=vetores[fatia])
+            salvar_colecao(colecao)
+            construcao = time.perf_counter() - inicio
+            memoria = _memoria_processo() - memoria_antes
+            tracemalloc.stop()
+        except Exception as erro: # Pacote do backend não instalado (chromadb, milvus-lite)
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            print(f"{backend:>7}: indisponível ({erro})")
+            shutil.rmtree(pasta, ignore_errors=True)
+            continue
+
+        latencias, acertos = [], 0
+        for consulta, filtro, certos in zip(consultas, filtros, gabarito):
+            inicio = time.perf_counter()
+            resposta = colecao.query(query_embeddings=consulta[None, :], n_results=k, where=filtro or None)
+            latencias.append(time.perf_counter() - inicio)
+            acertos += len(certos & {posicao[fid] for fid in resposta["ids"][0]})
+
+        linha = {
+            "backend": backend,
+            "construcao_s": construcao,
+            "memoria_mb": memoria / 2**20,
+            "disco_mb": _tamanho_em_disco(caminho) / 2**20 if os.path.exists(caminho) else 0.0,
+            "p50_ms": float(np.percentile(latencias, 50)) * 1000,
+            "p99_ms": float(np.percentile(latencias, 99)) * 1000,
+            f"recall@{k}": acertos / (k * len(consultas)),
+        }
+        resultados.append(linha)
+        print(f"{backend:>7}: construção {linha['construcao_s']:6.2f}s | memória {linha['memoria_mb']:7.1f} MB | "
+              f"disco {linha['disco_mb']:6.1f} MB | p50 {linha['p50_ms']:6.2f} ms | p99 {linha['p99_ms']:6.2f} ms | "
+              f"recall@{k} {linha[f'recall@{k}']:.3f}")
+        del colecao
+        shutil.rmtree(pasta, ignore_errors=True)
+    return resultados
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compara Chroma, Milvus Lite e NumPy no mesmo corpus")
+    parser.add_argument("--fragmentos", type=int, default=5000)
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--sem-filtro", action="store_true", help="Perguntas sem filtro de tópico")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    args = parser.parse_args()
+    benchmark_armazens(args.fragmentos, args.consultas, args.k, args.backends.split(","), not args.sem_filtro)
@@ -0,0 +1,199 @@
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- BAIXADOR CONCORRENTE E RETOMÁVEL DE DOCUMENTOS ---
+# - Uma sessão HTTP compartilhada (pool de conexões keep-alive) entre as threads
+# - Download vai para "<arquivo>.part"; se cair no meio, continua de onde parou (HTTP Range)
+# - Registro (JSON) com tamanho, sha256, ETag e Last-Modified de cada arquivo pronto:
+#   arquivo truncado ou corrompido não passa como "concluído"
+# - revalidar=True pergunta ao servidor se o arquivo mudou (If-None-Match / If-Modified-Since);
+#   resposta 304 não baixa nada
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+MAX_CONEXOES_PADRAO = 8
+TAMANHO_BLOCO = 64 * 1024
+SUFIXO_PARCIAL = ".part"
+
+# Situações devolvidas por baixar()
+BAIXADO, RETOMADO, INALTERADO, VERIFICADO = "baixado", "retomado", "inalterado", "verificado"
+
+
+class DownloadInvalido(Exception):
+    """Arquivo recebido não bate com o tamanho anunciado pelo servidor."""
+
+
+def sha256_arquivo(caminho, hash_inicial=None):
+    h = hash_inicial or hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO), b""):
+            h.update(bloco)
+    return h
+
+
+class BaixadorDocumentos:
+    def __init__(self, pasta, caminho_registro=None, max_conexoes=MAX_CONEXOES_PADRAO,
+                 timeout=60, tentativas=3, user_agent=USER_AGENT):
+        self.pasta = pasta
+        self.caminho_registro = caminho_registro or os.path.join(pasta, "registro_downloads.json")
+        self.max_conexoes = max_conexoes
+        self.timeout = timeout
+        os.makedirs(pasta, exist_ok=True)
+
+        retry = Retry(total=tentativas, backoff_factor=1.0, status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=["GET"], respect_retry_after_header=True)
+        adaptador = HTTPAdapter(pool_connections=max_conexoes, pool_maxsize=max_conexoes, max_retries=retry)
+        self.sessao = requests.Session()
+        self.sessao.headers["User-Agent"] = user_agent
+        # Sem compressão de transporte: os bytes recebidos são os do arquivo (Range e tamanhos batem)
+        self.sessao.headers["Accept-Encoding"] = "identity"
+        self.sessao.mount("http://", adaptador)
+        self.sessao.mount("https://", adaptador)
+
+        self._trava = threading.Lock()
+        self.registro = {}
+        if os.path.exists(self.caminho_registro):
+            with open(self.caminho_registro, "r", encoding="utf-8") as f:
+                self.registro = json.load(f)
+
+    # --- REGISTRO ---
+    def _salvar_registro(self):
+        """Escrita atômica (chamar com a trava)."""
+        temporario = self.caminho_registro + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self.registro, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(temporario, self.caminho_registro)
+
+    def _registrar(self, nome, dados):
+        with self._trava:
+            self.registro[nome] = dados
+            self._salvar_registro()
+
+    def verificar(self, nome):
+        """O arquivo no disco é exatamente o que foi registrado (tamanho e sha256)?"""
+        info = self.registro.get(nome)
+        caminho = os.path.join(self.pasta, nome)
+        if not info or not os.path.exists(caminho):
+            return False
+        if os.path.getsize(caminho) != info["tamanho"]:
+            return False
+        return sha256_arquivo(caminho).hexdigest() == info["sha256"]
+
+    # --- DOWNLOAD ---
+    def baixar(self, nome, url, revalidar=False):
+        """
+        Garante o arquivo `nome` na pasta. Retorna BAIXADO, RETOMADO, INALTERADO ou VERIFICADO.
+        Levanta exceção (requests / DownloadInvalido) se não conseguir.
+        """
+        caminho = os.path.join(self.pasta, nome)
+        parcial = caminho + SUFIXO_PARCIAL
+        info = self.registro.get(nome, {})
+        valido = info.get("url") == url and self.verificar(nome)
+
+        if valido and not revalidar:
+            return VERIFICADO
+
+        cabecalhos = {}
+        if valido:
+            # Download condicional: o servidor responde 304 se nada mudou
+            if info.get("etag"):
+                cabecalhos["If-None-Match"] = info["etag"]
+            if info.get("last_modified"):
+                cabecalhos["If-Modified-Since"] = info["last_modified"]
+
+        # Retomada: pede só o que falta do .part (If-Range: se o arquivo mudou no servidor, vem inteiro)
+        ja_baixado = os.path.getsize(parcial) if os.path.exists(parcial) else 0
+        validador_parcial = info.get("parcial", {}) if info.get("url") == url else {}
+        # (ETag fraco "W/..." não vale em If-Range; sem validador forte não dá para retomar com segurança)
+        etag_parcial = validador_parcial.get("etag")
+        if etag_parcial and etag_parcial.startswith("W/"):
+            etag_parcial = None
+        validador = etag_parcial or validador_parcial.get("last_modified")
+        if ja_baixado and not valido and validador:
+            cabecalhos["Range"] = f"bytes={ja_baixado}-"
+            cabecalhos["If-Range"] = validador
+        else:
+            ja_baixado = 0
+
+        with self.sessao.get(url, headers=cabecalhos, stream=True, timeout=self.timeout) as resposta:
+            if resposta.status_code == 304:
+                return INALTERADO
+            if resposta.status_code == 416:
+                # Intervalo pedido não existe (.part maior que o arquivo no servidor): recomeça do zero
+                os.remove(parcial)
+                with self._trava:
+                    self.registro.get(nome, {}).pop("parcial", None)
+                return self.baixar(nome, url, revalidar)
+            resposta.raise_for_status()
+
+            retomando = resposta.status_code == 206
+            if not retomando:
+                ja_baixado = 0
+            etag = resposta.headers.get("ETag")
+            last_modified = resposta.headers.get("Last-Modified")
+            esperado = _tamanho_total(resposta, ja_baixado)
+
+            # Guarda os validadores antes de começar: permite retomar se cair no meio
+            if etag or last_modified:
+                self._registrar(nome, {**info, "url": url, "parcial": {"etag": etag, "last_modified": last_modified}})
+
+            # Conexão que cai no meio: o urllib3 descartaria o último bloco lido ao acusar o corte;
+            # sem essa checagem o que chegou vai para o .part e o tamanho é conferido abaixo
+            resposta.raw.enforce_content_length = False
+            h = sha256_arquivo(parcial) if retomando else hashlib.sha256()
+            with open(parcial, "ab" if retomando else "wb") as f:
+                for bloco in resposta.iter_content(chunk_size=TAMANHO_BLOCO):
+                    f.write(bloco)
+                    h.update(bloco)
+
+        tamanho = os.path.getsize(parcial)
+        if esperado is not None and tamanho != esperado:
+            raise DownloadInvalido(f"{nome}: recebidos {tamanho} de {esperado} bytes (o .part fica para retomar)")
+
+        os.replace(parcial, caminho)
+        self._registrar(nome, {
+            "url": url,
+            "tamanho": tamanho,
+            "sha256": h.hexdigest(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "baixado_em": datetime.now().isoformat(timespec="seconds"),
+        })
+        return RETOMADO if retomando else BAIXADO
+
+    def baixar_varios(self, documentos, revalidar=False):
+        """
+        Baixa vários documentos em paralelo. documentos: {nome_arquivo: url}.
+        Retorna {nome: situação} e {nome: exceção} para os que falharam.
+        """
+        resultados, erros = {}, {}
+        with ThreadPoolExecutor(max_workers=self.max_conexoes) as executor:
+            futuros = {executor.submit(self.baixar, nome, url, revalidar): nome for nome, url in documentos.items()}
+            for futuro, nome in futuros.items():
+                try:
+                    resultados[nome] = futuro.result()
+                except Exception as e:
+                    erros[nome] = e
+        return resultados, erros
+
+    def fechar(self):
+        self.sessao.close()
+
+
+def _tamanho_total(resposta, ja_baixado):
+    """Tamanho final esperado do arquivo (None se o servidor não informar)."""
+    faixa = resposta.headers.get("Content-Range")  # ex: "bytes 1000-4999/5000"
+    if resposta.status_code == 206 and faixa and "/" in faixa:
+        total = faixa.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    # Com Content-Encoding (gzip) o Content-Length é do corpo comprimido: não dá para comparar
+    tamanho = resposta.headers.get("Content-Length")
+    if tamanho and tamanho.isdigit() and not resposta.headers.get("Content-Encoding"):
+        return ja_baixado + int(tamanho) if resposta.status_code == 206 else int(tamanho)
+    return None
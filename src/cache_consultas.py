@@ -0,0 +1,250 @@
+import os
+import re
+import json
+import time
+import uuid
+import threading
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+
+from armazem_vetores import normalizar_linhas
+
+# --- CACHE DE RESULTADOS DE CONSULTA NA FRENTE DO BANCO VETORIAL ---
+# Os produtores repetem as mesmas perguntas ("quais doenças?", "melhor solo?"), e cada uma custava
+# um embedding + uma consulta ao banco. CacheConsultas embrulha a coleção (ou a BuscaHibrida) e
+# guarda o resultado de cada pergunta:
+#   - chave = texto normalizado (minúsculas, sem acento e pontuação) + filtro where + n_results
+#   - falta no texto: primeiro o BM25 (resultado decisivo sai sem embedding); só o que vai mesmo
+#     para a busca vetorial é vetorizado, e esse vetor serve também para achar pergunta parecida
+#     (cosseno >= limiar com uma já guardada, mesmo filtro) antes de consultar o banco
+#   - LRU (capacidade) + TTL (validade em segundos); contadores de acertos/faltas
+#   - invalidação: 05_populate_* regrava um arquivo de versão a cada repopulação; quando ele
+#     muda, o cache é esvaziado (e o banco reaberto, se houver reabrir=)
+
+CAPACIDADE = 1024             # Perguntas guardadas
+TTL_S = 6 * 3600              # Validade de cada resultado
+LIMIAR_SIMILARIDADE = 0.95    # Cosseno mínimo para reaproveitar o resultado de outra pergunta (None = só texto igual)
+
+_NAO_PALAVRA = re.compile(r"[^\w]+")
+
+
+def normalizar_pergunta(texto):
+    """ "Quais doenças?" e "quais  doencas" -> "quais doencas"."""
+    texto = unicodedata.normalize("NFKD", str(texto).lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(_NAO_PALAVRA.sub(" ", texto).split())
+
+
+def caminho_versao(pasta_dados, backend):
+    return os.path.join(pasta_dados, "processed", f"versao_manuais_{backend}.txt")
+
+
+def marcar_versao(pasta_dados, backend):
+    """Chamado depois de repopular o banco: invalida os caches de consulta que olham este arquivo."""
+    caminho = caminho_versao(pasta_dados, backend)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(uuid.uuid4().hex)
+    os.replace(temporario, caminho)
+
+
+def _ler_versao(caminho):
+    if not caminho or not os.path.exists(caminho):
+        return None
+    with open(caminho, "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+
+class CacheConsultas:
+    consulta_por_texto = True  # Aceita query_texts junto com query_embeddings (ver buscar_trechos_lote)
+
+    def __init__(self, busca, embedding_function=None, capacidade=CAPACIDADE, ttl_s=TTL_S,
+                 limiar=LIMIAR_SIMILARIDADE, arquivo_versao=None, reabrir=None, relogio=time.monotonic):
+        self.busca = busca
+        self.embedding_function = embedding_function
+        self.capacidade = capacidade
+        self.ttl_s = ttl_s
+        self.limiar = limiar if embedding_function is not None else None
+        self.arquivo_versao = arquivo_versao
+        self.reabrir = reabrir
+        self.relogio = relogio
+        self._trava = threading.Lock()
+        self._entradas = OrderedDict()  # (texto, filtro, n) -> (expira_em, vetor ou None, resultado)
+        self._vetores = {}              # (filtro, n) -> {chave: vetor}, para a busca por semelhança
+        self._matrizes = {}             # (filtro, n) -> (chaves, matriz), refeita quando o grupo muda
+        self._versao = _ler_versao(arquivo_versao)
+        self._mtime_versao = self._mtime()
+        self.acertos = 0
+        self.semelhantes = 0
+        self.faltas = 0
+        self.expiradas = 0
+        self.invalidacoes = 0
+        self.lexicais = 0               # Faltas respondidas pelo BM25 sem embedding
+        self._geracao = 0
+
+    def __getattr__(self, nome):
+        # count(), get(), ... vão direto para o banco
+        return getattr(self.busca, nome)
+
+    # --- INVALIDAÇÃO ---
+    def _mtime(self):
+        try:
+            return os.stat(self.arquivo_versao).st_mtime_ns if self.arquivo_versao else None
+        except FileNotFoundError:
+            return None
+
+    def _verificar_versao(self):
+        """
+        Um stat por consulta; o arquivo só é lido quando a data de modificação muda. Devolve a
+        busca e a geração do cache em uso (troca e esvaziamento acontecem sob a trava).
+        """
+        mtime = self._mtime()
+        with self._trava:
+            if mtime != self._mtime_versao:
+                self._mtime_versao = mtime
+                versao = _ler_versao(self.arquivo_versao)
+                if versao != self._versao:
+                    self._versao = versao
+                    if self.reabrir is not None:
+                        self.busca = self.reabrir()
+                    self._esvaziar()
+            return self.busca, self._geracao
+
+    def invalidar(self):
+        with self._trava:
+            self._esvaziar()
+
+    def _esvaziar(self):
+        self._entradas.clear()
+        self._vetores.clear()
+        self._matrizes.clear()
+        self._geracao += 1  # Resultado de consulta que começou antes não entra mais no cache
+        self.invalidacoes += 1
+
+    # --- ENTRADAS ---
+    def _remover(self, chave):
+        _, vetor, _ = self._entradas.pop(chave)
+        if vetor is not None:
+            grupo = chave[1:]
+            del self._vetores[grupo][chave]
+            if not self._vetores[grupo]:
+                del self._vetores[grupo]
+            self._matrizes.pop(grupo, None)
+
+    def _buscar(self, chave, agora):
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            return None
+        if entrada[0] <= agora:
+            self._remover(chave)
+            self.expiradas += 1
+            return None
+        self._entradas.move_to_end(chave)
+        return entrada[2]
+
+    def _semelhante(self, grupo, vetor, agora):
+        if grupo not in self._matrizes:
+            vetores = self._vetores.get(grupo)
+            if not vetores:
+                return None
+            self._matrizes[grupo] = (list(vetores), np.stack(list(vetores.values())))
+        chaves, matriz = self._matrizes[grupo]
+        similaridades = matriz @ vetor
+        melhor = int(np.argmax(similaridades))
+        if similaridades[melhor] < self.limiar:
+            return None
+        return self._buscar(chaves[melhor], agora)
+
+    def _guardar(self, chave, vetor, resultado, agora):
+        if chave in self._entradas:
+            self._remover(chave)
+        self._entradas[chave] = (agora + self.ttl_s, vetor, resultado)
+        if vetor is not None:
+            grupo = chave[1:]
+            self._vetores.setdefault(grupo, {})[chave] = vetor
+            self._matrizes.pop(grupo, None)
+        while len(self._entradas) > self.capacidade:
+            self._remover(next(iter(self._entradas)))
+
+    # --- CONSULTA (mesma interface do collection.query do Chroma) ---
+    def query(self, query_texts=None, n_results=10, where=None, query_embeddings=None, embedding_function=None,
+              **kwargs):
+        """
+        query_embeddings (opcional): vetores já calculados, alinhados com query_texts. Sem eles, só as
+        perguntas que chegam à busca vetorial são vetorizadas, com embedding_function (padrão: o do cache).
+        """
+        busca, geracao = self._verificar_versao()
+        if query_texts is None or kwargs:
+            return busca.query(query_texts=query_texts, n_results=n_results, where=where,
+                               query_embeddings=query_embeddings, **kwargs)
+        filtro = json.dumps(where, sort_keys=True, ensure_ascii=False)
+        chaves = [(normalizar_pergunta(t), filtro, n_results) for t in query_texts]
+        resultados = [None] * len(chaves)
+        novos = {}  # posição -> vetor normalizado (ou None) dos resultados calculados agora
+
+        # 1. Mesmo texto já respondido
+        agora = self.relogio()
+        with self._trava:
+            for i, chave in enumerate(chaves):
+                resultados[i] = self._buscar(chave, agora)
+        pendentes = [i for i, r in enumerate(resultados) if r is None]
+
+        # 2. BM25 decisivo responde sem embedding
+        resposta_lexical = getattr(busca, "resposta_lexical", None)
+        lexicais = 0
+        if pendentes and resposta_lexical is not None:
+            for i in pendentes:
+                direto = resposta_lexical(query_texts[i], n_results, where)
+                if direto is not None:
+                    resultados[i] = {"ids": [direto[0]], "documents": [direto[1]], "metadatas": [direto[2]]}
+                    novos[i] = None
+                    lexicais += 1
+            pendentes = [i for i in pendentes if resultados[i] is None]
+
+        # 3. O resto vai para a busca vetorial: um lote de embeddings, usado também para a semelhança
+        brutos = {}
+        embedding_function = embedding_function or self.embedding_function
+        if pendentes and query_embeddings is not None:
+            brutos = {i: query_embeddings[i] for i in pendentes}
+        elif pendentes and embedding_function is not None:
+            brutos = dict(zip(pendentes, embedding_function([query_texts[i] for i in pendentes])))
+        vetores = dict(zip(brutos, normalizar_linhas(list(brutos.values())))) if brutos else {}
+        semelhantes = 0
+        if pendentes and self.limiar is not None and vetores:
+            with self._trava:
+                for i in pendentes:
+                    resultados[i] = self._semelhante(chaves[i][1:], vetores[i], agora)
+                    semelhantes += resultados[i] is not None
+            pendentes = [i for i in pendentes if resultados[i] is None]
+
+        if pendentes:
+            entrada = {}
+            if brutos:
+                entrada["query_embeddings"] = [brutos[i] for i in pendentes]
+            if not brutos or getattr(busca, "consulta_por_texto", False):
+                entrada["query_texts"] = [query_texts[i] for i in pendentes]
+            resposta = busca.query(n_results=n_results, where=where, **entrada)
+            for j, i in enumerate(pendentes):
+                resultados[i] = {campo: [resposta[campo][j]] for campo in ("ids", "documents", "metadatas")}
+                novos[i] = vetores.get(i)
+
+        agora = self.relogio()
+        with self._trava:
+            self.acertos += len(chaves) - len(novos)
+            self.semelhantes += semelhantes
+            self.lexicais += lexicais
+            self.faltas += len(novos)
+            if geracao == self._geracao:
+                for i, vetor in novos.items():
+                    self._guardar(chaves[i], vetor, resultados[i], agora)
+
+        return {campo: [r[campo][0] for r in resultados] for campo in ("ids", "documents", "metadatas")}
+
+    def estatisticas(self):
+        total = self.acertos + self.faltas
+        return {"acertos": self.acertos, "semelhantes": self.semelhantes, "lexicais": self.lexicais,
+                "faltas": self.faltas,
+                "expiradas": self.expiradas, "invalidacoes": self.invalidacoes, "entradas": len(self._entradas),
+                "taxa_acerto": self.acertos / total if total else 0.0}
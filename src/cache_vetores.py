@@ -0,0 +1,310 @@
+import os
+import re
+import json
+import time
+import atexit
+import hashlib
+import threading
+import unicodedata
+import numpy as np
+
+# --- CACHE PERSISTENTE DE EMBEDDINGS (ENDEREÇADO POR CONTEÚDO) ---
+# Chave = hash(modelo + texto normalizado); valor = vetor float32 numa matriz em disco (np.memmap).
+# Uma pasta por "espaço" (modelo + normalização), com:
+#   vetores.f32 -> matriz (capacidade alocada x dimensão), cresce em blocos até o limite
+#   chaves.u8   -> chave (16 bytes) de cada linha, também em memmap; linha zerada = livre
+#   uso.npy     -> último uso de cada linha em ms desde a época (para o LRU)
+#   meta.json   -> dimensão, linhas ocupadas e geração (muda a cada gravação)
+#   trava.lock  -> trava entre processos
+# Vários processos usam o mesmo cache (dashboard, agentes, servidor, scripts 05):
+#   - alocar linha, gravar vetor/chave e despejar só com a trava de arquivo; o índice em memória
+#     (chave -> linha) é relido do disco sob a trava sempre que a geração mudou
+#   - gravação na ordem: zera a chave da linha, grava o vetor, grava a chave nova
+#   - leitura confere a chave da linha antes e depois de copiar o vetor: se outro processo
+#     reaproveitou a linha nesse meio tempo, conta como falta (nunca devolve o vetor de outro texto)
+#   - uso (LRU) é aproximado: fica em memória e vai para o disco em lote (a cada INTERVALO_USO_S
+#     e ao fechar), combinado com o do disco pelo máximo
+# Quando enche, as linhas menos usadas recentemente são reaproveitadas (LRU, em bloco).
+
+CAPACIDADE_PADRAO = 200_000       # vetores (~300 MB com dimensão 384)
+FRACAO_DESPEJO = 0.1              # ao encher, libera 10% das linhas de uma vez
+BLOCO_CRESCIMENTO = 4096          # linhas alocadas a cada crescimento (dobra até o limite)
+TAMANHO_CHAVE = 16                # bytes do hash (blake2b)
+INTERVALO_USO_S = 60              # uso.npy é regravado no máximo uma vez por minuto (e ao fechar)
+
+
+def normalizar_texto(texto):
+    """Mesma pergunta com espaços/quebras diferentes = mesma chave."""
+    return " ".join(unicodedata.normalize("NFC", str(texto)).split())
+
+
+def _nome_pasta(espaco):
+    return re.sub(r"[^0-9A-Za-z_.=-]+", "_", espaco)
+
+
+def _agora_ms():
+    return time.time_ns() // 1_000_000
+
+
+class TravaArquivo:
+    """Trava exclusiva entre processos (fcntl no Linux/macOS, msvcrt no Windows). Não é reentrante."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._arquivo = None
+
+    def __enter__(self):
+        self._arquivo = open(self.caminho, "a+b")
+        if os.name == "nt":
+            import msvcrt
+            self._arquivo.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._arquivo.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK desiste depois de ~10 s; continua esperando
+        else:
+            import fcntl
+            fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *_):
+        if os.name == "nt":
+            import msvcrt
+            self._arquivo.seek(0)
+            msvcrt.locking(self._arquivo.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_UN)
+        self._arquivo.close()
+        self._arquivo = None
+
+
+class CacheVetores:
+    def __init__(self, pasta, espaco, dimensao, capacidade=CAPACIDADE_PADRAO):
+        """espaco: identifica o modelo e o pós-processamento (ex: "all-MiniLM-L6-v2|norm=0")."""
+        self.espaco = espaco
+        self.dimensao = dimensao
+        self.capacidade = capacidade
+        self.pasta = os.path.join(pasta, _nome_pasta(espaco))
+        os.makedirs(self.pasta, exist_ok=True)
+        self.acertos = 0
+        self.faltas = 0
+        self._trava = threading.Lock()
+        self._trava_arquivo = TravaArquivo(self._caminho("trava.lock"))
+        self._vetores = None
+        self._chaves = None
+        self.alocado = 0
+        self.n = 0
+        self.uso = np.zeros(0, dtype=np.int64)
+        self._indice = {}
+        self._geracao = None
+        self._uso_salvo_em = time.monotonic()
+        with self._trava, self._trava_arquivo:
+            self._migrar_formato_antigo()
+            self.uso = self._ler_uso()
+            self._sincronizar()
+        atexit.register(self.salvar)
+
+    # --- ARQUIVOS ---
+    def _caminho(self, nome):
+        return os.path.join(self.pasta, nome)
+
+    def _ler_meta(self):
+        meta = {}
+        if os.path.exists(self._caminho("meta.json")):
+            with open(self._caminho("meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        if meta and meta.get("dimensao") != self.dimensao:
+            raise ValueError(f"Cache {self.pasta} tem dimensão {meta.get('dimensao')}, esperado {self.dimensao}")
+        return meta
+
+    def _gravar_meta(self):
+        self._geracao = (self._geracao or 0) + 1
+        temporario = self._caminho("meta.tmp")
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"espaco": self.espaco, "dimensao": self.dimensao, "n": self.n, "geracao": self._geracao}, f)
+        os.replace(temporario, self._caminho("meta.json"))
+
+    def _ler_uso(self):
+        if not os.path.exists(self._caminho("uso.npy")):
+            return np.zeros(0, dtype=np.int64)
+        return np.maximum(np.load(self._caminho("uso.npy")).astype(np.int64), 0)
+
+    def _migrar_formato_antigo(self):
+        """Versões anteriores guardavam as chaves em chaves.npy (regravado inteiro a cada falta)."""
+        antigo = self._caminho("chaves.npy")
+        if not os.path.exists(antigo) or os.path.exists(self._caminho("chaves.u8")):
+            return
+        chaves = np.load(antigo)
+        uso = np.load(self._caminho("uso.npy")) if os.path.exists(self._caminho("uso.npy")) else np.zeros(len(chaves))
+        chaves[uso[:len(chaves)] < 0] = 0  # Linhas despejadas
+        alocado = os.path.getsize(self._caminho("vetores.f32")) // (4 * self.dimensao)
+        destino = np.zeros((max(alocado, len(chaves)), TAMANHO_CHAVE), dtype=np.uint8)
+        destino[:len(chaves)] = chaves
+        destino.tofile(self._caminho("chaves.u8"))
+        os.remove(antigo)
+
+    def _mapear(self, linhas):
+        """(Re)abre as matrizes em disco com `linhas` linhas, aumentando os arquivos se preciso."""
+        self._vetores = self._chaves = None
+        for nome, largura in (("vetores.f32", self.dimensao * 4), ("chaves.u8", TAMANHO_CHAVE)):
+            with open(self._caminho(nome), "ab") as f:
+                if f.tell() < linhas * largura:
+                    f.truncate(linhas * largura)
+        self.alocado = linhas
+        if linhas:
+            self._vetores = np.memmap(self._caminho("vetores.f32"), dtype=np.float32, mode="r+", shape=(linhas, self.dimensao))
+            self._chaves = np.memmap(self._caminho("chaves.u8"), dtype=np.uint8, mode="r+", shape=(linhas, TAMANHO_CHAVE))
+        if len(self.uso) < linhas:
+            uso = np.zeros(linhas, dtype=np.int64)
+            uso[:len(self.uso)] = self.uso
+            self.uso = uso
+
+    def _sincronizar(self):
+        """Com a trava de arquivo: acompanha o que outros processos gravaram (linhas novas, despejos)."""
+        meta = self._ler_meta()
+        self.n = meta.get("n", 0)
+        caminho = self._caminho("vetores.f32")
+        linhas = os.path.getsize(caminho) // (4 * self.dimensao) if os.path.exists(caminho) else 0
+        if linhas != self.alocado or (self._vetores is None and self.n):
+            self._mapear(max(linhas, self.n))
+        geracao = meta.get("geracao", 0)
+        if geracao != self._geracao:
+            bruto = bytes(self._chaves[:self.n]) if self.n else b""
+            vazia = bytes(TAMANHO_CHAVE)
+            self._indice = {}
+            for linha in range(self.n):
+                chave = bruto[linha * TAMANHO_CHAVE:(linha + 1) * TAMANHO_CHAVE]
+                if chave != vazia:
+                    self._indice[chave] = linha
+            self._geracao = geracao
+
+    def salvar(self):
+        """Grava o uso (LRU) acumulado em memória. Chamado sozinho ao fechar o processo."""
+        with self._trava, self._trava_arquivo:
+            self._salvar_uso()
+
+    def _salvar_uso(self):
+        if self._vetores is not None:
+            self._vetores.flush()
+            self._chaves.flush()
+        uso = self.uso[:self.n].copy()
+        no_disco = self._ler_uso()[:self.n]
+        uso[:len(no_disco)] = np.maximum(uso[:len(no_disco)], no_disco)
+        temporario = self._caminho("uso.tmp.npy")
+        np.save(temporario, uso)
+        os.replace(temporario, self._caminho("uso.npy"))
+        self._uso_salvo_em = time.monotonic()
+
+    # --- CHAVES E LINHAS ---
+    def chave(self, texto):
+        conteudo = f"{self.espaco}\0{normalizar_texto(texto)}".encode("utf-8")
+        return hashlib.blake2b(conteudo, digest_size=TAMANHO_CHAVE).digest()
+
+    def _linhas_livres(self, quantidade):
+        """
+        Linhas para `quantidade` vetores novos: cresce o arquivo ou despeja as menos usadas.
+        Só com a trava de arquivo (outro processo não pode escolher as mesmas linhas).
+        """
+        quantidade = min(quantidade, self.capacidade)
+        ocupadas_ate = self.n
+        no_fim = min(quantidade, self.capacidade - self.n)
+        if self.n + no_fim > self.alocado:
+            self._mapear(min(self.capacidade, max(self.n + no_fim, 2 * self.alocado, BLOCO_CRESCIMENTO)))
+        linhas = list(range(self.n, self.n + no_fim))
+        self.n += no_fim
+
+        faltam = quantidade - no_fim
+        if faltam:
+            livres = np.flatnonzero(~self._chaves[:ocupadas_ate].any(axis=1))
+            if len(livres) < faltam:
+                # LRU em bloco: libera de uma vez as linhas com o último uso mais antigo (entre todos os processos)
+                uso = self.uso[:ocupadas_ate].copy()
+                no_disco = self._ler_uso()[:ocupadas_ate]
+                uso[:len(no_disco)] = np.maximum(uso[:len(no_disco)], no_disco)
+                ocupadas = np.flatnonzero(self._chaves[:ocupadas_ate].any(axis=1))
+                despejar = min(len(ocupadas), max(faltam, int(self.capacidade * FRACAO_DESPEJO)))
+                antigas = ocupadas[np.argpartition(uso[ocupadas], despejar - 1)[:despejar]]
+                for linha in antigas:
+                    self._indice.pop(bytes(self._chaves[linha]), None)
+                self._chaves[antigas] = 0
+                self._chaves.flush()
+                livres = np.flatnonzero(~self._chaves[:ocupadas_ate].any(axis=1))
+            linhas += livres[:faltam].tolist()
+        return linhas
+
+    def _ler(self, posicoes, linhas, chaves, resultado):
+        """Copia os vetores das linhas; devolve a máscara das que continuam com a chave esperada."""
+        linhas = np.asarray(linhas)
+        esperadas = np.frombuffer(b"".join(chaves), dtype=np.uint8).reshape(-1, TAMANHO_CHAVE)
+        antes = (self._chaves[linhas] == esperadas).all(axis=1)
+        resultado[posicoes] = self._vetores[linhas]
+        depois = (self._chaves[linhas] == esperadas).all(axis=1)
+        return antes & depois
+
+    # --- API ---
+    def codificar(self, textos, funcao_codificar):
+        """
+        Vetores (n, dimensao) float32 dos textos. Só os textos ausentes do cache (sem repetição)
+        passam por funcao_codificar(lista_de_textos) -> array (m, dimensao).
+        """
+        textos = list(textos)
+        chaves = [self.chave(t) for t in textos]
+        resultado = np.empty((len(textos), self.dimensao), dtype=np.float32)
+
+        faltando = {}
+        with self._trava:
+            posicoes, linhas = [], []
+            for i, c in enumerate(chaves):
+                linha = self._indice.get(c)
+                if linha is None:
+                    faltando.setdefault(c, []).append(i)
+                else:
+                    posicoes.append(i)
+                    linhas.append(linha)
+            acertos = 0
+            if linhas:
+                validas = self._ler(posicoes, linhas, [chaves[i] for i in posicoes], resultado)
+                for i, linha, valida in zip(posicoes, linhas, validas):
+                    if not valida:
+                        # Linha reaproveitada por outro processo: o índice local estava velho
+                        self._indice.pop(chaves[i], None)
+                        faltando.setdefault(chaves[i], []).append(i)
+                self.uso[np.asarray(linhas)[validas]] = _agora_ms()
+                acertos = int(validas.sum())
+            self.acertos += acertos
+            self.faltas += len(textos) - acertos
+
+        if not faltando:
+            return resultado
+
+        # Fora das travas: o modelo pode demorar
+        novas_chaves = list(faltando)
+        novos = np.asarray(funcao_codificar([textos[faltando[c][0]] for c in novas_chaves]), dtype=np.float32)
+        for c, vetor in zip(novas_chaves, novos):
+            resultado[faltando[c]] = vetor
+
+        with self._trava, self._trava_arquivo:
+            self._sincronizar()
+            novas_chaves = [c for c in novas_chaves if c not in self._indice]  # outra thread/processo pode ter gravado
+            linhas = self._linhas_livres(len(novas_chaves))
+            if linhas:
+                novas_chaves = novas_chaves[:len(linhas)]
+                self._vetores[linhas] = np.asarray([resultado[faltando[c][0]] for c in novas_chaves], dtype=np.float32)
+                self._vetores.flush()  # Vetor no disco antes da chave que aponta para ele
+                self._chaves[linhas] = np.frombuffer(b"".join(novas_chaves), dtype=np.uint8).reshape(-1, TAMANHO_CHAVE)
+                self._chaves.flush()
+                self.uso[linhas] = _agora_ms()
+                for c, linha in zip(novas_chaves, linhas):
+                    self._indice[c] = linha
+                self._gravar_meta()
+            if time.monotonic() - self._uso_salvo_em > INTERVALO_USO_S:
+                self._salvar_uso()
+        return resultado
+
+    def estatisticas(self):
+        total = self.acertos + self.faltas
+        return {"vetores": len(self._indice), "capacidade": self.capacidade, "acertos": self.acertos,
+                "faltas": self.faltas, "taxa_acerto": self.acertos / total if total else 0.0}
@@ -0,0 +1,129 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- CLIENTE DE CLIMA (OPEN-METEO) CONCORRENTE E COM CACHE EM DISCO ---
+# - Uma sessão HTTP compartilhada (pool de conexões keep-alive) entre todas as threads
+# - Limite configurável de requisições simultâneas
+# - Cache persistente das respostas diárias brutas, chaveado por
+#   (lat, lon, variáveis, período): rodar de novo não baixa nada outra vez
+# - Resposta com dias nulos (dados ainda não consolidados na API) vale só por VALIDADE_INCOMPLETA_S;
+#   depois disso é baixada de novo, para os dias faltantes serem preenchidos
+# - Em vez de time.sleep(1) fixo, re-tentativas com backoff quando a API pede (429/5xx)
+
+URL_HISTORICO = "https://archive-api.open-meteo.com/v1/archive"
+VARIAVEIS_PADRAO = ("temperature_2m_mean", "precipitation_sum")
+FUSO_PADRAO = "America/Sao_Paulo"
+MAX_REQUISICOES_PADRAO = 8
+VALIDADE_INCOMPLETA_S = 24 * 3600 # Resposta com nulos no cache antes de tentar de novo
+
+
+def tem_nulos(dados):
+    """True se alguma variável diária veio com dia nulo."""
+    return any(v is None for chave, valores in dados.items() if chave != "time" for v in valores)
+
+
+class ClienteClima:
+    def __init__(self, pasta_cache, max_requisicoes=MAX_REQUISICOES_PADRAO, url=URL_HISTORICO,
+                 timeout=60, tentativas=3, fuso=FUSO_PADRAO, validade_incompleta_s=VALIDADE_INCOMPLETA_S):
+        self.pasta_cache = pasta_cache
+        self.validade_incompleta_s = validade_incompleta_s
+        self.max_requisicoes = max_requisicoes
+        self.url = url
+        self.timeout = timeout
+        self.fuso = fuso
+        os.makedirs(pasta_cache, exist_ok=True)
+
+        retry = Retry(total=tentativas, backoff_factor=1.0, status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=["GET"], respect_retry_after_header=True)
+        adaptador = HTTPAdapter(pool_connections=max_requisicoes, pool_maxsize=max_requisicoes, max_retries=retry)
+        self.sessao = requests.Session()
+        self.sessao.mount("http://", adaptador)
+        self.sessao.mount("https://", adaptador)
+
+        # Garante o limite de requisições em voo mesmo se chamado de várias threads externas
+        self._semaforo = threading.BoundedSemaphore(max_requisicoes)
+
+    # --- CACHE ---
+    def chave_cache(self, lat, lon, inicio, fim, variaveis=VARIAVEIS_PADRAO):
+        texto = json.dumps([round(float(lat), 4), round(float(lon), 4), sorted(variaveis), str(inicio), str(fim), self.fuso])
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+    def _caminho_cache(self, chave):
+        return os.path.join(self.pasta_cache, chave[:2], f"{chave}.json.gz")
+
+    def _ler_cache(self, chave):
+        caminho = self._caminho_cache(chave)
+        if not os.path.exists(caminho):
+            return None
+        try:
+            with gzip.open(caminho, "rt", encoding="utf-8") as f:
+                dados = json.load(f)
+            if tem_nulos(dados) and time.time() - os.path.getmtime(caminho) > self.validade_incompleta_s:
+                return None # Dias ainda nulos: baixa de novo para preencher
+            return dados
+        except (OSError, ValueError):
+            return None # Arquivo corrompido: baixa de novo
+
+    def _gravar_cache(self, chave, dados):
+        caminho = self._caminho_cache(chave)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f"{caminho}.{threading.get_ident()}.tmp"
+        with gzip.open(temporario, "wt", encoding="utf-8") as f:
+            json.dump(dados, f)
+        os.replace(temporario, caminho)
+
+    # --- DOWNLOAD ---
+    def buscar_diario(self, lat, lon, inicio, fim, variaveis=VARIAVEIS_PADRAO):
+        """
+        Série diária bruta (bloco "daily" da resposta) para um ponto e período.
+        Usa o cache em disco quando disponível (resposta com nulos só até expirar).
+        """
+        chave = self.chave_cache(lat, lon, inicio, fim, variaveis)
+        dados = self._ler_cache(chave)
+        if dados is not None:
+            return dados
+
+        params = {
+            "latitude": lat,
+            "longitude": lon,
+            "start_date": str(inicio),
+            "end_date": str(fim),
+            "daily": list(variaveis),
+            "timezone": self.fuso
+        }
+        with self._semaforo:
+            response = self.sessao.get(self.url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        dados = response.json()["daily"]
+
+        self._gravar_cache(chave, dados)
+        return dados
+
+    def buscar_varios(self, locais, inicio, fim, variaveis=VARIAVEIS_PADRAO):
+        """
+        Busca vários locais em paralelo. locais: {nome: (lat, lon)}.
+        Retorna {nome: dados_diarios} e {nome: exceção} para os que falharam.
+        """
+        resultados, erros = {}, {}
+        with ThreadPoolExecutor(max_workers=self.max_requisicoes) as executor:
+            futuros = {
+                executor.submit(self.buscar_diario, lat, lon, inicio, fim, variaveis): nome
+                for nome, (lat, lon) in locais.items()
+            }
+            for futuro, nome in futuros.items():
+                try:
+                    resultados[nome] = futuro.result()
+                except Exception as e:
+                    erros[nome] = e
+        return resultados, erros
+
+    def fechar(self):
+        self.sessao.close()
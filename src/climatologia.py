@@ -0,0 +1,188 @@
+import time
+import warnings
+import numpy as np
+import pandas as pd
+
+from historico_clima import decendios_de_dias
+
+# --- MOTOR VETORIZADO DE CLIMATOLOGIA ---
+# Recebe séries diárias de MUITOS locais de uma vez (formato longo: local, dia, temp, chuva)
+# e calcula, por (local, decêndio), numa passada agrupada com np.bincount:
+#   - temp: temperatura média
+#   - chuva_acumulada_decendio: média entre os anos da chuva REALMENTE acumulada no decêndio
+#   - chuva_p10 / chuva_p50 / chuva_p90: percentis entre os anos da chuva acumulada
+#   - dias_secos: média anual de dias com chuva abaixo do limiar
+#   - veranicos: média anual de sequências secas (>= N dias) que começam no decêndio
+#   - n_anos: quantos anos completos entraram na estatística
+# Para milhares de locais, climatologia_em_blocos() processa blocos de locais com memória limitada.
+
+# Mude a versão ao alterar as fórmulas: o passo 03 refaz as partições que usavam a versão antiga
+VERSAO_CLIMATOLOGIA = "clim-v2"
+NUM_DECENDIOS = 36
+LIMIAR_SECO_MM = 1.0        # Dia seco: chuva < 1 mm
+MIN_DIAS_VERANICO = 5       # Veranico: pelo menos 5 dias secos seguidos
+COBERTURA_MINIMA = 0.9      # Ano-decêndio só conta se tiver >= 90% dos dias com dado
+COLUNAS_SAIDA = ["temp", "chuva_acumulada_decendio", "chuva_p10", "chuva_p50", "chuva_p90",
+                 "dias_secos", "veranicos", "n_anos"]
+
+
+def _dias_esperados(ano_min, ano_max):
+    """Tamanho (em dias) de cada (ano, decêndio) do calendário: shape (anos, 36)."""
+    todos = np.arange(np.datetime64(f"{ano_min}-01-01"), np.datetime64(f"{ano_max + 1}-01-01")).astype(np.int64)
+    anos = todos.astype("datetime64[D]").astype("datetime64[Y]").astype(np.int64) + 1970 - ano_min
+    dec = decendios_de_dias(todos).astype(np.int64) - 1
+    n_anos = ano_max - ano_min + 1
+    return np.bincount(anos * NUM_DECENDIOS + dec, minlength=n_anos * NUM_DECENDIOS).reshape(n_anos, NUM_DECENDIOS)
+
+
+def _percentis_entre_anos(valores, percentis):
+    """
+    Percentis ao longo do eixo dos anos (eixo 1) ignorando NaN, todos os (local, decêndio) de uma vez.
+    Mesmo resultado de np.nanpercentile (interpolação linear), sem o laço interno por fatia.
+    """
+    ordenados = np.sort(valores, axis=1)  # NaN vai para o fim
+    n = (~np.isnan(valores)).sum(axis=1, keepdims=True)
+    resultado = []
+    for p in percentis:
+        posicao = (n - 1) * (p / 100.0)
+        baixo = np.clip(np.floor(posicao).astype(np.int64), 0, None)
+        alto = np.minimum(baixo + 1, np.maximum(n - 1, 0))
+        v_baixo = np.take_along_axis(ordenados, baixo, axis=1)
+        v_alto = np.take_along_axis(ordenados, alto, axis=1)
+        valor = v_baixo + (v_alto - v_baixo) * (posicao - baixo)
+        resultado.append(np.where(n > 0, valor, np.nan)[:, 0, :])
+    return resultado
+
+
+def calcular_climatologia_vetorizada(locais, dias, temp, chuva, n_locais=None,
+                                     limiar_seco=LIMIAR_SECO_MM, min_dias_veranico=MIN_DIAS_VERANICO):
+    """
+    locais: índice inteiro (0..n_locais-1) do local de cada linha
+    dias:   dia de cada linha (datetime64[D] ou int de dias desde 1970-01-01)
+    temp, chuva: valores diários (NaN = sem dado)
+    Retorna DataFrame com (local, decendio) + COLUNAS_SAIDA.
+    """
+    locais = np.asarray(locais, dtype=np.int64)
+    dias = np.asarray(dias).astype("datetime64[D]").astype(np.int64)
+    temp = np.asarray(temp, dtype=np.float64)
+    chuva = np.asarray(chuva, dtype=np.float64)
+    n_locais = int(n_locais if n_locais is not None else (locais.max() + 1 if len(locais) else 0))
+
+    # Ordena por (local, dia): necessário para achar as sequências secas
+    # (séries do armazém já vêm em ordem; aí o lexsort é pulado)
+    ja_ordenado = np.all((locais[1:] > locais[:-1]) | ((locais[1:] == locais[:-1]) & (dias[1:] >= dias[:-1])))
+    if not ja_ordenado:
+        ordem = np.lexsort((dias, locais))
+        locais, dias, temp, chuva = locais[ordem], dias[ordem], temp[ordem], chuva[ordem]
+
+    # Chaves de agrupamento (tudo inteiro, sem datas linha a linha)
+    dec = decendios_de_dias(dias).astype(np.int64) - 1
+    ano_abs = dias.astype("datetime64[D]").astype("datetime64[Y]").astype(np.int64) + 1970
+    ano_min, ano_max = int(ano_abs.min()), int(ano_abs.max())
+    n_anos = ano_max - ano_min + 1
+    ano = ano_abs - ano_min
+    chave_local_dec = locais * NUM_DECENDIOS + dec
+    chave_ano_dec = (locais * n_anos + ano) * NUM_DECENDIOS + dec
+    tam_local_dec = n_locais * NUM_DECENDIOS
+    tam_ano_dec = n_locais * n_anos * NUM_DECENDIOS
+
+    # 1. Temperatura média por (local, decêndio)
+    ok_temp = ~np.isnan(temp)
+    soma_temp = np.bincount(chave_local_dec[ok_temp], weights=temp[ok_temp], minlength=tam_local_dec)
+    n_temp = np.bincount(chave_local_dec[ok_temp], minlength=tam_local_dec)
+
+    # 2. Chuva acumulada e dias secos por (local, ano, decêndio)
+    ok_chuva = ~np.isnan(chuva)
+    seco = ok_chuva & (chuva < limiar_seco)
+    acumulada = np.bincount(chave_ano_dec[ok_chuva], weights=chuva[ok_chuva], minlength=tam_ano_dec)
+    n_chuva = np.bincount(chave_ano_dec[ok_chuva], minlength=tam_ano_dec)
+    n_secos = np.bincount(chave_ano_dec[seco], minlength=tam_ano_dec)
+
+    # 3. Veranicos: início de cada sequência seca e o tamanho dela
+    continua = np.r_[False, (locais[1:] == locais[:-1]) & (dias[1:] == dias[:-1] + 1) & seco[:-1]]
+    inicio_seq = seco & ~continua
+    id_seq = np.cumsum(inicio_seq) - 1
+    tamanho_seq = np.bincount(id_seq[seco], minlength=int(inicio_seq.sum()))
+    idx_inicios = np.flatnonzero(inicio_seq)
+    inicios_validos = idx_inicios[tamanho_seq >= min_dias_veranico]
+    n_veranicos = np.bincount(chave_ano_dec[inicios_validos], minlength=tam_ano_dec)
+
+    # 4. Só anos-decêndio com cobertura suficiente entram nas estatísticas entre anos
+    esperado = _dias_esperados(ano_min, ano_max)[np.newaxis, :, :]
+    forma = (n_locais, n_anos, NUM_DECENDIOS)
+    completo = n_chuva.reshape(forma) >= COBERTURA_MINIMA * esperado
+    acumulada = np.where(completo, acumulada.reshape(forma), np.nan)
+    secos = np.where(completo, n_secos.reshape(forma), np.nan)
+    veranicos = np.where(completo, n_veranicos.reshape(forma), np.nan)
+
+    # Decêndios sem nenhum ano completo ficam NaN (sem avisos de "mean of empty slice")
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        p10, p50, p90 = _percentis_entre_anos(acumulada, [10, 50, 90])
+        media_acumulada = np.nanmean(acumulada, axis=1)
+        media_secos = np.nanmean(secos, axis=1)
+        media_veranicos = np.nanmean(veranicos, axis=1)
+        temp_media = soma_temp / n_temp
+
+    return pd.DataFrame({
+        "local": np.repeat(np.arange(n_locais), NUM_DECENDIOS),
+        "decendio": np.tile(np.arange(1, NUM_DECENDIOS + 1), n_locais),
+        "temp": temp_media,
+        "chuva_acumulada_decendio": media_acumulada.reshape(-1),
+        "chuva_p10": p10.reshape(-1),
+        "chuva_p50": p50.reshape(-1),
+        "chuva_p90": p90.reshape(-1),
+        "dias_secos": media_secos.reshape(-1),
+        "veranicos": media_veranicos.reshape(-1),
+        "n_anos": completo.sum(axis=1).reshape(-1),
+    })
+
+
+def climatologia_em_blocos(series, tamanho_bloco=500, **kwargs):
+    """
+    series: {nome: {"dias": ..., "temp": ..., "chuva": ...}} (ex: memmaps do HistoricoClima.serie)
+    Processa os locais em blocos (memória limitada ao bloco) e devolve um DataFrame com a coluna 'municipio'.
+    """
+    nomes = list(series)
+    resultados = []
+    for inicio in range(0, len(nomes), tamanho_bloco):
+        bloco = nomes[inicio:inicio + tamanho_bloco]
+        tamanhos = [len(series[n]["dias"]) for n in bloco]
+        if sum(tamanhos) == 0:
+            continue
+        clim = calcular_climatologia_vetorizada(
+            np.repeat(np.arange(len(bloco)), tamanhos),
+            np.concatenate([np.asarray(series[n]["dias"]) for n in bloco]),
+            np.concatenate([np.asarray(series[n]["temp"]) for n in bloco]),
+            np.concatenate([np.asarray(series[n]["chuva"]) for n in bloco]),
+            n_locais=len(bloco), **kwargs
+        )
+        clim.insert(0, "municipio", np.asarray(bloco, dtype=object)[clim.pop("local").to_numpy()])
+        resultados.append(clim)
+    if not resultados:
+        return pd.DataFrame(columns=["municipio", "decendio"] + COLUNAS_SAIDA)
+    return pd.concat(resultados, ignore_index=True)
+
+
+def benchmark_climatologia(n_locais=2000, anos=30, tamanho_bloco=500, seed=42):
+    """Mede o motor com séries sintéticas: milhares de locais x 30 anos de dados diários."""
+    rng = np.random.default_rng(seed)
+    dias = np.arange(np.datetime64("1994-01-01"), np.datetime64(f"{1994 + anos}-01-01")).astype(np.int32)
+    print(f"--- ⏱️ Benchmark Climatologia: {n_locais} locais x {len(dias):,} dias = {n_locais * len(dias):,} linhas ---")
+
+    series = {}
+    for i in range(n_locais):
+        chuva = rng.gamma(0.5, 12.0, len(dias)).astype(np.float32)
+        chuva[rng.random(len(dias)) < 0.5] = 0.0
+        series[f"Local {i}"] = {"dias": dias, "temp": (24 + rng.normal(0, 2, len(dias))).astype(np.float32), "chuva": chuva}
+
+    inicio = time.perf_counter()
+    clim = climatologia_em_blocos(series, tamanho_bloco=tamanho_bloco)
+    segundos = time.perf_counter() - inicio
+    linhas = n_locais * len(dias)
+    print(f"Tempo: {segundos:.2f}s ({linhas / segundos:,.0f} dias-local/s) | Saída: {len(clim):,} linhas")
+    return {"segundos": segundos, "linhas": linhas}
+
+
+if __name__ == "__main__":
+    benchmark_climatologia()
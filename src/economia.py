@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+from manifesto import hash_objeto
+from motor_regras import mascara_meses, NUM_DECENDIOS
+
+# --- CENÁRIOS ECONÔMICOS E CUBO DE RECEITA/CUSTO/ROI ---
+# A tabela de preços e custos fica num arquivo (data/regras/cenarios_economicos.csv), uma linha por
+# (cultura, cenário, intervalo de meses de plantio):
+#   cultura;cenario;mes_inicio;mes_fim;custo_ha;receita_ha;preco_venda;fator_custo;comentario
+#   - cenários: pessimista / base / otimista
+#   - mes_inicio > mes_fim atravessa a virada do ano; a última linha que casar vale (como nas regras de risco)
+# A versão da tabela é o hash do seu conteúdo: mudou um preço, muda a versão e o passo 03 refaz o cubo.
+#
+# O cubo tem uma linha por (municipio, cultura, solo, decendio, cenario) com receita, custo e ROI já
+# calculados, então perguntas "e se?" (outro cenário, outra data) viram consulta em array.
+
+CENARIOS = ["pessimista", "base", "otimista"]
+CENARIO_PADRAO = "base"
+COLUNAS_VALORES = ["custo_ha", "receita_ha", "preco_venda", "fator_custo"]
+COLUNAS_OBRIGATORIAS = ["cultura", "cenario", "mes_inicio", "mes_fim"] + COLUNAS_VALORES
+
+# Perda esperada da receita conforme o risco ZARC (mesma régua do simulador do dashboard)
+LIMITES_PERDA = [(50, 0.95), (31, 0.50)]   # risco >= limite -> perda
+PERDA_SEM_RISCO = 0.0
+
+
+def carregar_tabela_economica(caminho):
+    """Lê e valida o arquivo de cenários. Retorna um DataFrame na ordem de aplicação."""
+    tabela = pd.read_csv(caminho, sep=";", encoding="utf-8", dtype={"cultura": str, "cenario": str})
+
+    faltando = [c for c in COLUNAS_OBRIGATORIAS if c not in tabela.columns]
+    if faltando:
+        raise ValueError(f"Tabela econômica {caminho} sem as colunas: {faltando}")
+
+    tabela["cultura"] = tabela["cultura"].str.strip()
+    tabela["cenario"] = tabela["cenario"].str.strip()
+    for coluna in ["mes_inicio", "mes_fim"]:
+        tabela[coluna] = tabela[coluna].astype(int)
+    for coluna in COLUNAS_VALORES:
+        tabela[coluna] = tabela[coluna].astype(float)
+
+    desconhecidos = sorted(set(tabela["cenario"]) - set(CENARIOS))
+    if desconhecidos:
+        raise ValueError(f"Cenários desconhecidos em {caminho}: {desconhecidos} (use {CENARIOS})")
+
+    invalidos = tabela[~tabela["mes_inicio"].between(1, 12) | ~tabela["mes_fim"].between(1, 12)]
+    if not invalidos.empty:
+        raise ValueError(f"Linhas com mês fora de 1-12 (linhas {list(invalidos.index + 2)})")
+
+    return tabela.reset_index(drop=True)
+
+
+def versao_tabela(tabela):
+    """Versão da tabela = hash do conteúdo (ordem das linhas importa: a última que casa vale)."""
+    return hash_objeto(tabela[COLUNAS_OBRIGATORIAS].to_dict(orient="split")["data"])
+
+
+def expandir_tabela(tabela, culturas):
+    """
+    Arrays (cenários, culturas, 36) de cada valor em COLUNAS_VALORES.
+    Combinação sem linha na tabela fica NaN.
+    """
+    indice_cultura = {c: i for i, c in enumerate(culturas)}
+    arrays = {c: np.full((len(CENARIOS), len(culturas), NUM_DECENDIOS), np.nan) for c in COLUNAS_VALORES}
+    for linha in tabela.itertuples(index=False):
+        i_cult = indice_cultura.get(linha.cultura)
+        if i_cult is None:
+            continue
+        i_cen = CENARIOS.index(linha.cenario)
+        meses = mascara_meses(linha.mes_inicio, linha.mes_fim)
+        for coluna in COLUNAS_VALORES:
+            arrays[coluna][i_cen, i_cult, meses] = getattr(linha, coluna)
+    return arrays
+
+
+def perda_por_risco(risco):
+    """Fração da receita perdida para cada risco (vetorizado)."""
+    risco = np.asarray(risco)
+    perda = np.full(risco.shape, PERDA_SEM_RISCO)
+    for limite, valor in reversed(LIMITES_PERDA):
+        np.copyto(perda, valor, where=risco >= limite)
+    return perda
+
+
+def adicionar_dados_economicos(df, tabela, cenario=CENARIO_PADRAO):
+    """Colunas custo_ha_est, receita_ha_est e roi_potencial de um cenário (por cultura e mês do decêndio)."""
+    culturas = list(df["cultura"].cat.categories) if hasattr(df["cultura"], "cat") else sorted(df["cultura"].unique())
+    arrays = expandir_tabela(tabela, culturas)
+    i_cult = pd.Categorical(df["cultura"], categories=culturas).codes
+    i_dec = df["decendio"].to_numpy(dtype=np.int64) - 1
+    i_cen = CENARIOS.index(cenario)
+
+    custo = np.nan_to_num(arrays["custo_ha"][i_cen, i_cult, i_dec])
+    receita = np.nan_to_num(arrays["receita_ha"][i_cen, i_cult, i_dec])
+    df["custo_ha_est"] = custo.astype(np.int64)
+    df["receita_ha_est"] = receita.astype(np.int64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        df["roi_potencial"] = (receita - custo) / custo
+    return df
+
+
+def gerar_cubo_economico(df, tabela):
+    """
+    Cubo (municipio, cultura, solo, decendio, cenario) -> custo, receita bruta, receita esperada
+    (descontada a perda pelo risco ZARC) e ROI. df precisa de municipio, cultura, solo, decendio e
+    risco_numerico. Uma junção por índice de array: cada linha do df vira len(CENARIOS) linhas.
+    """
+    chaves = [c for c in ["uf", "municipio", "cultura", "solo", "decendio"] if c in df.columns]
+    base = df[chaves + ["risco_numerico"]].drop_duplicates(chaves).reset_index(drop=True)
+
+    culturas = list(base["cultura"].cat.categories) if hasattr(base["cultura"], "cat") else sorted(base["cultura"].unique())
+    arrays = expandir_tabela(tabela, culturas)
+    i_cult = pd.Categorical(base["cultura"], categories=culturas).codes
+    i_dec = base["decendio"].to_numpy(dtype=np.int64) - 1
+
+    # (linhas, cenários): fancy indexing faz a "junção" de todas as linhas com todos os cenários
+    valores = {c: arrays[c][:, i_cult, i_dec].T for c in COLUNAS_VALORES}
+    n_linhas, n_cenarios = len(base), len(CENARIOS)
+    perda = perda_por_risco(base["risco_numerico"].to_numpy())[:, np.newaxis]
+
+    custo = valores["custo_ha"] * valores["fator_custo"]
+    receita = valores["receita_ha"]
+    receita_esperada = receita * (1 - perda)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        roi = (receita_esperada - custo) / custo
+
+    cubo = base.loc[np.repeat(np.arange(n_linhas), n_cenarios), chaves + ["risco_numerico"]].reset_index(drop=True)
+    cubo["cenario"] = pd.Categorical.from_codes(np.tile(np.arange(n_cenarios), n_linhas), categories=CENARIOS, ordered=True)
+    cubo["custo_ha"] = custo.reshape(-1)
+    cubo["receita_ha"] = receita.reshape(-1)
+    cubo["receita_esperada_ha"] = receita_esperada.reshape(-1)
+    cubo["lucro_ha"] = cubo["receita_esperada_ha"] - cubo["custo_ha"]
+    cubo["roi"] = roi.reshape(-1)
+    cubo["preco_venda"] = valores["preco_venda"].reshape(-1)
+    cubo["fator_custo"] = valores["fator_custo"].reshape(-1)
+    return cubo
+
+
+class ConsultaCenarios:
+    """
+    Cubo de um município em arrays densos (cenário, cultura, decêndio) para o dashboard:
+    trocar de cenário ou de data é só indexar, sem recalcular nada.
+    Quando há vários solos, vale o primeiro (mesma escolha do simulador).
+    """
+    def __init__(self, cubo):
+        cubo = cubo.drop_duplicates(["cenario", "cultura", "decendio"])
+        self.culturas = sorted(cubo["cultura"].astype(str).unique())
+        self._indice = {c: i for i, c in enumerate(self.culturas)}
+        i_cen = pd.Categorical(cubo["cenario"].astype(str), categories=CENARIOS).codes
+        i_cult = pd.Categorical(cubo["cultura"].astype(str), categories=self.culturas).codes
+        i_dec = cubo["decendio"].to_numpy(dtype=np.int64) - 1
+
+        self.colunas = ["custo_ha", "receita_esperada_ha", "lucro_ha", "roi", "preco_venda", "fator_custo"]
+        self.valores = np.full((len(self.colunas), len(CENARIOS), len(self.culturas), NUM_DECENDIOS), np.nan)
+        for k, coluna in enumerate(self.colunas):
+            self.valores[k, i_cen, i_cult, i_dec] = cubo[coluna].to_numpy(dtype=np.float64)
+
+    def valor(self, coluna, cenario, cultura, decendio, padrao=np.nan):
+        i_cult = self._indice.get(cultura)
+        if i_cult is None:
+            return padrao
+        v = self.valores[self.colunas.index(coluna), CENARIOS.index(cenario), i_cult, decendio - 1]
+        return padrao if np.isnan(v) else float(v)
+
+    def comparar(self, cultura, decendio):
+        """Tabela cenário x indicadores de uma cultura/decêndio (uma fatia do array)."""
+        i_cult = self._indice.get(cultura)
+        if i_cult is None:
+            return pd.DataFrame(columns=["cenario"] + self.colunas)
+        fatia = self.valores[:, :, i_cult, decendio - 1].T
+        return pd.DataFrame(fatia, columns=self.colunas).assign(cenario=CENARIOS)[["cenario"] + self.colunas]
@@ -0,0 +1,29 @@
+import numpy as np
+from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+
+from vetorizacao import Codificador, MODELO_PADRAO
+
+# --- FUNÇÃO DE EMBEDDING DO CHROMA COM CACHE EM DISCO ---
+# Mesmo modelo e mesmos vetores da SentenceTransformerEmbeddingFunction original (inclusive o
+# nome e a configuração gravados na coleção, então coleções já criadas continuam abrindo),
+# mas cada texto passa pelo cache compartilhado (cache_vetores.py) antes do modelo:
+# pergunta repetida ou fragmento inalterado não roda o transformer de novo.
+# O modelo só é carregado no primeiro texto que não estiver no cache.
+
+
+class EmbeddingComCache(SentenceTransformerEmbeddingFunction):
+    def __init__(self, pasta_cache, model_name=MODELO_PADRAO, device="cpu", normalize_embeddings=False, **kwargs):
+        # Não chama o __init__ da classe mãe: ele carregaria o modelo na hora
+        self.model_name = model_name
+        self.device = device
+        self.normalize_embeddings = normalize_embeddings
+        self.kwargs = kwargs
+        self.codificador = Codificador(model_name, dispositivo=device, normalizar=normalize_embeddings,
+                                       pasta_cache=pasta_cache)
+
+    def __call__(self, input):
+        vetores = self.codificador.codificar(list(input))
+        return [np.array(v, dtype=np.float32) for v in vetores]
+
+    def estatisticas(self):
+        return self.codificador.cache.estatisticas()
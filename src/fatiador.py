@@ -0,0 +1,212 @@
+import re
+import time
+import importlib.util
+
+# --- FATIADOR POR TOKENS COM JANELA DESLIZANTE ---
+# Substitui o split('\n\n') dos passos 05: fragmentos de tamanho uniforme (em tokens, não em
+# parágrafos), com sobreposição entre janelas vizinhas e sem atravessar seções.
+#   - seção = título ("1. EXIGÊNCIAS CLIMÁTICAS", linha em caixa alta) + texto até o próximo título
+#   - cada fragmento leva o título da seção (e o título do documento) na frente: o trecho
+#     "Temperaturas abaixo de 10°C..." continua sabendo que é da seção de clima da soja
+#   - o corte da janela recua até um fim de frase/linha próximo, para não partir frases ao meio
+# Tokens: por padrão os wordpieces do próprio modelo de embedding (TokenizadorHF), se o pacote
+# tokenizers e o vocabulário estiverem disponíveis; senão uma aproximação por expressão regular
+# (palavras e pontuação) com orçamento menor, para o fragmento não ser truncado no embedding.
+
+VERSAO_FATIADOR = "tokens-v2"
+MAX_WORDPIECES_MODELO = 256   # O MiniLM trunca a entrada aqui ([CLS] e [SEP] incluídos)
+MAX_TOKENS = 128              # Wordpieces por fragmento (TokenizadorHF), título incluído
+SOBREPOSICAO = 24             # Tokens repetidos entre uma janela e a seguinte
+# Um token da regex vira até ~3 wordpieces no vocabulário inglês do MiniLM (termos técnicos e
+# palavras acentuadas em português: "pachyrhizi" -> p ##ach ##yr ##hi ##zi; pontuação vira 1)
+FATOR_SEGURANCA_REGEX = 3
+MAX_TOKENS_REGEX = (MAX_WORDPIECES_MODELO - 2) // FATOR_SEGURANCA_REGEX   # 84: cabe no modelo mesmo no pior caso
+SOBREPOSICAO_REGEX = SOBREPOSICAO * MAX_TOKENS_REGEX // MAX_TOKENS
+MIN_CARACTERES = 20           # Fragmentos menores que isso são descartados
+FRACAO_RECUO = 0.3            # Até quanto da janela o corte pode recuar procurando fim de frase
+MAX_CARACTERES_TITULO = 100
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_NUMERACAO = re.compile(r"^\d+(?:\.\d+)*\.?\s+")
+_FIM_DE_FRASE = frozenset(".!?;:")
+
+
+def tokenizar_regex(texto):
+    """Posições (início, fim) de cada token: palavras e sinais de pontuação."""
+    return [m.span() for m in _TOKEN.finditer(texto)]
+
+
+class TokenizadorHF:
+    """Tokenizador do modelo (pacote tokenizers), carregado só no primeiro uso; pode ir para o pool de processos."""
+
+    def __init__(self, modelo="sentence-transformers/all-MiniLM-L6-v2"):
+        self.modelo = modelo
+        self._tokenizer = None
+
+    def __getstate__(self):
+        return {"modelo": self.modelo, "_tokenizer": None}
+
+    def __call__(self, texto):
+        if self._tokenizer is None:
+            from tokenizers import Tokenizer
+            self._tokenizer = Tokenizer.from_pretrained(self.modelo)
+            self._tokenizer.no_truncation()
+        return self._tokenizer.encode(texto, add_special_tokens=False).offsets
+
+    def __repr__(self):
+        return f"hf:{self.modelo}"
+
+
+_TOKENIZADOR_PADRAO = []
+
+
+def tokenizador_padrao():
+    """TokenizadorHF se o pacote tokenizers e o vocabulário do modelo carregarem; senão tokenizar_regex."""
+    if not _TOKENIZADOR_PADRAO:
+        tokenizador = tokenizar_regex
+        if importlib.util.find_spec("tokenizers") is not None:
+            try:
+                TokenizadorHF()("teste")
+                tokenizador = TokenizadorHF()
+            except Exception:
+                pass # Sem rede e sem cache do modelo: fica a regex
+        _TOKENIZADOR_PADRAO.append(tokenizador)
+    return _TOKENIZADOR_PADRAO[0]
+
+
+def eh_titulo(linha):
+    """
+    Título de seção: "1. EXIGÊNCIAS CLIMÁTICAS", "2.3 Controle de Pragas" (numerado e curto)
+    ou uma linha curta quase toda em maiúsculas ("PRINCIPAIS DOENÇAS").
+    """
+    linha = linha.strip()
+    if not linha or len(linha) > MAX_CARACTERES_TITULO or linha[-1] in ".,;":
+        return False
+    letras = [c for c in linha if c.isalpha()]
+    if len(letras) < 3:
+        return False
+    maiusculas = sum(c.isupper() for c in letras) / len(letras)
+    if _NUMERACAO.match(linha):
+        return maiusculas >= 0.5 or (len(linha) <= 60 and letras[0].isupper())
+    return maiusculas >= 0.8
+
+
+class Fatiador:
+    def __init__(self, max_tokens=None, sobreposicao=None, min_caracteres=MIN_CARACTERES, tokenizar=None):
+        """
+        tokenizar=None: tokenizador_padrao(), escolhido no primeiro uso. max_tokens/sobreposicao=None:
+        MAX_TOKENS/SOBREPOSICAO com o tokenizador do modelo, MAX_TOKENS_REGEX/SOBREPOSICAO_REGEX com a regex.
+        """
+        self.max_tokens = max_tokens
+        self.sobreposicao = sobreposicao
+        self.min_caracteres = min_caracteres
+        self.tokenizar = tokenizar
+        if tokenizar is not None:
+            self._resolver()
+
+    def _resolver(self):
+        if self.tokenizar is None:
+            self.tokenizar = tokenizador_padrao()
+        regex = self.tokenizar is tokenizar_regex
+        if self.max_tokens is None:
+            self.max_tokens = MAX_TOKENS_REGEX if regex else MAX_TOKENS
+        if self.sobreposicao is None:
+            self.sobreposicao = SOBREPOSICAO_REGEX if regex else SOBREPOSICAO
+        if not 0 <= self.sobreposicao < self.max_tokens:
+            raise ValueError("sobreposicao precisa ser menor que max_tokens")
+
+    def __getstate__(self):
+        # Vai para o pool de processos já resolvido: todos fatiam com o mesmo tokenizador
+        self._resolver()
+        return self.__dict__
+
+    def assinatura(self):
+        """Muda quando a configuração muda: o índice incremental usa isso para refatiar os documentos."""
+        self._resolver()
+        nome = getattr(self.tokenizar, "__name__", None) or repr(self.tokenizar)
+        return f"{VERSAO_FATIADOR}|{self.max_tokens}|{self.sobreposicao}|{self.min_caracteres}|{nome}"
+
+    # --- SEÇÕES ---
+    def secoes(self, texto):
+        """
+        Lista de (titulo, corpo). Um título sem corpo (ex: capítulo seguido de subseção) é somado ao
+        próximo; uma primeira linha curta antes do primeiro título ("CULTURA: SOJA (Glycine max)")
+        vira o título do documento e acompanha todas as seções.
+        """
+        blocos, titulo, corpo = [], "", []
+        for linha in texto.split("\n"):
+            if eh_titulo(linha):
+                if any(l.strip() for l in corpo):
+                    blocos.append((titulo, "\n".join(corpo).strip()))
+                    titulo = linha.strip()
+                else:
+                    titulo = f"{titulo}\n{linha.strip()}" if titulo else linha.strip()
+                corpo = []
+            else:
+                corpo.append(linha)
+        if any(l.strip() for l in corpo):
+            blocos.append((titulo, "\n".join(corpo).strip()))
+
+        if len(blocos) > 1 and not blocos[0][0]:
+            preambulo = blocos[0][1]
+            if "\n" not in preambulo and len(preambulo) <= MAX_CARACTERES_TITULO:
+                return [(f"{preambulo}\n{t}" if t else preambulo, c) for t, c in blocos[1:]]
+        return blocos
+
+    # --- JANELAS ---
+    def _corte(self, corpo, spans, inicio, fim):
+        """Recua o fim da janela até logo depois de um fim de frase ou de linha, se houver um perto."""
+        limite = inicio + max(1, int((fim - inicio) * (1 - FRACAO_RECUO)))
+        for j in range(fim, limite, -1):
+            anterior_fim = spans[j - 1][1]
+            if corpo[anterior_fim - 1] in _FIM_DE_FRASE or "\n" in corpo[anterior_fim:spans[j][0]]:
+                return j
+        return fim
+
+    def fatiar(self, texto):
+        """Texto -> lista de fragmentos (str) de até max_tokens tokens cada."""
+        self._resolver()
+        fragmentos = []
+        for titulo, corpo in self.secoes(texto):
+            prefixo = f"{titulo}\n" if titulo else ""
+            # O título entra no orçamento, mas sempre sobra pelo menos metade da janela para o corpo
+            orcamento = max(self.max_tokens - len(self.tokenizar(prefixo)), self.max_tokens // 2)
+            spans = self.tokenizar(corpo)
+            inicio = 0
+            while inicio < len(spans):
+                fim = min(inicio + orcamento, len(spans))
+                if fim < len(spans):
+                    fim = self._corte(corpo, spans, inicio, fim)
+                trecho = corpo[spans[inicio][0]:spans[fim - 1][1]]
+                if len(trecho) >= self.min_caracteres:
+                    fragmentos.append(prefixo + trecho)
+                if fim >= len(spans):
+                    break
+                # Próxima janela começa `sobreposicao` tokens antes do corte (e sempre anda)
+                inicio = max(fim - self.sobreposicao, inicio + 1)
+        return fragmentos
+
+
+FATIADOR_PADRAO = Fatiador()
+
+
+def benchmark_fatiador(paginas=5000, fatiador=FATIADOR_PADRAO, caminho_exemplo=None):
+    """Páginas/segundo fatiando páginas de ~3.000 caracteres (o tamanho típico de um manual da Embrapa)."""
+    if caminho_exemplo:
+        with open(caminho_exemplo, "r", encoding="utf-8") as f:
+            base = f.read()
+    else:
+        base = ("1. EXIGÊNCIAS CLIMÁTICAS\nA soja é sensível ao fotoperíodo. A temperatura ideal para crescimento é "
+                "entre 20°C e 30°C. Temperaturas abaixo de 10°C paralisam o crescimento.\n\n2. SOLOS E ADUBAÇÃO\n"
+                "Prefere solos profundos, drenados e com pH entre 5.5 e 6.5 (correção com calcário é essencial).\n")
+    pagina = (base * (3000 // len(base) + 1))[:3000]
+    inicio = time.perf_counter()
+    total = sum(len(fatiador.fatiar(pagina)) for _ in range(paginas))
+    segundos = time.perf_counter() - inicio
+    print(f"--- ⏱️ Fatiador ({fatiador.assinatura()}) ---")
+    print(f"{paginas:,} páginas em {segundos:.2f}s = {paginas / segundos:,.0f} páginas/s | {total:,} fragmentos")
+    return paginas / segundos
+
+
+if __name__ == "__main__":
+    benchmark_fatiador()
@@ -0,0 +1,185 @@
+import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# --- ARMAZÉM LOCAL DO HISTÓRICO CLIMÁTICO DIÁRIO ---
+# Uma pasta por local (lat/lon) com arquivos binários colunares, só de anexação:
+#   dias.i4   -> dia (int32, dias desde 1970-01-01)
+#   temp.f4   -> temperatura média diária (float32)
+#   chuva.f4  -> precipitação diária (float32)
+#   agregados.npy -> somas/contagens por decêndio (36 x 4), atualizadas a cada anexação
+#                    (impressão digital barata do histórico; a climatologia completa fica em climatologia.py)
+#   meta.json -> lat, lon e quantos dias estão "confirmados" nos arquivos
+# Os arquivos podem ser abertos com np.memmap (sem carregar tudo na memória).
+# Estender o histórico (novo ano, nova estação) baixa só os intervalos que faltam.
+
+NUM_DECENDIOS = 36
+COLUNAS = {"dias": np.int32, "temp": np.float32, "chuva": np.float32}
+# Colunas de agregados.npy
+SOMA_TEMP, N_TEMP, SOMA_CHUVA, N_CHUVA = range(4)
+
+
+def decendios_de_dias(dias):
+    """Decêndio (1-36) de cada dia, com aritmética de datas vetorizada (sem .apply)."""
+    datas = np.asarray(dias).astype("datetime64[D]")
+    meses = datas.astype("datetime64[M]")
+    mes = (meses - datas.astype("datetime64[Y]").astype("datetime64[M]")).astype(np.int64)  # 0-11
+    dia = (datas - meses.astype("datetime64[D]")).astype(np.int64)                          # 0-30
+    return (mes * 3 + np.minimum(dia // 10, 2) + 1).astype(np.int8)
+
+
+def _intervalos(dias_faltando):
+    """Agrupa dias faltantes (ordenados) em intervalos contínuos [(início, fim), ...]."""
+    if len(dias_faltando) == 0:
+        return []
+    quebras = np.flatnonzero(np.diff(dias_faltando) > 1)
+    inicios = np.r_[dias_faltando[0], dias_faltando[quebras + 1]]
+    fins = np.r_[dias_faltando[quebras], dias_faltando[-1]]
+    return list(zip(inicios, fins))
+
+
+class HistoricoClima:
+    def __init__(self, raiz, cliente):
+        """cliente: ClienteClima (src/clima.py), usado para baixar os intervalos faltantes."""
+        self.raiz = raiz
+        self.cliente = cliente
+        os.makedirs(raiz, exist_ok=True)
+
+    def _pasta(self, lat, lon):
+        return os.path.join(self.raiz, f"{float(lat):+09.4f}_{float(lon):+09.4f}")
+
+    def _arquivo(self, pasta, coluna):
+        return os.path.join(pasta, f"{coluna}.{'i4' if coluna == 'dias' else 'f4'}")
+
+    def _ler_meta(self, pasta):
+        caminho = os.path.join(pasta, "meta.json")
+        if not os.path.exists(caminho):
+            return {"n_dias": 0}
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _salvar_agregados(self, pasta, agg):
+        temporario = os.path.join(pasta, "agregados.tmp")
+        with open(temporario, "wb") as f:
+            np.save(f, agg)
+        os.replace(temporario, os.path.join(pasta, "agregados.npy"))
+
+    def _salvar_meta(self, pasta, meta):
+        temporario = os.path.join(pasta, "meta.tmp")
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(temporario, os.path.join(pasta, "meta.json"))
+
+    # --- LEITURA ---
+    def serie(self, lat, lon):
+        """Série diária {dias, temp, chuva} como memmaps somente leitura (arrays vazios se não houver)."""
+        pasta = self._pasta(lat, lon)
+        n = self._ler_meta(pasta)["n_dias"]
+        serie = {}
+        for coluna, tipo in COLUNAS.items():
+            caminho = self._arquivo(pasta, coluna)
+            if n == 0 or not os.path.exists(caminho):
+                serie[coluna] = np.empty(0, dtype=tipo)
+            else:
+                serie[coluna] = np.memmap(caminho, dtype=tipo, mode="r", shape=(n,))
+        return serie
+
+    def agregados(self, lat, lon):
+        caminho = os.path.join(self._pasta(lat, lon), "agregados.npy")
+        return np.load(caminho) if os.path.exists(caminho) else np.zeros((NUM_DECENDIOS, 4))
+
+    def versao(self, lat, lon):
+        """Impressão digital do histórico (muda sempre que novos dias entram)."""
+        return hashlib.sha256(self.agregados(lat, lon).tobytes()).hexdigest()[:16]
+
+    # --- ESCRITA ---
+    def _recuperar(self, pasta, meta):
+        """
+        Se uma anexação anterior foi interrompida, os arquivos podem ter mais dias
+        que o meta confirma: corta o excesso e recalcula os agregados.
+        """
+        n = meta["n_dias"]
+        inconsistente = False
+        for coluna, tipo in COLUNAS.items():
+            caminho = self._arquivo(pasta, coluna)
+            tamanho = os.path.getsize(caminho) if os.path.exists(caminho) else 0
+            if tamanho != n * np.dtype(tipo).itemsize:
+                inconsistente = True
+                with open(caminho, "ab") as f:
+                    f.truncate(n * np.dtype(tipo).itemsize)
+        if inconsistente and n > 0:
+            dias = np.fromfile(self._arquivo(pasta, "dias"), dtype=np.int32)
+            temp = np.fromfile(self._arquivo(pasta, "temp"), dtype=np.float32)
+            chuva = np.fromfile(self._arquivo(pasta, "chuva"), dtype=np.float32)
+            agg = self._somar_agregados(np.zeros((NUM_DECENDIOS, 4)), dias, temp, chuva)
+            self._salvar_agregados(pasta, agg)
+
+    def _somar_agregados(self, agg, dias, temp, chuva):
+        """Soma a contribuição dos novos dias às somas/contagens por decêndio (vetorizado)."""
+        idx = decendios_de_dias(dias).astype(np.int64) - 1
+        for valores, col_soma, col_n in ((temp, SOMA_TEMP, N_TEMP), (chuva, SOMA_CHUVA, N_CHUVA)):
+            valido = ~np.isnan(valores)
+            agg[:, col_soma] += np.bincount(idx[valido], weights=valores[valido], minlength=NUM_DECENDIOS)
+            agg[:, col_n] += np.bincount(idx[valido], minlength=NUM_DECENDIOS)
+        return agg
+
+    def faltantes(self, lat, lon, inicio, fim):
+        """Intervalos [(início, fim)] do período pedido que ainda não estão no armazém."""
+        pedidos = np.arange(np.datetime64(inicio, "D"), np.datetime64(fim, "D") + 1).astype(np.int32)
+        # Leitura comum (não memmap): os arquivos vão crescer logo em seguida
+        pasta = self._pasta(lat, lon)
+        n = self._ler_meta(pasta)["n_dias"]
+        presentes = np.fromfile(self._arquivo(pasta, "dias"), dtype=np.int32, count=n) if n else np.empty(0, np.int32)
+        faltando = pedidos[~np.isin(pedidos, presentes)] if len(presentes) else pedidos
+        return [(np.datetime64(int(a), "D"), np.datetime64(int(b), "D")) for a, b in _intervalos(faltando)]
+
+    def atualizar(self, lat, lon, inicio, fim):
+        """Baixa só os dias que faltam no período e anexa. Retorna quantos dias novos entraram."""
+        pasta = self._pasta(lat, lon)
+        os.makedirs(pasta, exist_ok=True)
+        meta = self._ler_meta(pasta)
+        self._recuperar(pasta, meta)
+
+        novos = 0
+        for ini, fi in self.faltantes(lat, lon, inicio, fim):
+            dados = self.cliente.buscar_diario(lat, lon, ini, fi)
+            dias = np.array(dados["time"], dtype="datetime64[D]").astype(np.int32)
+            temp = np.array(dados["temperature_2m_mean"], dtype=np.float64).astype(np.float32)
+            chuva = np.array(dados["precipitation_sum"], dtype=np.float64).astype(np.float32)
+
+            # Dias ainda sem dado na API (ex: muito recentes) não entram: serão pedidos de novo depois
+            validos = ~(np.isnan(temp) & np.isnan(chuva))
+            dias, temp, chuva = dias[validos], temp[validos], chuva[validos]
+            if len(dias) == 0:
+                continue
+
+            for coluna, valores in (("dias", dias), ("temp", temp), ("chuva", chuva)):
+                with open(self._arquivo(pasta, coluna), "ab") as f:
+                    valores.tofile(f)
+
+            agg = self._somar_agregados(self.agregados(lat, lon), dias, temp, chuva)
+            self._salvar_agregados(pasta, agg)
+
+            # O meta é gravado por último: só aqui os novos dias passam a "existir"
+            meta.update({"n_dias": meta["n_dias"] + len(dias), "lat": float(lat), "lon": float(lon)})
+            self._salvar_meta(pasta, meta)
+            novos += len(dias)
+        return novos
+
+    def atualizar_varios(self, locais, inicio, fim):
+        """
+        Atualiza vários locais em paralelo. locais: {nome: (lat, lon)}.
+        Retorna {nome: dias_novos} e {nome: exceção} para os que falharam.
+        """
+        novos, erros = {}, {}
+        with ThreadPoolExecutor(max_workers=self.cliente.max_requisicoes) as executor:
+            futuros = {executor.submit(self.atualizar, lat, lon, inicio, fim): nome for nome, (lat, lon) in locais.items()}
+            for futuro, nome in futuros.items():
+                try:
+                    novos[nome] = futuro.result()
+                except Exception as e:
+                    erros[nome] = e
+        return novos, erros
@@ -0,0 +1,99 @@
+import os
+import json
+import hashlib
+
+from manifesto import Manifesto, hash_arquivo
+from armazem_vetores import salvar_colecao, paginas
+from fatiador import FATIADOR_PADRAO
+from ingestao_documentos import gerar_fragmentos, listar_documentos, em_lotes, TAMANHO_LOTE_PADRAO
+
+# --- SINCRONIZAÇÃO INCREMENTAL DA PASTA DE CONHECIMENTO COM O BANCO VETORIAL ---
+# (qualquer backend de armazem_vetores.py: coleção do Chroma, ColecaoMilvus ou ColecaoNumpy)
+# - O id de cada fragmento é o hash do seu conteúdo (texto + metadados): o mesmo fragmento
+#   tem sempre o mesmo id, então rodar de novo não duplica nada
+# - Só fragmentos com id ainda ausente na coleção são vetorizados (upsert)
+# - Ids que estão na coleção mas não saíram de nenhum documento (trechos editados,
+#   manuais apagados) são removidos
+# - Documentos cujo arquivo não mudou (sha256 no manifesto) nem são relidos; a assinatura do
+#   fatiador entra junto no manifesto, então mudar o fatiamento refatia todos os documentos
+# - Documento sem nenhum fragmento (ex: PDF sem pypdf) não entra no manifesto e é relido depois
+
+ETAPA_INDICE = "05_populate_chroma"
+
+
+def id_fragmento(fragmento):
+    conteudo = json.dumps({k: v for k, v in fragmento.items() if k != "id"}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()[:32]
+
+
+def ids_existentes(collection, tamanho_pagina=5000):
+    """Todos os ids da coleção, lidos em páginas (sem trazer textos nem vetores)."""
+    ids = set()
+    for pagina in paginas(collection, include=[], tamanho_pagina=tamanho_pagina):
+        ids.update(pagina["ids"])
+    return ids
+
+
+def sincronizar_colecao(collection, pasta, caminho_manifesto, max_processos=None,
+                        tamanho_lote=TAMANHO_LOTE_PADRAO, forcar=False, etapa=ETAPA_INDICE, fatiador=FATIADOR_PADRAO):
+    """
+    Deixa a coleção igual ao conteúdo atual da pasta, mexendo só no que mudou.
+    Retorna {"novos", "mantidos", "removidos", "documentos_relidos"}.
+    """
+    manifesto = Manifesto(caminho_manifesto)
+    secao = manifesto.etapa(etapa)
+    existentes = ids_existentes(collection)
+
+    # 1. Documentos intactos: mesmo sha256 e todos os seus fragmentos ainda na coleção
+    arquivos = listar_documentos(pasta)
+    hashes = {a: f"{hash_arquivo(os.path.join(pasta, a))}|{fatiador.assinatura()}" for a in arquivos}
+    intactos = [
+        a for a in arquivos
+        if not forcar and secao["entradas"].get(a) == hashes[a] and existentes.issuperset(secao["saidas"].get(a, []))
+    ]
+    vistos = {fid for a in intactos for fid in secao["saidas"][a]}
+    relidos = sorted(set(arquivos) - set(intactos))
+
+    # 2. Relê só os documentos alterados/novos e vetoriza só os fragmentos que a coleção não tem
+    ids_por_documento = {a: [] for a in relidos}
+    novos = 0
+    for lote in em_lotes(gerar_fragmentos(pasta, max_processos, arquivos=relidos, fatiador=fatiador), tamanho_lote):
+        pendentes = []
+        for fragmento in lote:
+            fid = id_fragmento(fragmento)
+            if fid in vistos:
+                continue # Mesmo texto duas vezes na mesma página/arquivo (o id inclui fonte e página: páginas diferentes não colidem)
+            vistos.add(fid)
+            ids_por_documento[fragmento["fonte"]].append(fid)
+            if fid not in existentes:
+                pendentes.append((fid, fragmento))
+        if pendentes:
+            collection.upsert(
+                ids=[fid for fid, _ in pendentes],
+                documents=[f["texto"] for _, f in pendentes],
+                metadatas=[{k: v for k, v in f.items() if k not in ("id", "texto")} for _, f in pendentes]
+            )
+            novos += len(pendentes)
+
+    # 3. Órfãos: estavam na coleção e não vieram de nenhum documento atual
+    orfaos = sorted(existentes - vistos)
+    for lote in em_lotes(orfaos, tamanho_lote):
+        collection.delete(ids=lote)
+
+    # 4. Manifesto: estado de cada documento para a próxima rodada. Documento que não rendeu
+    # nenhum fragmento (pypdf ausente, PDF ilegível) não é registrado: é relido na próxima vez
+    for arquivo in relidos:
+        if ids_por_documento[arquivo]:
+            secao["entradas"][arquivo] = hashes[arquivo]
+            secao["saidas"][arquivo] = ids_por_documento[arquivo]
+        else:
+            print(f"⚠️ {arquivo}: nenhum fragmento extraído (será relido na próxima sincronização)")
+            secao["entradas"].pop(arquivo, None)
+            secao["saidas"].pop(arquivo, None)
+    for arquivo in set(secao["entradas"]) - set(arquivos):
+        secao["entradas"].pop(arquivo, None)
+        secao["saidas"].pop(arquivo, None)
+    salvar_colecao(collection)
+    manifesto.salvar()
+
+    return {"novos": novos, "mantidos": len(vistos) - novos, "removidos": len(orfaos), "documentos_relidos": len(relidos)}
@@ -0,0 +1,163 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# --- ÍNDICE PRÉ-CALCULADO DAS MELHORES JANELAS DE PLANTIO ---
+# Os agentes respondiam cada pergunta lendo a partição (município, cultura) do dataset gold e
+# ordenando por risco. A resposta só muda quando o pipeline roda, então o passo 03 grava junto
+# um artefato pequeno (processed/indice_janelas.parquet) com, para cada (município, cultura, decêndio),
+# a linha de menor risco (entre os solos). Na carga ele vira arrays numpy, montados sem laço por
+# linha (códigos de categoria + lexsort), e cada (município, cultura) vira um número de par:
+#   melhor(municipio, cultura)             -> janela de menor risco do ano inteiro
+#   janela(municipio, cultura, decendio)   -> melhor linha daquele decêndio
+#   riscos(municipio, cultura)             -> vetor de 36 riscos (NaN = decêndio sem janela)
+# Consulta = dois acessos a dicionário pequeno (códigos) + indexação de array (microssegundos);
+# a linha devolvida é um dict montado na hora a partir das colunas.
+# Empate de risco: vence o decêndio mais cedo (a ordenação antiga escolhia qualquer um).
+
+NUM_DECENDIOS = 36
+COLUNAS_INDICE = ['municipio', 'cultura', 'decendio', 'risco_numerico', 'periodo_legivel', 'solo', 'solo_desc',
+                  'custo_ha_est', 'chuva_acumulada_decendio', 'temp']
+
+
+def gerar_indice_janelas(df):
+    """Melhor linha (menor risco) de cada (município, cultura, decêndio)."""
+    colunas = [c for c in COLUNAS_INDICE if c in df.columns]
+    df = df[colunas].dropna(subset=['risco_numerico'])
+    df = df.sort_values(['municipio', 'cultura', 'decendio', 'risco_numerico'], kind='stable')
+    melhores = df.drop_duplicates(['municipio', 'cultura', 'decendio'], keep='first')
+    for coluna in melhores.select_dtypes('category').columns:
+        melhores[coluna] = melhores[coluna].astype(str)
+    return melhores.reset_index(drop=True)
+
+
+def atualizar_indice_janelas(caminho, df_alterado=None, pares_removidos=(), raiz_gold=None):
+    """
+    Atualização incremental do artefato: troca só os (município, cultura) reprocessados
+    e apaga os removidos. Se o artefato ainda não existe, gera do dataset gold inteiro.
+    """
+    if not os.path.exists(caminho):
+        from particoes import ler_particionado
+        df_alterado = ler_particionado(raiz_gold) if raiz_gold else df_alterado
+        if df_alterado is None:
+            return None
+        indice = gerar_indice_janelas(df_alterado)
+    else:
+        indice = pd.read_parquet(caminho)
+        novos = gerar_indice_janelas(df_alterado) if df_alterado is not None else indice.iloc[0:0]
+        trocar = set(zip(novos['municipio'], novos['cultura'])) | set(pares_removidos)
+        manter = [par not in trocar for par in zip(indice['municipio'], indice['cultura'])]
+        indice = pd.concat([indice[manter], novos], ignore_index=True)
+    indice = indice.sort_values(['municipio', 'cultura', 'decendio'], kind='stable').reset_index(drop=True)
+    temporario = caminho + ".tmp"
+    indice.to_parquet(temporario, index=False)
+    os.replace(temporario, caminho)
+    return indice
+
+
+class IndiceJanelas:
+    def __init__(self, df_indice):
+        df = df_indice.dropna(subset=['risco_numerico'])
+        decendios = df['decendio'].to_numpy(dtype=np.int64)
+        df = df[(decendios >= 1) & (decendios <= NUM_DECENDIOS)].reset_index(drop=True)
+        decendios = df['decendio'].to_numpy(dtype=np.int64)
+        riscos = df['risco_numerico'].to_numpy(dtype=np.float64)
+
+        # Chave categórica: código do município x código da cultura -> número do par (0..P-1)
+        municipios = pd.Categorical(df['municipio'].astype(str))
+        culturas = pd.Categorical(df['cultura'].astype(str))
+        self._cod_municipio = {nome: i for i, nome in enumerate(municipios.categories)}
+        self._cod_cultura = {nome: i for i, nome in enumerate(culturas.categories)}
+        self._n_culturas = len(culturas.categories)
+        chaves, pares = np.unique(municipios.codes.astype(np.int64) * self._n_culturas + culturas.codes,
+                                  return_inverse=True)
+        self._par = dict(zip(chaves.tolist(), range(len(chaves))))
+
+        # Linha de cada (par, decêndio) e a matriz de riscos
+        self._linhas = np.full((len(chaves), NUM_DECENDIOS), -1, dtype=np.int32)
+        self._linhas[pares, decendios - 1] = np.arange(len(df), dtype=np.int32)
+        self._riscos = np.full((len(chaves), NUM_DECENDIOS), np.nan)
+        self._riscos[pares, decendios - 1] = riscos
+
+        # Melhor linha de cada par: ordena por (par, risco, decêndio) e pega a primeira de cada par
+        ordem = np.lexsort((decendios, riscos, pares))
+        inicios = np.flatnonzero(np.r_[True, pares[ordem][1:] != pares[ordem][:-1]]) if len(ordem) else ordem
+        self._melhor = ordem[inicios].astype(np.int32)
+
+        self._colunas = {coluna: df[coluna].to_numpy() for coluna in df.columns}
+        self._n = len(df)
+
+    def _numero_par(self, municipio, cultura):
+        cod_municipio = self._cod_municipio.get(municipio)
+        cod_cultura = self._cod_cultura.get(cultura)
+        if cod_municipio is None or cod_cultura is None:
+            return None
+        return self._par.get(cod_municipio * self._n_culturas + cod_cultura)
+
+    def _registro(self, linha):
+        return {coluna: valores[linha] for coluna, valores in self._colunas.items()}
+
+    @classmethod
+    def carregar(cls, caminho, raiz_gold, arquivo_legado=None):
+        """Lê o artefato do passo 03; se ele ainda não existir, monta a partir do dataset gold (None = sem dados)."""
+        if os.path.exists(caminho):
+            return cls(pd.read_parquet(caminho))
+        from particoes import ler_particionado
+        df = ler_particionado(raiz_gold, arquivo_legado)
+        if df is None or df.empty:
+            return None
+        return cls(gerar_indice_janelas(df))
+
+    def melhor(self, municipio, cultura):
+        par = self._numero_par(municipio, cultura)
+        return None if par is None else self._registro(self._melhor[par])
+
+    def janela(self, municipio, cultura, decendio):
+        par = self._numero_par(municipio, cultura)
+        decendio = int(decendio)
+        if par is None or not 1 <= decendio <= NUM_DECENDIOS or self._linhas[par, decendio - 1] < 0:
+            return None
+        return self._registro(self._linhas[par, decendio - 1])
+
+    def riscos(self, municipio, cultura):
+        par = self._numero_par(municipio, cultura)
+        return None if par is None else self._riscos[par]
+
+    def __len__(self):
+        return self._n
+
+
+def benchmark_indice_janelas(n_municipios=2000, culturas=10, solos=3, repeticoes=100_000, seed=42):
+    """Tempo de consulta do índice x ordenação por pergunta, num dataset sintético grande."""
+    rng = np.random.default_rng(seed)
+    municipios = np.repeat([f"Município {i}" for i in range(n_municipios)], culturas * solos * NUM_DECENDIOS)
+    df = pd.DataFrame({
+        'municipio': municipios,
+        'cultura': np.tile(np.repeat([f"Cultura {c}" for c in range(culturas)], solos * NUM_DECENDIOS), n_municipios),
+        'solo': np.tile(np.repeat(["AD1", "AD2", "AD3"][:solos], NUM_DECENDIOS), n_municipios * culturas),
+        'decendio': np.tile(np.arange(1, NUM_DECENDIOS + 1), n_municipios * culturas * solos),
+        'risco_numerico': rng.choice([20, 30, 40, 50], len(municipios)),
+    })
+    print(f"--- ⏱️ Benchmark índice de janelas: {len(df):,} linhas ---")
+
+    inicio = time.perf_counter()
+    indice = IndiceJanelas(gerar_indice_janelas(df))
+    print(f"Construção: {time.perf_counter() - inicio:.2f}s ({len(indice):,} janelas)")
+
+    chaves = [(f"Município {i}", f"Cultura {i % culturas}") for i in rng.integers(0, n_municipios, repeticoes)]
+    inicio = time.perf_counter()
+    for municipio, cultura in chaves:
+        indice.melhor(municipio, cultura)
+    por_consulta = (time.perf_counter() - inicio) / repeticoes
+    print(f"Índice: {por_consulta * 1e6:.2f} µs por consulta")
+
+    inicio = time.perf_counter()
+    for municipio, cultura in chaves[:20]:
+        df[(df['municipio'] == municipio) & (df['cultura'] == cultura)].sort_values('risco_numerico').iloc[0]
+    antigo = (time.perf_counter() - inicio) / 20
+    print(f"Máscara + sort_values: {antigo * 1e3:.1f} ms por consulta ({antigo / por_consulta:,.0f}x mais lento)")
+
+
+if __name__ == "__main__":
+    benchmark_indice_janelas()
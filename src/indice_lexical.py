@@ -0,0 +1,236 @@
+import os
+import re
+import json
+import math
+import unicodedata
+from collections import Counter
+import numpy as np
+
+from armazem_vetores import condicoes_filtro, paginas
+
+# --- ÍNDICE INVERTIDO BM25 + BUSCA HÍBRIDA (LEXICAL + VETORIAL) ---
+# O MiniLM é treinado em inglês e erra termos técnicos em português ("Phakopsora pachyrhizi",
+# "cigarrinha", "Mal-do-Panamá"). O BM25 acha esses termos pela grafia exata.
+#   - índice compacto: listas de postagens em arrays (formato CSR) com o peso BM25 de cada
+#     (termo, trecho) já calculado; consultar = somar pesos (np.bincount), sem laço por trecho
+#   - gerado a partir da própria coleção, logo depois da sincronização (05_populate_chroma)
+#   - BuscaHibrida.query tem a mesma assinatura do collection.query do Chroma:
+#       * resultado lexical decisivo (termos raros da pergunta todos num trecho, bem à frente
+#         do segundo colocado) -> responde direto do índice, sem rodar o modelo de embedding
+#       * senão -> junta o ranking lexical e o vetorial por Reciprocal Rank Fusion (RRF)
+
+K1 = 1.5
+B = 0.75
+CANDIDATOS = 20               # Trechos de cada ranking que entram na fusão
+RRF_K = 60                    # Constante do Reciprocal Rank Fusion
+COBERTURA_DECISIVA = 0.8      # Fração do peso (idf) dos termos da pergunta presente no 1º trecho
+RAZAO_DECISIVA = 1.5          # 1º colocado lexical precisa ter 1,5x a nota do 2º
+
+STOPWORDS = frozenset("""
+a ao aos as com como da das de do dos e em entre eu na nas no nos o os ou para pela pelas pelo pelos
+por qual quais quando que se sem sobre um uma umas uns meu minha devo posso pode fazer ter tem sao
+ser esta este isso mais muito the
+""".split())
+
+_TERMO = re.compile(r"\w+")
+
+
+def termos(texto):
+    """Minúsculas, sem acento, sem stopwords: "Mal-do-Panamá" -> ["mal", "panama"]."""
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return [t for t in _TERMO.findall(texto) if t not in STOPWORDS and (len(t) > 1 or t.isdigit())]
+
+
+def caminho_indice(pasta_dados, backend):
+    return os.path.join(pasta_dados, "processed", f"indice_bm25_{backend}")
+
+
+class IndiceBM25:
+    def __init__(self, ids, textos, metadados, k1=K1, b=B):
+        self.ids, self.textos, self.metadados = list(ids), list(textos), list(metadados)
+        self.n = len(self.ids)
+        self.vocabulario = {}
+        termo_ids, doc_ids, tfs = [], [], []
+        comprimentos = np.zeros(self.n, dtype=np.float32)
+        for doc, texto in enumerate(self.textos):
+            contagem = Counter(termos(texto))
+            comprimentos[doc] = sum(contagem.values())
+            for termo, tf in contagem.items():
+                termo_ids.append(self.vocabulario.setdefault(termo, len(self.vocabulario)))
+                doc_ids.append(doc)
+                tfs.append(tf)
+
+        termo_ids = np.array(termo_ids, dtype=np.int64)
+        ordem = np.argsort(termo_ids, kind="stable")
+        self.docs = np.array(doc_ids, dtype=np.int32)[ordem]
+        tfs = np.array(tfs, dtype=np.float32)[ordem]
+        df = np.bincount(termo_ids, minlength=len(self.vocabulario))
+        self.inicio = np.concatenate([[0], np.cumsum(df)]).astype(np.int64)
+        self.idf = np.log1p((self.n - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        # Peso BM25 de cada postagem, já com idf e normalização pelo tamanho do trecho
+        media = comprimentos.mean() if self.n else 1.0
+        normalizacao = k1 * (1 - b + b * comprimentos[self.docs] / media)
+        self.pesos = (np.repeat(self.idf, df) * tfs * (k1 + 1) / (tfs + normalizacao)).astype(np.float32)
+        self._filtros = {}
+
+    # --- PERSISTÊNCIA ---
+    @classmethod
+    def da_colecao(cls, colecao, tamanho_pagina=5000):
+        """Lê todos os trechos da coleção (em páginas) e monta o índice."""
+        ids, textos, metadados = [], [], []
+        for pagina in paginas(colecao, include=["documents", "metadatas"], tamanho_pagina=tamanho_pagina):
+            ids += pagina["ids"]
+            textos += [t or "" for t in pagina["documents"]]
+            metadados += [m or {} for m in pagina["metadatas"]]
+        return cls(ids, textos, metadados)
+
+    def salvar(self, pasta):
+        os.makedirs(pasta, exist_ok=True)
+        temporario = os.path.join(pasta, "postagens.tmp.npz")
+        np.savez(temporario, inicio=self.inicio, docs=self.docs, pesos=self.pesos, idf=self.idf)
+        os.replace(temporario, os.path.join(pasta, "postagens.npz"))
+        temporario = os.path.join(pasta, "trechos.tmp")
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"vocabulario": sorted(self.vocabulario, key=self.vocabulario.get), "ids": self.ids,
+                       "textos": self.textos, "metadados": self.metadados}, f, ensure_ascii=False)
+        os.replace(temporario, os.path.join(pasta, "trechos.json"))
+
+    @classmethod
+    def carregar(cls, pasta):
+        indice = cls.__new__(cls)
+        with open(os.path.join(pasta, "trechos.json"), "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        indice.vocabulario = {t: i for i, t in enumerate(dados["vocabulario"])}
+        indice.ids, indice.textos, indice.metadados = dados["ids"], dados["textos"], dados["metadados"]
+        indice.n = len(indice.ids)
+        with np.load(os.path.join(pasta, "postagens.npz")) as arrays:
+            indice.inicio, indice.docs, indice.pesos, indice.idf = (arrays[k] for k in ("inicio", "docs", "pesos", "idf"))
+        indice._filtros = {}
+        return indice
+
+    # --- CONSULTA ---
+    def _mascara(self, where):
+        mascara = np.ones(self.n, dtype=bool)
+        for campo, valor in condicoes_filtro(where):
+            chave = (campo, valor)
+            if chave not in self._filtros:
+                self._filtros[chave] = np.array([m.get(campo) == valor for m in self.metadados], dtype=bool)
+            mascara &= self._filtros[chave]
+        return mascara
+
+    def buscar(self, pergunta, k=CANDIDATOS, where=None):
+        """
+        (posicoes, notas, cobertura) dos k melhores trechos. cobertura = fração do idf dos termos
+        da pergunta que aparece em cada trecho (termo que o índice não conhece conta como ausente).
+        """
+        ids_termos, idf_total = [], 0.0
+        for termo in set(termos(pergunta)):
+            indice_termo = self.vocabulario.get(termo)
+            if indice_termo is None:
+                idf_total += math.log1p((self.n + 0.5) / 0.5)
+            else:
+                ids_termos.append(indice_termo)
+                idf_total += float(self.idf[indice_termo])
+        vazio = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32))
+        if not ids_termos:
+            return vazio
+
+        fatias = [slice(self.inicio[t], self.inicio[t + 1]) for t in ids_termos]
+        docs = np.concatenate([self.docs[f] for f in fatias])
+        notas = np.bincount(docs, weights=np.concatenate([self.pesos[f] for f in fatias]), minlength=self.n)
+        massa = np.bincount(docs, weights=np.repeat(self.idf[ids_termos], [f.stop - f.start for f in fatias]),
+                            minlength=self.n)
+        notas[~self._mascara(where)] = 0.0
+
+        candidatos = np.flatnonzero(notas > 0)
+        if len(candidatos) == 0:
+            return vazio
+        melhores = candidatos[np.argsort(-notas[candidatos], kind="stable")[:k]]
+        return melhores, notas[melhores].astype(np.float32), (massa[melhores] / idf_total).astype(np.float32)
+
+
+class BuscaHibrida:
+    """Coleção vetorial + índice BM25 com a interface de consulta do Chroma (query_texts, n_results, where)."""
+    consulta_por_texto = True  # Aceita query_texts junto com query_embeddings (o Chroma recusa os dois)
+
+    def __init__(self, colecao, indice, candidatos=CANDIDATOS):
+        self.colecao = colecao
+        self.indice = indice
+        self.candidatos = candidatos
+        self.diretas = 0   # Respondidas só pelo índice lexical (sem embedding)
+        self.hibridas = 0
+
+    def _decisivo(self, notas, cobertura):
+        if len(notas) == 0 or cobertura[0] < COBERTURA_DECISIVA:
+            return False
+        return len(notas) == 1 or notas[0] >= RAZAO_DECISIVA * notas[1]
+
+    def _diretos(self, posicoes, n_results):
+        escolhidas = posicoes[:n_results]
+        return ([self.indice.ids[i] for i in escolhidas], [self.indice.textos[i] for i in escolhidas],
+                [self.indice.metadados[i] for i in escolhidas])
+
+    def resposta_lexical(self, pergunta, n_results=10, where=None):
+        """(ids, textos, metadados) direto do BM25 se ele for decisivo; None se precisar da busca vetorial."""
+        posicoes, notas, cobertura = self.indice.buscar(pergunta, max(self.candidatos, n_results), where)
+        if not self._decisivo(notas, cobertura):
+            return None
+        self.diretas += 1
+        return self._diretos(posicoes, n_results)
+
+    def _fundir(self, posicoes, ids_densos, textos_densos, metadados_densos, n_results):
+        fusao, trechos = Counter(), {}
+        for posicao, i in enumerate(posicoes):
+            fusao[self.indice.ids[i]] += 1.0 / (RRF_K + posicao + 1)
+            trechos[self.indice.ids[i]] = (self.indice.textos[i], self.indice.metadados[i])
+        for posicao, (fid, texto, metadado) in enumerate(zip(ids_densos, textos_densos, metadados_densos)):
+            fusao[fid] += 1.0 / (RRF_K + posicao + 1)
+            trechos.setdefault(fid, (texto, metadado))
+        escolhidos = [fid for fid, _ in fusao.most_common(n_results)]
+        return escolhidos, [trechos[f][0] for f in escolhidos], [trechos[f][1] for f in escolhidos]
+
+    def query(self, query_texts=None, n_results=10, where=None, query_embeddings=None, embedding_function=None, **_):
+        """
+        Várias perguntas de uma vez: as que o BM25 não decide vão juntas numa única consulta
+        vetorial (um lote de embeddings só). query_embeddings (opcional): vetores já calculados,
+        alinhados com query_texts; sem eles, embedding_function (ou o da coleção) vetoriza só as pendentes.
+        """
+        if query_texts is None:  # Só vetores: não há texto para o BM25
+            return self.colecao.query(query_embeddings=query_embeddings, n_results=n_results, where=where)
+        k = max(self.candidatos, n_results)
+        lexicos = [self.indice.buscar(pergunta, k, where) for pergunta in query_texts]
+        pendentes = [i for i, (_, notas, cobertura) in enumerate(lexicos) if not self._decisivo(notas, cobertura)]
+        self.diretas += len(lexicos) - len(pendentes)
+        self.hibridas += len(pendentes)
+
+        densos = {}
+        if pendentes:
+            if query_embeddings is not None:
+                entrada = {"query_embeddings": [query_embeddings[i] for i in pendentes]}
+            elif embedding_function is not None:
+                entrada = {"query_embeddings": embedding_function([query_texts[i] for i in pendentes])}
+            else:
+                entrada = {"query_texts": [query_texts[i] for i in pendentes]}
+            resposta = self.colecao.query(n_results=k, where=where, **entrada)
+            for j, i in enumerate(pendentes):
+                densos[i] = (resposta["ids"][j], resposta["documents"][j], resposta["metadatas"][j])
+
+        resultado = {"ids": [], "documents": [], "metadatas": []}
+        for i, (posicoes, _, _) in enumerate(lexicos):
+            if i in densos:
+                ids, textos, metadados = self._fundir(posicoes, *densos[i], n_results)
+            else:
+                ids, textos, metadados = self._diretos(posicoes, n_results)
+            resultado["ids"].append(ids)
+            resultado["documents"].append(textos)
+            resultado["metadatas"].append(metadados)
+        return resultado
+
+
+def abrir_busca(colecao, pasta_indice):
+    """BuscaHibrida se o índice BM25 já foi gerado; senão a própria coleção (só vetorial)."""
+    if pasta_indice and os.path.exists(os.path.join(pasta_indice, "trechos.json")):
+        return BuscaHibrida(colecao, IndiceBM25.carregar(pasta_indice))
+    return colecao
@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import tempfile
+import numpy as np
+
+from armazem_vetores import condicoes_filtro, corpus_sintetico, consultas_sinteticas, normalizar_linhas, paginas
+
+# --- ÍNDICE DE VETORES QUANTIZADO EM DISCO (INT8 / FLOAT16, NP.MEMMAP) ---
+# Para containers com pouca RAM: em vez do HNSW do Chroma + vetores float32 na memória,
+#   codigos.bin -> vetores normalizados em int8 (1 byte/dimensão, com uma escala por vetor)
+#                  ou float16 (2 bytes/dimensão), lidos por np.memmap
+#   escalas.npy -> escala de cada vetor (int8: vetor ≈ codigo * escala)
+#   vetores.f32 -> (opcional) float32 originais, só para reordenar os melhores candidatos
+#   itens.json  -> ids, textos e metadados (lidos na primeira consulta)
+# Abrir o índice só lê meta.json e mapeia os arquivos: milissegundos e quase nada residente.
+# A busca varre os códigos em blocos (produto escalar vetorizado) e, com vetores.f32,
+# recalcula em float32 a nota dos FATOR_REORDENACAO x k melhores (recall ~ busca exata).
+# Mesma interface de consulta das coleções de armazem_vetores.py (query/get/count), só leitura.
+
+TIPOS = ("int8", "float16")
+BLOCO_BUSCA = 4096            # Vetores por bloco na varredura (bloco convertido cabe no cache da CPU)
+FATOR_REORDENACAO = 4         # Candidatos reordenados em float32 = 4 x n_results
+MIN_CANDIDATOS = 32
+
+
+class IndiceSomenteLeitura(Exception):
+    """Escrita (upsert/add/delete) num índice quantizado: ele só é gerado por exportação."""
+
+
+def quantizar(vetores, tipo="int8"):
+    """Vetores normalizados -> (codigos, escalas). int8: escala simétrica por vetor (max |v| -> 127)."""
+    vetores = normalizar_linhas(vetores)
+    if tipo == "float16":
+        return vetores.astype(np.float16), np.ones(len(vetores), dtype=np.float32)
+    if tipo != "int8":
+        raise ValueError(f"Tipo de quantização desconhecido: {tipo} (opções: {', '.join(TIPOS)})")
+    escalas = np.abs(vetores).max(axis=1) / 127.0
+    escalas[escalas == 0] = 1.0
+    codigos = np.clip(np.rint(vetores / escalas[:, None]), -127, 127).astype(np.int8)
+    return codigos, escalas.astype(np.float32)
+
+
+def construir_indice(pasta, ids, vetores, textos, metadados, tipo="int8", guardar_float32=True):
+    """Grava um índice quantizado (substitui o anterior; meta.json por último = índice completo)."""
+    os.makedirs(pasta, exist_ok=True)
+    vetores = normalizar_linhas(vetores) if len(vetores) else np.empty((0, 0), dtype=np.float32)
+    codigos, escalas = quantizar(vetores, tipo) if len(vetores) else (np.empty((0, 0), dtype=tipo), np.empty(0, dtype=np.float32))
+    if os.path.exists(os.path.join(pasta, "meta.json")):
+        os.remove(os.path.join(pasta, "meta.json"))
+
+    codigos.tofile(os.path.join(pasta, "codigos.bin"))
+    np.save(os.path.join(pasta, "escalas.npy"), escalas)
+    caminho_float32 = os.path.join(pasta, "vetores.f32")
+    if guardar_float32:
+        vetores.astype(np.float32).tofile(caminho_float32)
+    elif os.path.exists(caminho_float32):
+        os.remove(caminho_float32)
+    with open(os.path.join(pasta, "itens.json"), "w", encoding="utf-8") as f:
+        json.dump({"ids": list(ids), "documentos": list(textos), "metadados": list(metadados)}, f, ensure_ascii=False)
+
+    temporario = os.path.join(pasta, "meta.tmp")
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump({"tipo": tipo, "n": len(vetores), "dimensao": int(vetores.shape[1]) if len(vetores) else 0,
+                   "float32": guardar_float32}, f)
+    os.replace(temporario, os.path.join(pasta, "meta.json"))
+
+
+def exportar_colecao(colecao, pasta, tipo="int8", guardar_float32=True, tamanho_pagina=5000):
+    """Copia os vetores de qualquer coleção (Chroma, Milvus, NumPy) para um índice quantizado."""
+    ids, vetores, textos, metadados = [], [], [], []
+    for pagina in paginas(colecao, include=["embeddings", "documents", "metadatas"], tamanho_pagina=tamanho_pagina):
+        ids += pagina["ids"]
+        vetores.append(np.asarray(pagina["embeddings"], dtype=np.float32))
+        textos += pagina["documents"]
+        metadados += [m or {} for m in pagina["metadatas"]]
+    construir_indice(pasta, ids, np.concatenate(vetores) if vetores else [], textos, metadados, tipo, guardar_float32)
+    return len(ids)
+
+
+class IndiceQuantizado:
+    def __init__(self, pasta, embedding_function=None, reordenar=True):
+        self.pasta = pasta
+        self.embedding_function = embedding_function
+        with open(os.path.join(pasta, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.tipo, self.n, self.dimensao = meta["tipo"], meta["n"], meta["dimensao"]
+        self.reordenar = reordenar and meta["float32"]
+        self.codigos = self._mapear("codigos.bin", self.tipo)
+        self.escalas = np.load(os.path.join(pasta, "escalas.npy"), mmap_mode="r")
+        self.vetores = self._mapear("vetores.f32", np.float32) if meta["float32"] else None
+        self._itens = None
+        self._filtros = {}
+
+    def _mapear(self, nome, dtype):
+        if not self.n:
+            return np.empty((0, self.dimensao), dtype=dtype)
+        return np.memmap(os.path.join(self.pasta, nome), dtype=dtype, mode="r", shape=(self.n, self.dimensao))
+
+    @property
+    def itens(self):
+        if self._itens is None:
+            with open(os.path.join(self.pasta, "itens.json"), "r", encoding="utf-8") as f:
+                self._itens = json.load(f)
+        return self._itens
+
+    def count(self):
+        return self.n
+
+    def upsert(self, *args, **kwargs):
+        raise IndiceSomenteLeitura("Índice quantizado é só leitura: sincronize outro backend e exporte (--quantizar)")
+
+    add = delete = upsert
+
+    # --- BUSCA ---
+    def _linhas(self, where):
+        condicoes = condicoes_filtro(where)
+        if not condicoes:
+            return None
+        mascara = np.ones(self.n, dtype=bool)
+        for chave in condicoes:
+            if chave not in self._filtros:
+                campo, valor = chave
+                self._filtros[chave] = np.array([m.get(campo) == valor for m in self.itens["metadados"]], dtype=bool)
+            mascara &= self._filtros[chave]
+        return np.flatnonzero(mascara)
+
+    def _notas_aproximadas(self, consultas, linhas):
+        """Produto escalar dos códigos com as perguntas, em blocos (sem descompactar o índice todo)."""
+        total = self.n if linhas is None else len(linhas)
+        notas = np.empty((len(consultas), total), dtype=np.float32)
+        for inicio in range(0, total, BLOCO_BUSCA):
+            fim = min(inicio + BLOCO_BUSCA, total)
+            if linhas is None:
+                codigos, escalas = self.codigos[inicio:fim], self.escalas[inicio:fim]
+            else:
+                codigos, escalas = self.codigos[linhas[inicio:fim]], self.escalas[linhas[inicio:fim]]
+            notas[:, inicio:fim] = (consultas @ codigos.astype(np.float32).T) * escalas
+        return notas
+
+    def buscar(self, consultas, k, where=None, reordenar=None):
+        """(posições, similaridades) dos k melhores de cada pergunta (vetores já normalizados)."""
+        reordenar = self.reordenar if reordenar is None else reordenar and self.vetores is not None
+        linhas = self._linhas(where)
+        total = self.n if linhas is None else len(linhas)
+        if total == 0:
+            return [np.empty(0, dtype=np.int64) for _ in consultas], [np.empty(0, dtype=np.float32) for _ in consultas]
+
+        notas = self._notas_aproximadas(consultas, linhas)
+        candidatos = min(total, max(k * FATOR_REORDENACAO, MIN_CANDIDATOS) if reordenar else k)
+        melhores = np.argpartition(-notas, candidatos - 1, axis=1)[:, :candidatos]
+        posicoes, similaridades = [], []
+        for q, escolhidos in enumerate(melhores):
+            escolhidos = escolhidos if linhas is None else linhas[escolhidos]
+            if reordenar:
+                ordem = np.sort(escolhidos)  # leitura sequencial do memmap
+                exatas = self.vetores[ordem] @ consultas[q]
+                topo = np.argsort(-exatas)[:k]
+                posicoes.append(ordem[topo])
+                similaridades.append(exatas[topo])
+            else:
+                aproximadas = notas[q, melhores[q]]
+                topo = np.argsort(-aproximadas)[:k]
+                posicoes.append(escolhidos[topo])
+                similaridades.append(aproximadas[topo])
+        return posicoes, similaridades
+
+    def query(self, query_texts=None, query_embeddings=None, n_results=10, where=None,
+              include=("documents", "metadatas", "distances")):
+        if query_embeddings is None:
+            query_embeddings = self.embedding_function(list(query_texts))
+        posicoes, similaridades = self.buscar(normalizar_linhas(query_embeddings), n_results, where)
+        itens = self.itens
+        return {
+            "ids": [[itens["ids"][i] for i in p] for p in posicoes],
+            "documents": [[itens["documentos"][i] for i in p] for p in posicoes],
+            "metadatas": [[itens["metadados"][i] for i in p] for p in posicoes],
+            "distances": [(1.0 - s).tolist() for s in similaridades],
+        }
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas"), limit=None, offset=0):
+        itens = self.itens
+        linhas = self._linhas(where)
+        linhas = np.arange(self.n) if linhas is None else linhas
+        if ids is not None:
+            procurados = set(ids)
+            linhas = np.array([i for i in linhas if itens["ids"][i] in procurados], dtype=np.int64)
+        linhas = linhas[offset:offset + limit if limit is not None else None]
+        resultado = {"ids": [itens["ids"][i] for i in linhas]}
+        if "documents" in include:
+            resultado["documents"] = [itens["documentos"][i] for i in linhas]
+        if "metadatas" in include:
+            resultado["metadatas"] = [itens["metadados"][i] for i in linhas]
+        if "embeddings" in include:
+            resultado["embeddings"] = (np.asarray(self.vetores[linhas]) if self.vetores is not None
+                                       else self.codigos[linhas].astype(np.float32) * self.escalas[linhas][:, None])
+        return resultado
+
+
+# --- BENCHMARK ---
+def benchmark_quantizacao(n_fragmentos=50_000, n_consultas=200, k=10, seed=42):
+    """Recall@k e latência de float32 exato x float16 x int8 (com e sem reordenação), mesmo corpus."""
+    ids, vetores, textos, metadados = corpus_sintetico(n_fragmentos, seed=seed)
+    consultas, _ = consultas_sinteticas(vetores, metadados, n_consultas)
+    exatos = np.argsort(-(consultas @ vetores.T), axis=1)[:, :k]
+    print(f"--- ⏱️ Benchmark quantização: {n_fragmentos:,} vetores x {vetores.shape[1]} dims | "
+          f"{n_consultas} perguntas | k={k} ---")
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as raiz:
+        for tipo, reordenar in (("float16", False), ("int8", False), ("int8", True)):
+            pasta = os.path.join(raiz, tipo)
+            if not os.path.exists(os.path.join(pasta, "meta.json")):
+                construir_indice(pasta, ids, vetores, textos, metadados, tipo)
+            inicio = time.perf_counter()
+            indice = IndiceQuantizado(pasta, reordenar=reordenar)
+            carga_ms = (time.perf_counter() - inicio) * 1000
+
+            latencias, acertos = [], 0
+            for q in range(n_consultas):
+                inicio = time.perf_counter()
+                posicoes, _ = indice.buscar(consultas[q:q + 1], k)
+                latencias.append(time.perf_counter() - inicio)
+                acertos += len(set(posicoes[0].tolist()) & set(exatos[q].tolist()))
+
+            linha = {
+                "indice": f"{tipo}{' + reordenação' if reordenar else ''}",
+                "carga_ms": carga_ms,
+                "codigos_mb": os.path.getsize(os.path.join(pasta, "codigos.bin")) / 2**20,
+                "p50_ms": float(np.percentile(latencias, 50)) * 1000,
+                "p99_ms": float(np.percentile(latencias, 99)) * 1000,
+                f"recall@{k}": acertos / (k * n_consultas),
+            }
+            resultados.append(linha)
+            print(f"{linha['indice']:>20}: carga {linha['carga_ms']:5.1f} ms | códigos {linha['codigos_mb']:6.1f} MB "
+                  f"(float32: {vetores.nbytes / 2**20:.1f} MB) | p50 {linha['p50_ms']:6.2f} ms | "
+                  f"p99 {linha['p99_ms']:6.2f} ms | recall@{k} {linha[f'recall@{k}']:.3f}")
+            del indice
+
+        # Referência: float32 exato lido do mesmo disco (o que a reordenação usa)
+        exato = np.memmap(os.path.join(raiz, "int8", "vetores.f32"), dtype=np.float32, mode="r", shape=vetores.shape)
+        latencias = []
+        for q in range(n_consultas):
+            inicio = time.perf_counter()
+            np.argpartition(-(exato @ consultas[q]), k - 1)[:k]
+            latencias.append(time.perf_counter() - inicio)
+        print(f"{'float32 (exato)':>20}: {'':18} arquivo {vetores.nbytes / 2**20:6.1f} MB | "
+              f"p50 {np.percentile(latencias, 50) * 1000:6.2f} ms | p99 {np.percentile(latencias, 99) * 1000:6.2f} ms | recall@{k} 1.000")
+        del exato
+    return resultados
+
+
+if __name__ == "__main__":
+    benchmark_quantizacao()
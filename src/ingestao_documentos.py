@@ -0,0 +1,152 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from fatiador import FATIADOR_PADRAO
+
+# --- INGESTÃO EM FLUXO: PDF -> PÁGINAS -> LIMPEZA -> FRAGMENTOS -> LOTES ---
+# Os PDFs baixados (04_download_manuals) e os .txt sintéticos (04_generate_knowledge) viram
+# fragmentos de texto prontos para o banco vetorial, sem carregar documentos inteiros na memória:
+#   - cada PDF é dividido em intervalos de páginas, processados por um pool de processos
+#   - só um número limitado de intervalos fica "em voo" ao mesmo tempo
+#   - os fragmentos saem como gerador e são consumidos em lotes de tamanho fixo
+#   - o texto é fatiado por tokens, com sobreposição, respeitando as seções (fatiador.py)
+# O pypdf é opcional: sem ele, só os .txt entram (com aviso).
+
+PAGINAS_POR_TAREFA = 16       # Páginas de PDF por tarefa do pool
+TAMANHO_LOTE_PADRAO = 256     # Fragmentos por lote enviado ao banco vetorial
+
+
+def metadados_do_arquivo(arquivo):
+    """topico = nome do arquivo sem extensão; cultura = prefixo do nome (soja_manejo.pdf e
+    soja_manual_tecnico.txt -> soja): é o filtro where={"cultura": ...} dos agentes."""
+    topico = os.path.splitext(arquivo)[0]
+    return {"fonte": arquivo, "topico": topico, "cultura": topico.split("_")[0]}
+
+
+# --- LIMPEZA E FATIAMENTO ---
+def limpar_texto(texto):
+    """Limpa o texto extraído de uma página: hifenização, números de página, espaços."""
+    texto = texto.replace("\r", "\n").replace("\u00ad", "")  # hífen "suave"
+    texto = re.sub(r"(\w)-\n\s*(\w)", r"\1\2", texto)          # "adu-\nbação" -> "adubação"
+    linhas = []
+    for linha in texto.split("\n"):
+        linha = re.sub(r"[ \t\u00a0]+", " ", linha).strip()
+        if re.fullmatch(r"\d{1,4}", linha):                      # número de página solto
+            continue
+        linhas.append(linha)
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(linhas)).strip()
+
+
+def fragmentos_txt(caminho, fatiador=FATIADOR_PADRAO):
+    """Fragmentos de um .txt sintético (o arquivo inteiro passa pelo fatiador)."""
+    arquivo = os.path.basename(caminho)
+    with open(caminho, "r", encoding="utf-8") as f:
+        texto_completo = f.read()
+    for i, trecho in enumerate(fatiador.fatiar(texto_completo)):
+        yield {"id": f"{arquivo}_{i}", "texto": trecho, **metadados_do_arquivo(arquivo)}
+
+
+# --- PDF (executado nos processos do pool) ---
+def _importar_pypdf():
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return None
+    return PdfReader
+
+
+def contar_paginas(caminho):
+    PdfReader = _importar_pypdf()
+    return len(PdfReader(caminho).pages)
+
+
+def processar_intervalo(caminho, inicio, fim, fatiador=FATIADOR_PADRAO):
+    """Extrai, limpa e fatia as páginas [inicio, fim) de um PDF. Roda num processo do pool."""
+    PdfReader = _importar_pypdf()
+    leitor = PdfReader(caminho)
+    arquivo = os.path.basename(caminho)
+    metadados = metadados_do_arquivo(arquivo)
+    fragmentos = []
+    for numero in range(inicio, min(fim, len(leitor.pages))):
+        try:
+            texto = leitor.pages[numero].extract_text() or ""
+        except Exception as e:  # Página com problema não derruba o documento inteiro
+            print(f"⚠️ {arquivo} p.{numero + 1}: {e}")
+            continue
+        for i, trecho in enumerate(fatiador.fatiar(limpar_texto(texto))):
+            fragmentos.append({
+                "id": f"{arquivo}_p{numero + 1}_{i}",
+                "texto": trecho,
+                **metadados,
+                "pagina": numero + 1,
+            })
+    return fragmentos
+
+
+def _tarefas_pdf(caminhos, paginas_por_tarefa, fatiador):
+    for caminho in caminhos:
+        try:
+            total = contar_paginas(caminho)
+        except Exception as e:
+            print(f"❌ PDF ilegível {os.path.basename(caminho)}: {e}")
+            continue
+        for inicio in range(0, total, paginas_por_tarefa):
+            yield caminho, inicio, inicio + paginas_por_tarefa, fatiador
+
+
+def fragmentos_pdf(caminhos, max_processos=None, paginas_por_tarefa=PAGINAS_POR_TAREFA, fatiador=FATIADOR_PADRAO):
+    """
+    Gerador de fragmentos de vários PDFs usando um pool de processos.
+    No máximo 2 x processos intervalos ficam em voo: a memória não cresce com o tamanho dos PDFs.
+    A ordem de saída segue a conclusão das tarefas, não a ordem das páginas.
+    """
+    if not caminhos:
+        return
+    if _importar_pypdf() is None:
+        print(f"⚠️ pypdf não instalado: {len(caminhos)} PDFs ignorados (pip install pypdf)")
+        return
+
+    max_processos = max_processos or os.cpu_count() or 1
+    tarefas = _tarefas_pdf(caminhos, paginas_por_tarefa, fatiador)
+    with ProcessPoolExecutor(max_workers=max_processos) as executor:
+        em_voo = set()
+        for tarefa in tarefas:
+            em_voo.add(executor.submit(processar_intervalo, *tarefa))
+            if len(em_voo) >= 2 * max_processos:
+                prontas, em_voo = wait(em_voo, return_when=FIRST_COMPLETED)
+                for futuro in prontas:
+                    yield from futuro.result()
+        for futuro in em_voo:
+            yield from futuro.result()
+
+
+def listar_documentos(pasta):
+    """Arquivos da pasta de conhecimento que viram fragmentos (.txt e .pdf)."""
+    return sorted(a for a in os.listdir(pasta) if a.endswith(".txt") or a.lower().endswith(".pdf"))
+
+
+def gerar_fragmentos(pasta, max_processos=None, paginas_por_tarefa=PAGINAS_POR_TAREFA, arquivos=None,
+                     fatiador=FATIADOR_PADRAO):
+    """
+    Fragmentos da pasta de conhecimento: .txt primeiro, depois os PDFs (em paralelo).
+    arquivos: só estes nomes (None = todos os documentos da pasta).
+    """
+    arquivos = listar_documentos(pasta) if arquivos is None else sorted(arquivos)
+    for arquivo in arquivos:
+        if arquivo.endswith(".txt"):
+            yield from fragmentos_txt(os.path.join(pasta, arquivo), fatiador)
+    pdfs = [os.path.join(pasta, a) for a in arquivos if a.lower().endswith(".pdf")]
+    yield from fragmentos_pdf(pdfs, max_processos, paginas_por_tarefa, fatiador)
+
+
+def em_lotes(iteravel, tamanho=TAMANHO_LOTE_PADRAO):
+    """Agrupa um gerador em listas de até `tamanho` itens."""
+    lote = []
+    for item in iteravel:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
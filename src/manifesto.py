@@ -0,0 +1,124 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+# --- MANIFESTO DE REPROCESSAMENTO INCREMENTAL ---
+# Guarda, para cada etapa do pipeline, a assinatura (hash de conteúdo) de cada
+# partição de entrada e de saída. Na próxima execução a etapa só recalcula as
+# partições cuja assinatura de entrada mudou; o resto fica intocado no disco.
+#
+# Formato (JSON):
+# {"02_process_data": {"entradas": {"GO|Rio Verde|Soja": "ab12..."}, "saidas": {...}}}
+
+SEPARADOR_CHAVE = "|"
+
+
+class Manifesto:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.dados = {}
+        if os.path.exists(caminho):
+            with open(caminho, "r", encoding="utf-8") as f:
+                self.dados = json.load(f)
+
+    def etapa(self, nome):
+        """Seção da etapa (criada vazia se não existir)."""
+        secao = self.dados.setdefault(nome, {})
+        secao.setdefault("entradas", {})
+        secao.setdefault("saidas", {})
+        return secao
+
+    def salvar(self):
+        """Escrita atômica: um manifesto pela metade nunca fica no disco."""
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        temporario = self.caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self.dados, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(temporario, self.caminho)
+
+
+def chave_particao(*valores):
+    return SEPARADOR_CHAVE.join(str(v) for v in valores)
+
+
+def separar_chave(chave):
+    return chave.split(SEPARADOR_CHAVE)
+
+
+def hash_objeto(obj):
+    """Hash estável de um objeto serializável em JSON (ex: tabela de preços)."""
+    texto = json.dumps(obj, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:16]
+
+
+def hash_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    """sha256 do conteúdo de um arquivo (lido em blocos)."""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _grupos(df, chaves):
+    """Id do grupo de cada linha e a chave (texto) de cada grupo, sem loop por linha."""
+    ids = df.groupby(chaves, observed=True, sort=False, dropna=False).ngroup().to_numpy()
+    _, primeira_linha = np.unique(ids, return_index=True)
+    valores = df[chaves].iloc[primeira_linha].astype(str).to_numpy()
+    return ids, [chave_particao(*v) for v in valores]
+
+
+def mascara_particoes(df, chaves, selecionadas):
+    """Máscara booleana das linhas que pertencem às partições `selecionadas`."""
+    if df.empty:
+        return np.zeros(0, dtype=bool)
+    ids, chaves_grupo = _grupos(df, chaves)
+    selecionadas = set(selecionadas)
+    return np.array([c in selecionadas for c in chaves_grupo], dtype=bool)[ids]
+
+
+def assinar_particoes(df, chaves):
+    """
+    Assinatura de conteúdo de cada partição (grupo de `chaves`), numa passada vetorizada:
+    hash por linha (pandas) combinado por grupo com somas módulo 2^64.
+    Não depende da ordem das linhas. Retorna {chave_particao: assinatura}.
+    """
+    if df.empty:
+        return {}
+
+    colunas = sorted(df.columns)
+    hashes = pd.util.hash_pandas_object(df[colunas], index=False).to_numpy(dtype=np.uint64)
+    grupos, chaves_grupo = _grupos(df, chaves)
+
+    ordem = np.argsort(grupos, kind="stable")
+    grupos_ordenados = grupos[ordem]
+    inicios = np.flatnonzero(np.r_[True, grupos_ordenados[1:] != grupos_ordenados[:-1]])
+
+    with np.errstate(over="ignore"):
+        h = hashes[ordem]
+        soma = np.add.reduceat(h, inicios)
+        soma_quadrados = np.add.reduceat(h * h, inicios)
+    contagem = np.diff(np.r_[inicios, len(h)])
+
+    # inicios segue a ordem dos ids (0, 1, 2...), a mesma de chaves_grupo
+    cabecalho = hashlib.sha256(",".join(colunas).encode("utf-8")).hexdigest()[:8]
+
+    return {
+        chave: f"{cabecalho}{s:016x}{q:016x}{n:x}"
+        for chave, s, q, n in zip(chaves_grupo, soma, soma_quadrados, contagem)
+    }
+
+
+def particoes_alteradas(assinaturas_novas, assinaturas_antigas, existe_saida=None):
+    """
+    Compara as assinaturas de entrada. Retorna (alteradas, removidas).
+    existe_saida: função(chave) -> bool; partições sem arquivo de saída também são recalculadas.
+    """
+    alteradas = [
+        chave for chave, assinatura in assinaturas_novas.items()
+        if assinaturas_antigas.get(chave) != assinatura or (existe_saida and not existe_saida(chave))
+    ]
+    removidas = [chave for chave in assinaturas_antigas if chave not in assinaturas_novas]
+    return alteradas, removidas
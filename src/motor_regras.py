@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+# --- MOTOR DE REGRAS DE RISCO (TABELADO) ---
+# As regras de risco por cultura ficam num arquivo (data/regras/regras_risco_zarc.csv),
+# uma por linha: cultura;mes_inicio;mes_fim;solo;risco;comentario
+#   - "*" em cultura ou solo vale para todos
+#   - mes_inicio > mes_fim atravessa a virada do ano (ex: 12 -> 2 = Dez, Jan, Fev)
+#   - as regras são aplicadas na ordem do arquivo: a última que casar define o risco
+# Cada regra vira uma máscara booleana e é aplicada numa única passada vetorizada sobre o array inteiro.
+
+CORINGA = "*"
+COLUNAS_OBRIGATORIAS = ["cultura", "mes_inicio", "mes_fim", "solo", "risco"]
+NUM_DECENDIOS = 36
+MES_DECENDIO = np.arange(NUM_DECENDIOS) // 3 + 1
+
+
+def carregar_regras(caminho):
+    """Lê e valida o arquivo de regras. Retorna um DataFrame na ordem de aplicação."""
+    regras = pd.read_csv(caminho, sep=";", encoding="utf-8", dtype={"cultura": str, "solo": str})
+
+    faltando = [c for c in COLUNAS_OBRIGATORIAS if c not in regras.columns]
+    if faltando:
+        raise ValueError(f"Arquivo de regras {caminho} sem as colunas: {faltando}")
+
+    regras["cultura"] = regras["cultura"].str.strip()
+    regras["solo"] = regras["solo"].fillna(CORINGA).str.strip()
+    for coluna in ["mes_inicio", "mes_fim", "risco"]:
+        regras[coluna] = regras[coluna].astype(int)
+
+    invalidos = regras[~regras["mes_inicio"].between(1, 12) | ~regras["mes_fim"].between(1, 12)]
+    if not invalidos.empty:
+        raise ValueError(f"Regras com mês fora de 1-12 (linhas {list(invalidos.index + 2)})")
+
+    return regras.reset_index(drop=True)
+
+
+def culturas_das_regras(regras):
+    """Culturas citadas no arquivo (na ordem em que aparecem). Nova cultura = nova linha no arquivo."""
+    return [c for c in dict.fromkeys(regras["cultura"]) if c != CORINGA]
+
+
+def mascara_meses(mes_inicio, mes_fim):
+    """Máscara (36,) dos decêndios cujo mês cai no intervalo (com virada de ano)."""
+    if mes_inicio <= mes_fim:
+        return (MES_DECENDIO >= mes_inicio) & (MES_DECENDIO <= mes_fim)
+    return (MES_DECENDIO >= mes_inicio) | (MES_DECENDIO <= mes_fim)
+
+
+def _mascara_valor(valor, opcoes):
+    opcoes = np.asarray(opcoes, dtype=object)
+    if valor == CORINGA:
+        return np.ones(len(opcoes), dtype=bool)
+    return opcoes == valor
+
+
+def compilar_regras(regras, culturas, tipos_solo):
+    """
+    Converte cada regra em máscaras booleanas "separáveis" que fazem broadcast
+    para o shape (..., culturas, solos, decêndios).
+    Retorna uma lista de (mascara_cultura, mascara_solo, mascara_decendio, risco).
+    Regras de culturas/solos fora do escopo são descartadas aqui, uma única vez.
+    """
+    compiladas = []
+    for regra in regras.itertuples(index=False):
+        m_cult = _mascara_valor(regra.cultura, culturas)
+        m_solo = _mascara_valor(regra.solo, tipos_solo)
+        if not m_cult.any() or not m_solo.any():
+            continue
+        compiladas.append((
+            m_cult[:, np.newaxis, np.newaxis],
+            m_solo[np.newaxis, :, np.newaxis],
+            mascara_meses(regra.mes_inicio, regra.mes_fim)[np.newaxis, np.newaxis, :],
+            np.int16(regra.risco),
+        ))
+    return compiladas
+
+
+def avaliar_regras(compiladas, forma, risco_padrao=20):
+    """
+    Aplica as regras compiladas sobre um array de shape `forma`, cujas 3 últimas
+    dimensões são (culturas, solos, decêndios). Uma passada vetorizada por regra.
+    """
+    risco = np.full(forma, risco_padrao, dtype=np.int16)
+    for m_cult, m_solo, m_dec, valor in compiladas:
+        np.copyto(risco, valor, where=m_cult & m_solo & m_dec)
+    return risco
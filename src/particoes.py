@@ -0,0 +1,177 @@
+import os
+import glob
+from urllib.parse import quote, unquote
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+
+# --- LAYOUT PARTICIONADO DOS DATASETS PROCESSADOS ---
+# <raiz>/uf=GO/municipio=Rio%20Verde/Soja.parquet
+# Diretórios no padrão Hive (uf/municipio) e um arquivo por cultura dentro deles.
+# Assim cada partição (município, cultura) pode ser reescrita sem tocar nas outras.
+# Os nomes são codificados em URL, que é o que o pyarrow espera ao ler partições Hive.
+#
+# Leitura com "predicate pushdown": filtros por uf/municipio/cultura viram caminhos
+# (só os arquivos daquela partição são abertos) e os demais filtros/colunas são
+# empurrados para o pyarrow, que lê só as colunas e row groups necessários.
+# ler_fatias() entrega o bruto fatia a fatia (pasta Hive: só os arquivos da fatia; Parquet ou CSV
+# único: uma passada só, com as fatias guardadas em Arrow e convertidas para pandas uma por vez).
+
+COLUNAS_PARTICAO = ["uf", "municipio"]
+
+
+def _segmento(valor):
+    return quote(str(valor), safe="")
+
+
+def caminho_particao(raiz, uf, municipio, cultura):
+    return os.path.join(
+        raiz,
+        f"uf={_segmento(uf)}",
+        f"municipio={_segmento(municipio)}",
+        f"{_segmento(cultura)}.parquet",
+    )
+
+
+def escrever_particao(df, raiz, uf, municipio, cultura):
+    """Grava uma partição. uf/municipio ficam só no caminho (o leitor reconstrói as colunas)."""
+    destino = caminho_particao(raiz, uf, municipio, cultura)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    # Temporário oculto (prefixo ".") para o leitor de datasets ignorá-lo
+    temporario = os.path.join(os.path.dirname(destino), "." + os.path.basename(destino))
+    df.drop(columns=COLUNAS_PARTICAO, errors="ignore").to_parquet(temporario, index=False, compression="zstd")
+    os.replace(temporario, destino)
+    return destino
+
+
+def remover_particao(raiz, uf, municipio, cultura):
+    destino = caminho_particao(raiz, uf, municipio, cultura)
+    if os.path.exists(destino):
+        os.remove(destino)
+        # Limpa diretórios que ficaram vazios
+        pasta = os.path.dirname(destino)
+        while pasta != raiz and os.path.isdir(pasta) and not os.listdir(pasta):
+            os.rmdir(pasta)
+            pasta = os.path.dirname(pasta)
+
+
+def _como_lista(valor):
+    if valor is None:
+        return []
+    return list(valor) if isinstance(valor, (list, tuple, set)) else [valor]
+
+
+def _arquivos_candidatos(raiz, uf=None, municipio=None, cultura=None):
+    """Poda de partições pelo caminho: lista só os arquivos que podem casar com o filtro."""
+    ufs = [f"uf={_segmento(v)}" for v in _como_lista(uf)] or ["uf=*"]
+    municipios = [f"municipio={_segmento(v)}" for v in _como_lista(municipio)] or ["municipio=*"]
+    culturas = [f"{_segmento(v)}.parquet" for v in _como_lista(cultura)] or ["*.parquet"]
+
+    arquivos = []
+    for seg_uf in ufs:
+        for seg_mun in municipios:
+            for seg_cult in culturas:
+                arquivos.extend(glob.glob(os.path.join(glob.escape(raiz), seg_uf, seg_mun, seg_cult)))
+    return sorted(arquivos)
+
+
+def _expressao_filtro(filtros):
+    expressao = None
+    for coluna, valor in filtros.items():
+        if valor is None:
+            continue
+        valores = _como_lista(valor)
+        termo = ds.field(coluna) == valores[0] if len(valores) == 1 else ds.field(coluna).isin(valores)
+        expressao = termo if expressao is None else expressao & termo
+    return expressao
+
+
+def ler_particionado(raiz, arquivo_legado=None, colunas=None, **filtros):
+    """
+    Lê o dataset particionado (ou só o pedaço pedido); se ele ainda não existir,
+    cai para o Parquet único das versões anteriores do pipeline.
+
+    colunas: lista de colunas a ler (None = todas)
+    filtros: coluna=valor ou coluna=[valores], ex: municipio="Rio Verde", cultura="Soja"
+    Retorna None se não houver dados no disco.
+    """
+    filtros = {k: v for k, v in filtros.items() if v is not None}
+    expressao = _expressao_filtro(filtros)
+
+    if os.path.isdir(raiz):
+        arquivos = _arquivos_candidatos(raiz, filtros.get("uf"), filtros.get("municipio"), filtros.get("cultura"))
+        if not arquivos:
+            return pd.DataFrame(columns=colunas) if colunas else pd.DataFrame()
+        dataset = ds.dataset(arquivos, format="parquet", partitioning="hive", partition_base_dir=raiz)
+    elif arquivo_legado and os.path.exists(arquivo_legado):
+        dataset = ds.dataset(arquivo_legado, format="parquet")
+    else:
+        return None
+
+    return dataset.to_table(columns=colunas, filter=expressao).to_pandas()
+
+
+def listar_particoes(raiz, coluna="municipio", arquivo_legado=None):
+    """Valores distintos de uma coluna de partição (uf ou municipio) sem ler os dados."""
+    if os.path.isdir(raiz):
+        padrao = os.path.join(glob.escape(raiz), "uf=*") if coluna == "uf" else os.path.join(glob.escape(raiz), "uf=*", "municipio=*")
+        prefixo = f"{coluna}="
+        return sorted({unquote(os.path.basename(p)[len(prefixo):]) for p in glob.glob(padrao) if os.path.isdir(p)})
+    if arquivo_legado and os.path.exists(arquivo_legado):
+        tabela = ds.dataset(arquivo_legado, format="parquet").to_table(columns=[coluna])
+        return sorted(tabela.column(coluna).unique().to_pylist())
+    return []
+
+
+def abrir_dataset(caminho, sep=";"):
+    """Dataset pyarrow (sem ler os dados) de uma pasta particionada no padrão Hive, um Parquet ou um CSV."""
+    if os.path.isdir(caminho):
+        return ds.dataset(caminho, format="parquet", partitioning="hive")
+    if caminho.lower().endswith(".csv"):
+        return ds.dataset(caminho, format=ds.CsvFileFormat(parse_options=pacsv.ParseOptions(delimiter=sep)))
+    return ds.dataset(caminho, format="parquet")
+
+
+def valores_distintos(dataset, colunas):
+    """Combinações distintas de `colunas`, lidas lote a lote (só essas colunas, memória constante)."""
+    vistos = set()
+    for lote in dataset.to_batches(columns=colunas):
+        unicos = pa.Table.from_batches([lote]).group_by(colunas).aggregate([])
+        vistos.update(zip(*(unicos.column(c).to_pylist() for c in colunas)))
+    return sorted(vistos, key=lambda valores: tuple("" if v is None else str(v) for v in valores))
+
+
+def _particionado_por(dataset, colunas):
+    particionamento = getattr(dataset, "partitioning", None)
+    return particionamento is not None and set(colunas) <= set(particionamento.schema.names)
+
+
+def _fatias_em_uma_passada(dataset, colunas):
+    """CSV / Parquet único: uma leitura só, distribuindo as linhas de cada lote entre as fatias (em Arrow)."""
+    pedacos = {}
+    for lote in dataset.to_batches():
+        chaves = lote.select(colunas).to_pandas()
+        for valores, posicoes in chaves.groupby(colunas, dropna=False, sort=False).indices.items():
+            valores = valores if isinstance(valores, tuple) else (valores,)
+            valores = tuple(None if pd.isna(v) else v for v in valores)
+            pedacos.setdefault(valores, []).append(lote.take(pa.array(posicoes)))
+    for valores in sorted(pedacos, key=lambda v: tuple("" if x is None else str(x) for x in v)):
+        yield valores, pa.Table.from_batches(pedacos.pop(valores)).to_pandas()
+
+
+def ler_fatias(dataset, colunas):
+    """
+    Gera (valores, DataFrame) para cada combinação de `colunas`, uma fatia em pandas por vez.
+    Pasta particionada por essas colunas: cada fatia lê só os seus arquivos. CSV ou Parquet único:
+    uma passada só pelo arquivo (filtrar fatia a fatia releria o arquivo inteiro a cada fatia).
+    """
+    if not _particionado_por(dataset, colunas):
+        yield from _fatias_em_uma_passada(dataset, colunas)
+        return
+    for valores in valores_distintos(dataset, colunas):
+        filtro = None
+        for coluna, valor in zip(colunas, valores):
+            termo = ds.field(coluna).is_null() if valor is None else ds.field(coluna) == valor
+            filtro = termo if filtro is None else filtro & termo
+        yield valores, dataset.to_table(filter=filtro).to_pandas()
@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import threading
+import statistics
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# --- RECURSOS PESADOS DOS AGENTES: CARREGAMENTO PREGUIÇOSO E SEGURO ENTRE THREADS ---
+# Importar 06_agente_final / 08_agente_llm não abre banco, não carrega modelo nem lê Parquet:
+# cada recurso (busca nos manuais com cache de consultas, modelo de ML, índice de janelas ZARC, ...) é um Recurso criado vazio e carregado
+# na primeira chamada de obter(), uma única vez mesmo com várias threads pedindo ao mesmo tempo.
+# aquecer() carrega tudo antes da primeira pergunta (ex: na subida de um serviço), em paralelo.
+# benchmark_importacao() mede o tempo de import em processos novos e falha acima de um limite.
+
+_VAZIO = object()
+LIMITE_IMPORTACAO_S = 0.5
+MODULOS_AGENTES = ("06_agente_final", "08_agente_llm")
+
+
+class Recurso:
+    def __init__(self, nome, fabrica):
+        self.nome = nome
+        self._fabrica = fabrica
+        self._valor = _VAZIO
+        self._trava = threading.Lock()
+        self.segundos = None  # Tempo da carga (None = ainda não carregado)
+
+    @property
+    def carregado(self):
+        return self._valor is not _VAZIO
+
+    def obter(self):
+        valor = self._valor
+        if valor is _VAZIO:
+            with self._trava:
+                # Outra thread pode ter carregado enquanto esta esperava a trava
+                if self._valor is _VAZIO:
+                    print(f"⏳ Carregando {self.nome}...")
+                    inicio = time.perf_counter()
+                    self._valor = self._fabrica()  # Se falhar, continua vazio e a próxima chamada tenta de novo
+                    self.segundos = time.perf_counter() - inicio
+                valor = self._valor
+        return valor
+
+    def descartar(self):
+        """Esquece o valor carregado (ex: depois de repopular o banco); a próxima chamada recarrega."""
+        with self._trava:
+            self._valor = _VAZIO
+            self.segundos = None
+
+
+def aquecer(*recursos, paralelo=True):
+    """Carrega os recursos antes da primeira pergunta. Retorna {nome: segundos}."""
+    if paralelo and len(recursos) > 1:
+        with ThreadPoolExecutor(max_workers=len(recursos)) as executor:
+            list(executor.map(Recurso.obter, recursos))
+    else:
+        for recurso in recursos:
+            recurso.obter()
+    return {r.nome: r.segundos for r in recursos}
+
+
+# --- FÁBRICAS COMPARTILHADAS PELOS AGENTES ---
+def criar_embedding(pasta_cache):
+    """Função de embedding com cache em disco (o modelo em si só sobe no primeiro texto fora do cache)."""
+    from embedding_chroma import EmbeddingComCache
+    return EmbeddingComCache(pasta_cache, model_name="all-MiniLM-L6-v2")
+
+
+def carregar_modelo_embedding(emb_fn):
+    """Força a carga do SentenceTransformer (torch + pesos), para a primeira pergunta nova não pagar por ela."""
+    return emb_fn.codificador.modelo
+
+
+def abrir_busca_manuais(pasta_dados, backend, emb_fn, cache=True):
+    """Coleção dos manuais (+ BM25, se existir), com cache de consultas na frente."""
+    from armazem_vetores import abrir_colecao, caminho_padrao
+    from indice_lexical import abrir_busca, caminho_indice
+    from cache_consultas import CacheConsultas, caminho_versao
+
+    def abrir():
+        colecao = abrir_colecao(backend, caminho_padrao(backend, pasta_dados), "manual_tecnico_agricola", emb_fn, criar=False)
+        # Busca híbrida: BM25 (termos técnicos exatos) + vetores; termo raro achado com folga nem passa pelo modelo
+        return abrir_busca(colecao, caminho_indice(pasta_dados, backend))
+
+    if not cache:
+        return abrir()
+    # Pergunta repetida (ou quase igual) não passa pelo banco; repopular o banco esvazia o cache
+    return CacheConsultas(abrir(), emb_fn, arquivo_versao=caminho_versao(pasta_dados, backend), reabrir=abrir)
+
+
+def carregar_janelas(caminho, raiz_gold, arquivo_legado=None):
+    """Índice das melhores janelas ZARC (artefato do passo 03; gerado do dataset gold se faltar)."""
+    from indice_janelas import IndiceJanelas
+    return IndiceJanelas.carregar(caminho, raiz_gold, arquivo_legado)
+
+
+def carregar_joblib(caminho):
+    import joblib
+    return joblib.load(caminho)
+
+
+# --- BENCHMARK DE IMPORTAÇÃO ---
+def tempo_importacao(modulo, pasta=None, repeticoes=5):
+    """Mediana do tempo de `import modulo` num interpretador novo (sem cache de módulos do processo atual)."""
+    pasta = pasta or os.path.dirname(os.path.abspath(__file__))
+    codigo = ("import time, importlib; inicio = time.perf_counter(); "
+              f"importlib.import_module({modulo!r}); print(time.perf_counter() - inicio)")
+    tempos = []
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, "-c", codigo], cwd=pasta, capture_output=True, text=True, check=True)
+        tempos.append(float(saida.stdout.strip().splitlines()[-1]))
+    return statistics.median(tempos)
+
+
+def benchmark_importacao(modulos=MODULOS_AGENTES, limite_s=LIMITE_IMPORTACAO_S, repeticoes=5):
+    """Imprime o tempo de import de cada módulo; devolve False se algum passar do limite."""
+    print(f"--- ⏱️ Tempo de importação (mediana de {repeticoes}, limite {limite_s:.2f}s) ---")
+    dentro = True
+    for modulo in modulos:
+        try:
+            segundos = tempo_importacao(modulo, repeticoes=repeticoes)
+        except subprocess.CalledProcessError as e:
+            print(f"❌ {modulo}: falhou ao importar\n{e.stderr.strip().splitlines()[-1] if e.stderr else ''}")
+            dentro = False
+            continue
+        ok = segundos <= limite_s
+        dentro &= ok
+        print(f"{'✅' if ok else '❌'} {modulo}: {segundos * 1000:.0f} ms")
+    return dentro
+
+
+if __name__ == "__main__":
+    limite = float(sys.argv[sys.argv.index("--limite") + 1]) if "--limite" in sys.argv else LIMITE_IMPORTACAO_S
+    sys.exit(0 if benchmark_importacao(limite_s=limite) else 1)
@@ -0,0 +1,104 @@
+import os
+import csv
+import json
+import time
+from collections import defaultdict
+
+# --- RESPOSTAS EM LOTE (PERGUNTAS PADRÃO DO FAQ PARA CADA MUNICÍPIO/CULTURA) ---
+# Os agentes respondem uma pergunta por vez: um embedding, uma consulta ao banco e um predict
+# por pergunta. Para pré-responder milhares de perguntas, o lote:
+#   - calcula os embeddings das perguntas distintas numa única chamada por consulta (só as que
+#     não saem do cache nem do BM25, quando a busca aceita texto)
+#   - agrupa por cultura (o filtro where={"cultura": ...}) e faz uma consulta por grupo, com as perguntas
+#     repetidas (a mesma pergunta padrão em todo município) consultadas uma vez só
+#   - deixa o agente fazer uma única predição vetorizada do modelo de ML para o lote
+# A vazão (perguntas/s) é impressa no fim.
+
+TAMANHO_LOTE = 512
+
+
+def item_pergunta(item):
+    """(pergunta, cidade, cultura) a partir de uma tupla ou de um dict com essas chaves."""
+    if isinstance(item, dict):
+        return item["pergunta"], item["cidade"], item["cultura"]
+    pergunta, cidade, cultura = item
+    return pergunta, cidade, cultura
+
+
+def ler_perguntas(caminho):
+    """Itera as perguntas de um CSV (colunas pergunta,cidade,cultura) ou JSONL."""
+    with open(caminho, "r", encoding="utf-8") as f:
+        if caminho.endswith(".jsonl"):
+            for linha in f:
+                if linha.strip():
+                    yield item_pergunta(json.loads(linha))
+        else:
+            for registro in csv.DictReader(f):
+                yield item_pergunta(registro)
+
+
+def salvar_respostas(caminho, perguntas, respostas):
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        for (pergunta, cidade, cultura), resposta in zip(perguntas, respostas):
+            registro = {"pergunta": pergunta, "cidade": cidade, "cultura": cultura, "resposta": resposta}
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    os.replace(temporario, caminho)
+
+
+def em_lotes(itens, tamanho):
+    lote = []
+    for item in itens:
+        lote.append(item)
+        if len(lote) == tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def buscar_trechos_lote(busca, emb_fn, perguntas, culturas, mapa_culturas, n_results):
+    """
+    Trechos (lista de documents) de cada pergunta, alinhados com a entrada.
+    None = cultura sem manual cadastrado.
+    """
+    grupos = defaultdict(dict)  # cultura no banco -> {pergunta: [posições]}
+    for i, (pergunta, cultura) in enumerate(zip(perguntas, culturas)):
+        alvo = mapa_culturas.get(cultura)
+        if alvo:
+            grupos[alvo].setdefault(pergunta, []).append(i)
+
+    # BuscaHibrida / cache de consultas recebem o texto e vetorizam só o que vai à busca vetorial;
+    # a coleção pura recebe um lote só de embeddings para todas as perguntas distintas
+    por_texto = getattr(busca, "consulta_por_texto", False)
+    distintas = [] if por_texto else list(dict.fromkeys(p for posicoes in grupos.values() for p in posicoes))
+    vetores = dict(zip(distintas, emb_fn(distintas))) if distintas else {}
+
+    trechos = [None] * len(perguntas)
+    for alvo, posicoes in grupos.items():
+        textos = list(posicoes)
+        consulta = {"n_results": n_results, "where": {"cultura": alvo}}
+        if por_texto:
+            consulta.update(query_texts=textos, embedding_function=emb_fn)
+        else:
+            consulta["query_embeddings"] = [vetores[t] for t in textos]
+        resposta = busca.query(**consulta)
+        for texto, documentos in zip(textos, resposta["documents"]):
+            for i in posicoes[texto]:
+                trechos[i] = documentos
+    return trechos
+
+
+def responder_em_lote(itens, responder, tamanho_lote=TAMANHO_LOTE):
+    """
+    Aplica responder(lote de (pergunta, cidade, cultura)) -> respostas, lote a lote, sobre uma
+    lista ou iterador. Devolve as respostas na ordem da entrada e imprime a vazão.
+    """
+    respostas = []
+    inicio = time.perf_counter()
+    for lote in em_lotes(map(item_pergunta, itens), tamanho_lote):
+        respostas += responder(lote)
+    segundos = time.perf_counter() - inicio
+    vazao = len(respostas) / segundos if segundos > 0 else float("inf")
+    print(f"⚡ {len(respostas):,} perguntas em {segundos:.2f}s = {vazao:,.1f} perguntas/s")
+    return respostas
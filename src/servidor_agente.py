@@ -0,0 +1,294 @@
+import sys
+import json
+import time
+import queue
+import bisect
+import argparse
+import importlib
+import threading
+import statistics
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- SERVIDOR HTTP DO AGENTE (ML + RAG) COM MICRO-LOTES ---
+# Sobe o agente do 08_agente_llm uma vez só (banco, modelo, índice de janelas) e atende
+# requisições concorrentes (uma thread por conexão, só biblioteca padrão):
+#   POST /perguntar  {"pergunta": ..., "cidade": ..., "cultura": ...} -> {"resposta": ...}
+#   GET  /metricas   histogramas de latência (total e por etapa) e tamanho médio dos micro-lotes
+#   GET  /saude
+# Micro-lotes: predict do modelo e embedding das perguntas não são chamados por requisição.
+# Cada chamada entra numa fila; uma thread junta o que chegar numa janela curta (JANELA_MS,
+# até MAX_LOTE itens) e faz uma chamada só para o lote, devolvendo o resultado de cada um.
+# Com muitas requisições simultâneas isso troca N chamadas pequenas por poucas grandes.
+# Teste de carga: python servidor_agente.py --carga http://127.0.0.1:8000 (vazão e p99).
+
+PORTA = 8000
+JANELA_MS = 5                 # Espera máxima para juntar chamadas num micro-lote
+MAX_LOTE = 64
+TIMEOUT_S = 30.0              # Tempo máximo de espera por um resultado de micro-lote
+LIMITES_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)  # Faixas dos histogramas
+
+
+class AgrupadorLotes:
+    """Junta chamadas concorrentes de funcao(item) em chamadas funcao_lote([itens]) -> [resultados]."""
+
+    def __init__(self, nome, funcao_lote, janela_ms=JANELA_MS, max_lote=MAX_LOTE):
+        self.nome = nome
+        self.funcao_lote = funcao_lote
+        self.janela_s = janela_ms / 1000
+        self.max_lote = max_lote
+        self.lotes = 0
+        self.itens = 0
+        self._fila = queue.Queue()
+        threading.Thread(target=self._laco, name=f"lote-{nome}", daemon=True).start()
+
+    def enviar(self, item):
+        """Future com o resultado do item (sai no próximo micro-lote)."""
+        futuro = Future()
+        self._fila.put((item, futuro))
+        return futuro
+
+    def __call__(self, item, timeout=TIMEOUT_S):
+        return self.enviar(item).result(timeout)
+
+    def _laco(self):
+        while True:
+            lote = [self._fila.get()]
+            limite = time.perf_counter() + self.janela_s
+            while len(lote) < self.max_lote:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._fila.get(timeout=restante))
+                except queue.Empty:
+                    break
+            itens, futuros = zip(*lote)
+            try:
+                resultados = self.funcao_lote(list(itens))
+            except Exception as e:
+                for futuro in futuros:
+                    futuro.set_exception(e)
+                continue
+            self.lotes += 1
+            self.itens += len(lote)
+            for futuro, resultado in zip(futuros, resultados):
+                futuro.set_result(resultado)
+
+    def estatisticas(self):
+        return {"lotes": self.lotes, "itens": self.itens, "media_por_lote": self.itens / self.lotes if self.lotes else 0.0}
+
+
+class Histograma:
+    """
+    Contagem por faixa de latência (ms); percentil = limite superior da faixa em que ele cai
+    (None se cair acima do maior limite).
+    """
+
+    def __init__(self, limites=LIMITES_MS):
+        self.limites = list(limites)
+        self.contagens = [0] * (len(self.limites) + 1)  # Última faixa: acima do maior limite
+        self.total = 0
+        self.soma_ms = 0.0
+        self._trava = threading.Lock()
+
+    def observar(self, segundos):
+        ms = segundos * 1000
+        with self._trava:
+            self.contagens[bisect.bisect_left(self.limites, ms)] += 1
+            self.total += 1
+            self.soma_ms += ms
+
+    def percentil(self, p):
+        if not self.total:
+            return 0.0
+        alvo, acumulado = p / 100 * self.total, 0
+        for i, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return self.limites[i] if i < len(self.limites) else None
+        return None
+
+    def resumo(self):
+        faixas = {f"<={limite}": c for limite, c in zip(self.limites, self.contagens)}
+        faixas[f">{self.limites[-1]}"] = self.contagens[-1]
+        return {"total": self.total, "media_ms": self.soma_ms / self.total if self.total else 0.0,
+                "p50_ms": self.percentil(50), "p95_ms": self.percentil(95), "p99_ms": self.percentil(99),
+                "faixas_ms": faixas}
+
+
+class ServicoAgente:
+    """Agente do 08_agente_llm carregado uma vez, com predict e embedding em micro-lotes."""
+
+    def __init__(self, janela_ms=JANELA_MS, max_lote=MAX_LOTE):
+        self.agente = importlib.import_module("08_agente_llm")
+        self.agente.aquecer(carregar_modelo=True)
+        self.predicoes = AgrupadorLotes("predict", lambda linhas: list(self.agente.modelo_ml.obter().predict(linhas)),
+                                        janela_ms, max_lote)
+        self.embeddings = AgrupadorLotes("embedding", lambda textos: self.agente.embedding.obter()(textos),
+                                         janela_ms, max_lote)
+        self.latencias = {etapa: Histograma() for etapa in ("total", "zarc", "embedding", "busca", "predict", "llm")}
+        self._local = threading.local()  # Tempo de embedding da requisição em curso (descontado da busca)
+
+    def _medir(self, etapa, inicio):
+        agora = time.perf_counter()
+        self.latencias[etapa].observar(agora - inicio)
+        return agora
+
+    def _vetorizar(self, textos):
+        inicio = time.perf_counter()
+        vetores = [self.embeddings(texto) for texto in textos]
+        segundos = time.perf_counter() - inicio
+        self.latencias["embedding"].observar(segundos)
+        self._local.embedding_s = getattr(self._local, "embedding_s", 0.0) + segundos
+        return vetores
+
+    def responder(self, pergunta, cidade, cultura):
+        agente = self.agente
+        inicio = etapa = time.perf_counter()
+        indice = agente.janelas.obter()
+        melhor = indice.melhor(cidade, cultura) if indice is not None else None
+        etapa = self._medir("zarc", etapa)
+        if melhor is None:
+            self._medir("total", inicio)
+            return "Sem dados ZARC encontrados."
+
+        # O predict vai para o micro-lote e corre enquanto esta thread faz a busca nos manuais
+        previsao = self.predicoes.enviar(agente.entrada_ml(melhor))
+        busca = agente.busca_manuais.obter()
+        consulta = {"n_results": 1, "where": {"cultura": agente.MAPA_CULTURAS.get(cultura)}}
+        self._local.embedding_s = 0.0
+        if getattr(busca, "consulta_por_texto", False):
+            # Cache e BM25 primeiro; o micro-lote de embeddings só é usado se a busca vetorial precisar
+            consulta.update(query_texts=[pergunta], embedding_function=self._vetorizar)
+        else:
+            consulta["query_embeddings"] = self._vetorizar([pergunta])
+        docs = busca.query(**consulta)
+        texto_tecnico = docs['documents'][0][0] if docs['documents'] and docs['documents'][0] else "Sem manual."
+        agora = time.perf_counter()
+        self.latencias["busca"].observar(agora - etapa - self._local.embedding_s)  # Embedding já tem histograma próprio
+        etapa = agora
+        valor = previsao.result(TIMEOUT_S)
+        etapa = self._medir("predict", etapa)
+        resposta = agente.chamar_llm_real(agente.montar_prompt(cidade, cultura, valor, texto_tecnico))
+        self._medir("llm", etapa)
+        self._medir("total", inicio)
+        return resposta
+
+    def metricas(self):
+        return {"latencias": {etapa: h.resumo() for etapa, h in self.latencias.items()},
+                "micro_lotes": {a.nome: a.estatisticas() for a in (self.predicoes, self.embeddings)}}
+
+
+def criar_handler(servico):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Permite keep-alive para clientes que reaproveitam a conexão
+
+        def _json(self, status, corpo):
+            dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self):
+            if self.path == "/saude":
+                self._json(200, {"status": "ok"})
+            elif self.path == "/metricas":
+                self._json(200, servico.metricas())
+            else:
+                self._json(404, {"erro": "rota desconhecida"})
+
+        def do_POST(self):
+            if self.path != "/perguntar":
+                self._json(404, {"erro": "rota desconhecida"})
+                return
+            try:
+                corpo = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not isinstance(corpo, dict):
+                    raise ValueError("o corpo deve ser um objeto JSON")
+                pergunta, cidade, cultura = corpo["pergunta"], corpo["cidade"], corpo["cultura"]
+            except (ValueError, KeyError) as e:
+                self._json(400, {"erro": f"JSON inválido ou campo faltando: {e}"})
+                return
+            try:
+                self._json(200, {"resposta": servico.responder(pergunta, cidade, cultura)})
+            except Exception as e:
+                self._json(500, {"erro": str(e)})
+
+        def log_message(self, formato, *args):
+            pass  # Uma linha por requisição derrubaria a vazão; use /metricas
+
+    return Handler
+
+
+class ServidorHTTP(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # Fila de conexões do listen(); o padrão (5) faz o cliente esperar ~1s em rajadas
+
+
+def servir(porta=PORTA, janela_ms=JANELA_MS, max_lote=MAX_LOTE):
+    servico = ServicoAgente(janela_ms, max_lote)
+    servidor = ServidorHTTP(("0.0.0.0", porta), criar_handler(servico))
+    print(f"🌐 Agente AgroIA ouvindo em http://0.0.0.0:{porta} (POST /perguntar, GET /metricas)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+# --- TESTE DE CARGA ---
+PERGUNTAS_CARGA = [
+    {"pergunta": "Quais doenças devo preocupar?", "cidade": "Rio Verde", "cultura": "Soja"},
+    {"pergunta": "Qual a adubação recomendada?", "cidade": "Cristalina", "cultura": "Milho"},
+    {"pergunta": "Como controlar pragas?", "cidade": "Rio Verde", "cultura": "Tomate Mesa"},
+]
+
+
+def teste_carga(url, total=1000, concorrencia=16, perguntas=PERGUNTAS_CARGA):
+    """Dispara `total` perguntas com `concorrencia` clientes simultâneos; imprime vazão, p50 e p99."""
+    endereco = url.rstrip("/") + "/perguntar"
+
+    def uma(i):
+        dados = json.dumps(perguntas[i % len(perguntas)]).encode("utf-8")
+        requisicao = urllib.request.Request(endereco, data=dados, headers={"Content-Type": "application/json"})
+        inicio = time.perf_counter()
+        try:
+            with urllib.request.urlopen(requisicao, timeout=TIMEOUT_S) as resposta:
+                resposta.read()
+            return time.perf_counter() - inicio, True
+        except Exception:
+            return time.perf_counter() - inicio, False
+
+    print(f"--- 🔥 Teste de carga: {total:,} perguntas, {concorrencia} clientes -> {endereco} ---")
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        resultados = list(executor.map(uma, range(total)))
+    segundos = time.perf_counter() - inicio
+
+    tempos = sorted(t for t, _ in resultados)
+    erros = sum(not ok for _, ok in resultados)
+    p99 = tempos[min(len(tempos) - 1, int(0.99 * len(tempos)))]
+    print(f"Vazão: {total / segundos:,.1f} perguntas/s | erros: {erros}")
+    print(f"Latência: p50 {statistics.median(tempos) * 1000:.1f} ms | p99 {p99 * 1000:.1f} ms | máx {tempos[-1] * 1000:.1f} ms")
+    return {"vazao": total / segundos, "p50_s": statistics.median(tempos), "p99_s": p99, "erros": erros}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor HTTP do agente AgroIA (e cliente de teste de carga)")
+    parser.add_argument("--porta", type=int, default=PORTA)
+    parser.add_argument("--janela-ms", type=float, default=JANELA_MS, help="Janela dos micro-lotes de predict/embedding")
+    parser.add_argument("--max-lote", type=int, default=MAX_LOTE)
+    parser.add_argument("--carga", metavar="URL", help="Em vez de servir, roda o teste de carga contra URL")
+    parser.add_argument("--total", type=int, default=1000, help="Perguntas do teste de carga")
+    parser.add_argument("--concorrencia", type=int, default=16, help="Clientes simultâneos do teste de carga")
+    args = parser.parse_args()
+
+    if args.carga:
+        resultado = teste_carga(args.carga, args.total, args.concorrencia)
+        sys.exit(1 if resultado["erros"] else 0)
+    servir(args.porta, args.janela_ms, args.max_lote)
@@ -0,0 +1,98 @@
+import os
+import inspect
+import numpy as np
+
+from cache_vetores import CacheVetores
+
+# --- CODIFICADOR DE TEXTO EM VETORES (SENTENCE-TRANSFORMERS) ---
+# - encode em lotes (batch_size configurável), em vez de uma chamada por parágrafo
+# - pool opcional de processos (um por núcleo de CPU) para lotes grandes
+# - vetores em float32 (normalizados por padrão: mesmo formato para Milvus e índices próprios)
+# - cache opcional em disco (cache_vetores.py): texto já visto não passa pelo modelo
+# O sentence-transformers só é importado (e o modelo carregado) no primeiro texto fora do cache.
+
+MODELO_PADRAO = "all-MiniLM-L6-v2"
+DIMENSAO_PADRAO = 384
+TAMANHO_BATCH_PADRAO = 64
+DIMENSOES_CONHECIDAS = {MODELO_PADRAO: DIMENSAO_PADRAO}
+
+
+def espaco_cache(modelo, normalizar):
+    """Identificador do cache: o mesmo texto tem vetores diferentes com/sem normalização."""
+    return f"{modelo}|norm={int(bool(normalizar))}"
+
+
+def abrir_cache(pasta, modelo=MODELO_PADRAO, normalizar=True, capacidade=None):
+    """Cache de vetores compartilhado por todos os scripts (pasta None = sem cache)."""
+    if pasta is None:
+        return None
+    dimensao = DIMENSOES_CONHECIDAS.get(modelo)
+    if dimensao is None:
+        raise ValueError(f"Dimensão desconhecida para o modelo {modelo}: cadastre em DIMENSOES_CONHECIDAS")
+    argumentos = {"capacidade": capacidade} if capacidade else {}
+    return CacheVetores(pasta, espaco_cache(modelo, normalizar), dimensao, **argumentos)
+
+
+class Codificador:
+    def __init__(self, modelo=MODELO_PADRAO, batch_size=TAMANHO_BATCH_PADRAO, processos=0, dispositivo="cpu",
+                 normalizar=True, pasta_cache=None):
+        """
+        processos: 0 = encode no próprio processo; N > 1 = pool com N processos
+        (vale a pena para dezenas de milhares de textos; para poucos, o custo de subir o pool domina).
+        pasta_cache: pasta do cache de vetores em disco (None = sem cache).
+        """
+        self.nome_modelo = modelo
+        self.batch_size = batch_size
+        self.processos = processos
+        self.dispositivo = dispositivo
+        self.normalizar = normalizar
+        self.cache = abrir_cache(pasta_cache, modelo, normalizar)
+        self._modelo = None
+        self._pool = None
+
+    @property
+    def modelo(self):
+        if self._modelo is None:
+            from sentence_transformers import SentenceTransformer
+            self._modelo = SentenceTransformer(self.nome_modelo, device=self.dispositivo)
+            if self.processos and self.processos > 1:
+                self._pool = self._modelo.start_multi_process_pool([self.dispositivo] * self.processos)
+        return self._modelo
+
+    @property
+    def dimensao(self):
+        if self.nome_modelo in DIMENSOES_CONHECIDAS:
+            return DIMENSOES_CONHECIDAS[self.nome_modelo]
+        return self.modelo.get_sentence_embedding_dimension()
+
+    def _codificar_modelo(self, textos):
+        modelo = self.modelo
+        if self._pool is None:
+            vetores = modelo.encode(textos, batch_size=self.batch_size, normalize_embeddings=self.normalizar,
+                                    convert_to_numpy=True, show_progress_bar=False)
+        elif "pool" in inspect.signature(modelo.encode).parameters:
+            # sentence-transformers >= 5: o pool é passado para o próprio encode
+            vetores = modelo.encode(textos, pool=self._pool, batch_size=self.batch_size,
+                                    normalize_embeddings=self.normalizar, convert_to_numpy=True)
+        else:
+            vetores = modelo.encode_multi_process(textos, self._pool, batch_size=self.batch_size,
+                                                  normalize_embeddings=self.normalizar)
+        return np.asarray(vetores, dtype=np.float32)
+
+    def codificar(self, textos):
+        """Lista de textos -> array (n, dimensao) float32."""
+        textos = list(textos)
+        if not textos:
+            return np.empty((0, self.dimensao), dtype=np.float32)
+        if self.cache is not None:
+            return self.cache.codificar(textos, self._codificar_modelo)
+        return self._codificar_modelo(textos)
+
+    def fechar(self):
+        if self._pool is not None:
+            self._modelo.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+
+def processos_padrao():
+    return os.cpu_count() or 1
@@ -0,0 +1,167 @@
+import os
+import re
+import hashlib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# --- INGESTÃO EM STREAMING DAS TÁBUAS OFICIAIS DO ZARC ---
+# As portarias do ZARC (dados abertos do MAPA) chegam a dezenas de milhões de linhas.
+# Lemos cada CSV em pedaços (chunks), normalizamos para o esquema do bruto
+# (o mesmo que processar_dados() espera) e anexamos num dataset Parquet particionado.
+# O pico de memória depende do tamanho do chunk, não do tamanho do arquivo.
+
+NUM_DECENDIOS = 36
+TAMANHO_CHUNK_PADRAO = 500_000
+PARTICOES = ["uf", "cultura"]
+
+# Esquema final (igual ao CSV gerado pelo passo 01)
+ESQUEMA_BRUTO = pa.schema([
+    ("uf", pa.string()),
+    ("municipio", pa.string()),
+    ("cod_ibge", pa.int64()),
+    ("cultura", pa.string()),
+    ("safra", pa.string()),
+    ("solo", pa.string()),
+    ("decendio", pa.int16()),
+    ("risco", pa.string()),
+])
+
+# Nomes de coluna usados nas tábuas oficiais -> nome no nosso esquema
+# (comparação sem diferenciar maiúsculas/minúsculas)
+MAPA_COLUNAS = {
+    "uf": "uf",
+    "municipio": "municipio", "nome_municipio": "municipio",
+    "geocodigo": "cod_ibge", "cod_ibge": "cod_ibge", "cod_municipio": "cod_ibge",
+    "nome_cultura": "cultura", "cultura": "cultura",
+    "cod_solo": "solo", "solo": "solo", "tipo_solo": "solo",
+    "safra": "safra", "safraini": "safra_ini", "safrafin": "safra_fin",
+    "decendio": "decendio", "risco": "risco",
+}
+
+
+def _padronizar_colunas(chunk):
+    renomear = {c: MAPA_COLUNAS[c.strip().lower()] for c in chunk.columns if c.strip().lower() in MAPA_COLUNAS}
+    return chunk.rename(columns=renomear)
+
+
+def _colunas_decendio(chunk):
+    """Colunas dec1..dec36 do formato "largo" da tábua oficial (na ordem do decêndio)."""
+    por_numero = {}
+    for coluna in chunk.columns:
+        nome = coluna.strip().lower()
+        if nome.startswith("dec") and nome[3:].isdigit():
+            por_numero[int(nome[3:])] = coluna
+    return [por_numero[d] for d in range(1, NUM_DECENDIOS + 1)] if len(por_numero) == NUM_DECENDIOS else []
+
+
+def _normalizar_risco(valores):
+    """20/30/40 ficam como texto; 0, vazio ou acima de 40 viram "INAPTO" (igual ao simulador)."""
+    numerico = pd.to_numeric(pd.Series(valores), errors="coerce").to_numpy()
+    risco = np.where(np.isnan(numerico) | (numerico <= 0) | (numerico > 40), "INAPTO", "")
+    validos = risco == ""
+    risco = risco.astype(object)
+    risco[validos] = numerico[validos].astype(int).astype(str)
+    return risco
+
+
+def _normalizar_solo(valores):
+    """Códigos numéricos (1, 2, 3...) viram "AD1", "AD2"...; valores já no padrão ficam como estão."""
+    solo = pd.Series(valores, dtype="string").str.strip().str.upper()
+    e_codigo = solo.str.fullmatch(r"\d+").fillna(False).astype(bool)
+    return solo.where(~e_codigo, "AD" + solo).to_numpy(dtype=object)
+
+
+def normalizar_chunk(chunk):
+    """
+    Converte um pedaço da tábua (formato longo ou largo com dec1..dec36)
+    para o esquema do bruto. Retorna uma tabela Arrow.
+    """
+    chunk = _padronizar_colunas(chunk)
+
+    if "safra" not in chunk.columns and {"safra_ini", "safra_fin"} <= set(chunk.columns):
+        chunk["safra"] = chunk["safra_ini"].astype(str) + "/" + chunk["safra_fin"].astype(str)
+
+    colunas_dec = _colunas_decendio(chunk)
+    if colunas_dec:
+        # Formato largo -> longo sem melt: repete as dimensões 36x e "achata" a matriz de riscos
+        n = len(chunk)
+        def repetir(coluna):
+            return np.repeat(chunk[coluna].to_numpy(), NUM_DECENDIOS)
+        dados = {c: repetir(c) for c in ["uf", "municipio", "cod_ibge", "cultura", "safra", "solo"]}
+        dados["decendio"] = np.tile(np.arange(1, NUM_DECENDIOS + 1, dtype=np.int16), n)
+        dados["risco"] = chunk[colunas_dec].to_numpy().reshape(-1)
+    else:
+        faltando = [c for c in ESQUEMA_BRUTO.names if c not in chunk.columns]
+        if faltando:
+            raise ValueError(f"Formato de tábua ZARC não reconhecido (faltando: {faltando})")
+        dados = {c: chunk[c].to_numpy() for c in ESQUEMA_BRUTO.names}
+
+    df = pd.DataFrame(dados)
+    df["uf"] = df["uf"].astype(str).str.strip().str.upper()
+    df["municipio"] = df["municipio"].astype(str).str.strip()
+    df["cultura"] = df["cultura"].astype(str).str.strip()
+    df["cod_ibge"] = pd.to_numeric(df["cod_ibge"], errors="coerce").fillna(0).astype("int64")
+    df["decendio"] = pd.to_numeric(df["decendio"], errors="coerce").fillna(0).astype("int16")
+    df["solo"] = _normalizar_solo(df["solo"])
+    df["risco"] = _normalizar_risco(df["risco"])
+
+    return pa.Table.from_pandas(df[ESQUEMA_BRUTO.names], schema=ESQUEMA_BRUTO, preserve_index=False)
+
+
+def prefixo_fragmentos(arquivo):
+    """Nome do arquivo + hash do caminho completo: tábuas homônimas em pastas diferentes não se misturam."""
+    nome = os.path.splitext(os.path.basename(arquivo))[0]
+    caminho = os.path.normcase(os.path.abspath(arquivo))
+    return f"{nome}-{hashlib.sha1(caminho.encode('utf-8')).hexdigest()[:12]}"
+
+
+def remover_fragmentos(destino, arquivo):
+    """
+    Apaga os pedaços que uma ingestão anterior deste arquivo deixou em todas as partições
+    (inclusive os do formato antigo "<nome>-<chunk>-<i>.parquet", sem hash). Retorna quantos.
+    """
+    prefixo = prefixo_fragmentos(arquivo)
+    nome = os.path.splitext(os.path.basename(arquivo))[0]
+    antigo = re.compile(rf"{re.escape(nome)}-\d{{5}}-\d+\.parquet")
+    removidos = 0
+    for pasta, _, nomes in os.walk(destino):
+        for fragmento in nomes:
+            if fragmento.startswith(prefixo + "-") or antigo.fullmatch(fragmento):
+                os.remove(os.path.join(pasta, fragmento))
+                removidos += 1
+    return removidos
+
+
+def ingerir_zarc_streaming(arquivos, destino, tamanho_chunk=TAMANHO_CHUNK_PADRAO, sep=";", encoding="utf-8"):
+    """
+    Lê as tábuas em chunks e anexa no dataset Parquet particionado por uf/cultura.
+    Reingerir o mesmo arquivo substitui os pedaços dele (os antigos são apagados antes,
+    mesmo que agora sejam menos chunks ou de outro tamanho).
+    """
+    os.makedirs(destino, exist_ok=True)
+    total = 0
+
+    for arquivo in arquivos:
+        prefixo = prefixo_fragmentos(arquivo)
+        removidos = remover_fragmentos(destino, arquivo)
+        if removidos:
+            print(f"🧹 {removidos} pedaços de uma ingestão anterior de {arquivo} apagados")
+        print(f"📥 Lendo {arquivo} em chunks de {tamanho_chunk:,} linhas...")
+
+        leitor = pd.read_csv(arquivo, sep=sep, encoding=encoding, dtype=str, chunksize=tamanho_chunk)
+        for n_chunk, chunk in enumerate(leitor):
+            tabela = normalizar_chunk(chunk)
+            pq.write_to_dataset(
+                tabela,
+                root_path=destino,
+                partition_cols=PARTICOES,
+                basename_template=f"{prefixo}-{n_chunk:05d}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+            total += tabela.num_rows
+            print(f"   ✅ Chunk {n_chunk}: {tabela.num_rows:,} linhas (acumulado: {total:,})")
+
+    print(f"Dataset particionado salvo em: {destino}")
+    return total
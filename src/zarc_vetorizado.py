@@ -0,0 +1,119 @@
+import os
+import time
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from motor_regras import compilar_regras, avaliar_regras
+
+# --- GERADOR VETORIZADO DA MATRIZ ZARC ---
+# Em vez de 4 loops aninhados (município > cultura > solo > decêndio),
+# montamos o "cubo" inteiro como arrays NumPy e escrevemos direto em Parquet.
+# Layout do cubo: (municípios, culturas, solos, decêndios) em ordem C,
+# o mesmo da ordem dos loops da versão original.
+
+NUM_DECENDIOS = 36
+SAFRA_PADRAO = "2025/2026"
+RISCO_BASE = 20          # Risco ótimo
+LIMITE_INAPTO = 40       # Acima disso vira "INAPTO"
+PROB_VARIACAO = 0.04     # Mesma chance do random.random() > 0.96
+
+
+def calcular_risco_base(culturas, tipos_solo, regras):
+    """
+    Tabela de risco base com shape (culturas, solos, decêndios), vinda do motor de regras.
+    Não depende do município, então é calculada uma vez só e depois "espalhada" (broadcast).
+    """
+    compiladas = compilar_regras(regras, culturas, tipos_solo)
+    return avaliar_regras(compiladas, (len(culturas), len(tipos_solo), NUM_DECENDIOS), RISCO_BASE)
+
+
+def _coluna_dicionario(indices, valores):
+    """Coluna Arrow dictionary-encoded (guarda só o índice de cada linha, não a string)."""
+    return pa.DictionaryArray.from_arrays(pa.array(indices), pa.array(valores, type=pa.string()))
+
+
+def gerar_matriz_zarc(municipios, culturas, tipos_solo, regras, seed=None, safra=SAFRA_PADRAO):
+    """
+    Gera a matriz ZARC completa (municípios × culturas × solos × decêndios) como uma tabela Arrow.
+    Mesmo esquema do CSV bruto: uf, municipio, cod_ibge, cultura, safra, solo, decendio, risco.
+    O risco base de cada cultura vem das `regras` (ver motor_regras.py).
+    """
+    n_mun, n_cult, n_solo = len(municipios), len(culturas), len(tipos_solo)
+    forma = (n_mun, n_cult, n_solo, NUM_DECENDIOS)
+    total = n_mun * n_cult * n_solo * NUM_DECENDIOS
+    linhas_por_mun = total // max(n_mun, 1)
+
+    tabela_risco = calcular_risco_base(culturas, tipos_solo, regras)
+
+    # 1. Risco: base espalhada + variação aleatória (gerador com semente = reprodutível)
+    rng = np.random.default_rng(seed)
+    risco = np.broadcast_to(tabela_risco, forma).reshape(-1).astype(np.int16)
+    risco += (rng.random(total, dtype=np.float32) < PROB_VARIACAO).astype(np.int16) * 10
+
+    # Formatação: número vira texto e > 40 vira "INAPTO" (via dicionário, sem loop)
+    valores = np.unique(risco)
+    rotulos = [str(v) if v <= LIMITE_INAPTO else "INAPTO" for v in valores]
+    rotulos_unicos = list(dict.fromkeys(rotulos))
+    mapa = np.array([rotulos_unicos.index(r) for r in rotulos], dtype=np.int8)
+    idx_risco = mapa[np.searchsorted(valores, risco)]
+    del risco
+
+    # 2. Colunas de dimensão (índices repetidos, sem criar strings por linha)
+    idx_mun = np.repeat(np.arange(n_mun, dtype=np.int32), linhas_por_mun)
+    idx_cult = np.tile(np.repeat(np.arange(n_cult, dtype=np.int16), n_solo * NUM_DECENDIOS), n_mun)
+    idx_solo = np.tile(np.repeat(np.arange(n_solo, dtype=np.int8), NUM_DECENDIOS), n_mun * n_cult)
+    decendio = np.tile(np.arange(1, NUM_DECENDIOS + 1, dtype=np.int16), n_mun * n_cult * n_solo)
+
+    ufs = sorted({m["uf"] for m in municipios})
+    idx_uf_mun = np.array([ufs.index(m["uf"]) for m in municipios], dtype=np.int8)
+    cod_ibge = np.array([m["cod_ibge"] for m in municipios], dtype=np.int64)
+
+    return pa.table({
+        "uf": _coluna_dicionario(idx_uf_mun[idx_mun], ufs),
+        "municipio": _coluna_dicionario(idx_mun, [m["nome"] for m in municipios]),
+        "cod_ibge": cod_ibge[idx_mun],
+        "cultura": _coluna_dicionario(idx_cult, list(culturas)),
+        "safra": _coluna_dicionario(np.zeros(total, dtype=np.int8), [safra]),
+        "solo": _coluna_dicionario(idx_solo, list(tipos_solo)),
+        "decendio": decendio,
+        "risco": _coluna_dicionario(idx_risco, rotulos_unicos),
+    })
+
+
+def salvar_parquet(tabela, arquivo_destino, row_group_size=1_000_000):
+    """Grava a tabela Arrow direto em Parquet (colunar, comprimido com zstd)."""
+    pq.write_table(tabela, arquivo_destino, compression="zstd", row_group_size=row_group_size)
+    return arquivo_destino
+
+
+def municipios_sinteticos(quantidade, uf="BR"):
+    """Lista fictícia de municípios (útil para benchmark em escala nacional)."""
+    return [{"cod_ibge": 1_000_000 + i, "nome": f"Município {i:04d}", "uf": uf} for i in range(quantidade)]
+
+
+def benchmark_geracao(culturas, tipos_solo, regras, n_municipios=5570, n_culturas=20, pasta_saida=None, seed=42):
+    """
+    Mede a vazão do gerador vetorizado em escala nacional (10M+ linhas por padrão:
+    5.570 municípios × 20 culturas × 3 solos × 36 decêndios = 12M).
+    """
+    culturas = list(culturas) + [f"Cultura {i}" for i in range(len(culturas), n_culturas)]
+    municipios = municipios_sinteticos(n_municipios)
+    total = n_municipios * len(culturas) * len(tipos_solo) * NUM_DECENDIOS
+    print(f"--- ⏱️ Benchmark ZARC Vetorizado: {total:,} linhas ---")
+
+    inicio = time.perf_counter()
+    tabela = gerar_matriz_zarc(municipios, culturas, tipos_solo, regras, seed=seed)
+    t_geracao = time.perf_counter() - inicio
+    print(f"Geração: {t_geracao:.2f}s ({total / t_geracao:,.0f} linhas/s) | Memória Arrow: {tabela.nbytes / 1e6:,.1f} MB")
+
+    if pasta_saida:
+        destino = os.path.join(pasta_saida, "benchmark_zarc_vetorizado.parquet")
+        inicio = time.perf_counter()
+        salvar_parquet(tabela, destino)
+        t_escrita = time.perf_counter() - inicio
+        tamanho = os.path.getsize(destino) / 1e6
+        print(f"Escrita Parquet: {t_escrita:.2f}s ({total / t_escrita:,.0f} linhas/s) | Arquivo: {tamanho:,.1f} MB")
+        os.remove(destino)
+
+    return {"linhas": total, "segundos_geracao": t_geracao, "linhas_por_segundo": total / t_geracao}
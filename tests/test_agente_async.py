@@ -0,0 +1,97 @@
+import time
+import asyncio
+import importlib
+
+import pytest
+
+from recursos_agente import Recurso
+
+agente = importlib.import_module("08_agente_llm")
+
+JANELA = {"risco_numerico": 20, "chuva_acumulada_decendio": 80.0, "temp": 24.0, "custo_ha_est": 4000.0, "solo": "AD2"}
+
+
+def _devagar(segundos, valor):
+    def fabrica():
+        time.sleep(segundos)
+        return valor
+    return fabrica
+
+
+class IndiceFalso:
+    def __init__(self, melhor):
+        self._melhor = melhor
+
+    def melhor(self, cidade, cultura):
+        return self._melhor
+
+
+class ModeloFalso:
+    def __init__(self, atraso_s):
+        self.atraso_s = atraso_s
+
+    def predict(self, linhas):
+        time.sleep(self.atraso_s)
+        return [55.0] * len(linhas)
+
+
+class BuscaFalsa:
+    def __init__(self, atraso_s):
+        self.atraso_s = atraso_s
+        self.consultas = []
+
+    def query(self, query_texts, n_results, where):
+        self.consultas.append(where)
+        time.sleep(self.atraso_s)
+        return {"documents": [["Semear com solo úmido."]]}
+
+
+@pytest.fixture
+def recursos(monkeypatch):
+    """Troca os recursos pesados do 08 por versões lentas; cada teste escolhe os atrasos."""
+    def trocar(melhor=JANELA, atraso_janelas=0.0, atraso_modelo=0.0, atraso_busca=0.0, atraso_abrir_busca=0.0):
+        busca = BuscaFalsa(atraso_busca)
+        monkeypatch.setattr(agente, "janelas", Recurso("janelas", _devagar(atraso_janelas, IndiceFalso(melhor))))
+        monkeypatch.setattr(agente, "modelo_ml", Recurso("modelo", lambda: ModeloFalso(atraso_modelo)))
+        monkeypatch.setattr(agente, "busca_manuais", Recurso("busca", _devagar(atraso_abrir_busca, busca)))
+        return busca
+    return trocar
+
+
+def _rodar(corrotina):
+    async def medir():
+        inicio = time.perf_counter()
+        resultado = await corrotina
+        return resultado, time.perf_counter() - inicio
+    return asyncio.run(medir())
+
+
+def test_ramos_rodam_ao_mesmo_tempo(recursos):
+    busca = recursos(atraso_janelas=0.15, atraso_modelo=0.15, atraso_busca=0.3)
+    resposta, segundos = _rodar(agente.agente_supremo_async("Quando plantar?", "Rio Verde", "Soja", timeout_s=5))
+    assert "55.0 sacas/ha" in resposta
+    assert "Semear com solo úmido." in resposta
+    assert busca.consultas == [{"cultura": "soja"}]
+    assert segundos < 0.5  # max(0.3, 0.3), não a soma 0.6
+
+
+def test_timeout_devolve_mensagem(recursos):
+    recursos(atraso_modelo=0.5)
+    resposta, segundos = _rodar(agente.agente_supremo_async("Quando plantar?", "Rio Verde", "Soja", timeout_s=0.1))
+    assert resposta.startswith("⏱️ Tempo esgotado (0.1s)")
+    assert "Soja em Rio Verde" in resposta
+    assert segundos < 1.0
+
+
+def test_sem_zarc_cancela_a_busca_nos_manuais(recursos):
+    busca = recursos(melhor=None, atraso_abrir_busca=0.2)
+
+    async def responder_e_esperar():
+        resposta = await agente._pipeline_async("Quando plantar?", "Cidade X", "Soja")
+        await asyncio.sleep(0.3)  # Tempo de sobra para a busca ter consultado, se não tivesse sido cancelada
+        return resposta
+
+    resposta, segundos = _rodar(responder_e_esperar())
+    assert resposta == "Sem dados ZARC encontrados."
+    assert segundos < 0.45  # Não esperou a busca abrir
+    assert busca.consultas == []
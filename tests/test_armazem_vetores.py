@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from armazem_vetores import ColecaoMilvus, ColecaoNumpy, JANELA_CONSULTA_MILVUS, paginas
+from indice_incremental import ids_existentes
+
+
+class ClienteMilvusFalso:
+    """Stand-in do MilvusClient: recusa offset + limit além da janela, como o servidor real."""
+
+    def __init__(self, n):
+        self.linhas = [{"id": f"f{i:05d}", "vector": [float(i), 1.0], "texto": f"trecho {i}", "topico": "soja"}
+                       for i in range(n)]
+        self.iteradores_fechados = 0
+
+    def has_collection(self, collection_name):
+        return True
+
+    def query(self, collection_name, filter="", output_fields=None, ids=None, limit=None, offset=0):
+        if ids is not None:
+            return [linha for linha in self.linhas if linha["id"] in ids]
+        if offset + limit > JANELA_CONSULTA_MILVUS:
+            raise ValueError("invalid max query result window")
+        return self.linhas[offset:offset + limit]
+
+    def query_iterator(self, collection_name, batch_size=1000, filter="", output_fields=None):
+        cliente, restantes = self, list(self.linhas)
+
+        class Iterador:
+            def next(self):
+                lote, restantes[:] = restantes[:batch_size], restantes[batch_size:]
+                return lote
+
+            def close(self):
+                cliente.iteradores_fechados += 1
+
+        return Iterador()
+
+
+def test_milvus_le_alem_da_janela():
+    n = JANELA_CONSULTA_MILVUS + 1000
+    colecao = ColecaoMilvus(ClienteMilvusFalso(n), "agro")
+    assert len(ids_existentes(colecao)) == n
+    assert colecao.client.iteradores_fechados == 1
+
+    pagina = colecao.get(include=["documents", "metadatas", "embeddings"], limit=10, offset=JANELA_CONSULTA_MILVUS)
+    assert pagina["ids"][0] == f"f{JANELA_CONSULTA_MILVUS:05d}"
+    assert pagina["documents"][-1] == f"trecho {JANELA_CONSULTA_MILVUS + 9}"
+    assert pagina["metadatas"][0] == {"topico": "soja"}
+    assert pagina["embeddings"].shape == (10, 2)
+
+
+@pytest.mark.parametrize("n", [0, 7, 10, 23])
+def test_paginas_por_offset(n):
+    colecao = ColecaoNumpy()
+    vetores = np.random.default_rng(0).normal(size=(n, 4))
+    colecao.upsert([f"id{i}" for i in range(n)], [f"t{i}" for i in range(n)], [{}] * n, embeddings=vetores)
+    lidas = list(paginas(colecao, include=["documents"], tamanho_pagina=5))
+    assert all(0 < len(p["ids"]) <= 5 for p in lidas)
+    assert [i for p in lidas for i in p["ids"]] == [f"id{i}" for i in range(n)]
@@ -0,0 +1,153 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from baixador import BaixadorDocumentos, DownloadInvalido, BAIXADO, RETOMADO, INALTERADO, VERIFICADO
+
+CONTEUDO = bytes(range(256)) * 400  # 100 KiB
+
+
+class ServidorArquivos:
+    """Stand-in local com ETag forte, Range/If-Range, 304, 416 e corte programado no meio do corpo."""
+
+    def __init__(self, conteudo=CONTEUDO, etag='"v1"'):
+        self.conteudo = conteudo
+        self.etag = etag
+        self.cortar_em = None  # Bytes enviados antes de fechar a conexão (Content-Length anuncia o total)
+        self.pedidos = []      # Cabeçalhos relevantes de cada GET
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _enviar(self, status, corpo, cabecalhos=()):
+                self.send_response(status)
+                self.send_header("ETag", servidor.etag)
+                self.send_header("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")
+                self.send_header("Content-Length", str(len(corpo)))
+                for chave, valor in cabecalhos:
+                    self.send_header(chave, valor)
+                self.end_headers()
+                if servidor.cortar_em is not None:
+                    self.wfile.write(corpo[:servidor.cortar_em])
+                    servidor.cortar_em = None
+                    self.close_connection = True
+                else:
+                    self.wfile.write(corpo)
+
+            def do_GET(self):
+                cabecalhos = {k: self.headers.get(k) for k in ("Range", "If-Range", "If-None-Match")}
+                servidor.pedidos.append(cabecalhos)
+                total = len(servidor.conteudo)
+                if cabecalhos["If-None-Match"] == servidor.etag:
+                    self.send_response(304)
+                    self.send_header("ETag", servidor.etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                faixa = cabecalhos["Range"]
+                if faixa and cabecalhos["If-Range"] in (None, servidor.etag):
+                    inicio = int(faixa.split("=")[1].rstrip("-"))
+                    if inicio >= total:
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{total}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    self._enviar(206, servidor.conteudo[inicio:], [("Content-Range", f"bytes {inicio}-{total - 1}/{total}")])
+                else:
+                    self._enviar(200, servidor.conteudo)
+
+        self.http = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.http.server_address[1]}/manual.pdf"
+        threading.Thread(target=self.http.serve_forever, daemon=True).start()
+
+    def fechar(self):
+        self.http.shutdown()
+        self.http.server_close()
+
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorArquivos()
+    yield servidor
+    servidor.fechar()
+
+
+def _ler(pasta, nome="manual.pdf"):
+    with open(os.path.join(pasta, nome), "rb") as f:
+        return f.read()
+
+
+def test_download_e_verificacao(tmp_path, servidor):
+    baixador = BaixadorDocumentos(str(tmp_path), tentativas=0)
+    assert baixador.baixar("manual.pdf", servidor.url) == BAIXADO
+    assert _ler(tmp_path) == CONTEUDO
+    assert BaixadorDocumentos(str(tmp_path)).baixar("manual.pdf", servidor.url) == VERIFICADO
+    assert len(servidor.pedidos) == 1
+
+
+def test_download_truncado_retoma_com_range(tmp_path, servidor):
+    servidor.cortar_em = 30_000
+    baixador = BaixadorDocumentos(str(tmp_path), tentativas=0)
+    with pytest.raises(DownloadInvalido):
+        baixador.baixar("manual.pdf", servidor.url)
+    assert not os.path.exists(tmp_path / "manual.pdf")
+    assert os.path.getsize(tmp_path / "manual.pdf.part") == 30_000
+
+    # Outra execução (registro relido do disco) continua de onde parou
+    baixador = BaixadorDocumentos(str(tmp_path), tentativas=0)
+    assert baixador.baixar("manual.pdf", servidor.url) == RETOMADO
+    assert servidor.pedidos[-1] == {"Range": "bytes=30000-", "If-Range": '"v1"', "If-None-Match": None}
+    assert _ler(tmp_path) == CONTEUDO
+    assert baixador.verificar("manual.pdf")
+
+
+def test_arquivo_mudou_no_servidor_vem_inteiro(tmp_path, servidor):
+    servidor.cortar_em = 30_000
+    baixador = BaixadorDocumentos(str(tmp_path), tentativas=0)
+    with pytest.raises(DownloadInvalido):
+        baixador.baixar("manual.pdf", servidor.url)
+
+    servidor.conteudo, servidor.etag = CONTEUDO[::-1], '"v2"'
+    assert baixador.baixar("manual.pdf", servidor.url) == BAIXADO  # If-Range não bate: 200 com o arquivo novo
+    assert servidor.pedidos[-1]["If-Range"] == '"v1"'
+    assert _ler(tmp_path) == CONTEUDO[::-1]
+
+
+def test_parcial_maior_que_o_arquivo_recomeca(tmp_path, servidor):
+    baixador = BaixadorDocumentos(str(tmp_path), tentativas=0)
+    baixador._registrar("manual.pdf", {"url": servidor.url, "parcial": {"etag": '"v1"', "last_modified": None}})
+    with open(tmp_path / "manual.pdf.part", "wb") as f:
+        f.write(b"x" * (len(CONTEUDO) + 10))
+
+    assert baixador.baixar("manual.pdf", servidor.url) == BAIXADO
+    assert servidor.pedidos[0]["Range"] == f"bytes={len(CONTEUDO) + 10}-"  # 416
+    assert servidor.pedidos[1]["Range"] is None
+    assert _ler(tmp_path) == CONTEUDO
+
+
+def test_revalidacao_304_nao_baixa(tmp_path, servidor):
+    baixador = BaixadorDocumentos(str(tmp_path), tentativas=0)
+    baixador.baixar("manual.pdf", servidor.url)
+    assert baixador.baixar("manual.pdf", servidor.url, revalidar=True) == INALTERADO
+    assert servidor.pedidos[-1]["If-None-Match"] == '"v1"'
+
+    servidor.conteudo, servidor.etag = CONTEUDO[:1000], '"v2"'
+    assert baixador.baixar("manual.pdf", servidor.url, revalidar=True) == BAIXADO
+    assert _ler(tmp_path) == CONTEUDO[:1000]
+    assert baixador.registro["manual.pdf"]["etag"] == '"v2"'
+
+
+def test_arquivo_corrompido_no_disco_baixa_de_novo(tmp_path, servidor):
+    baixador = BaixadorDocumentos(str(tmp_path), tentativas=0)
+    baixador.baixar("manual.pdf", servidor.url)
+    with open(tmp_path / "manual.pdf", "r+b") as f:
+        f.write(b"corrompido")
+    assert baixador.baixar("manual.pdf", servidor.url) == BAIXADO
+    assert _ler(tmp_path) == CONTEUDO
@@ -0,0 +1,97 @@
+import threading
+
+import numpy as np
+
+from cache_consultas import CacheConsultas, marcar_versao, caminho_versao
+from indice_lexical import IndiceBM25, BuscaHibrida
+
+IDS = ["ferrugem", "plantio", "solo", "adubo"]
+TEXTOS = [
+    "A ferrugem asiática (Phakopsora pachyrhizi) é controlada com fungicida preventivo.",
+    "O plantio da soja deve seguir a janela indicada pelo zoneamento.",
+    "Solo bem drenado e corrigido favorece o desenvolvimento da soja.",
+    "Adubação de cobertura com nitrogênio no milho safrinha.",
+]
+
+
+class ColecaoFalsa:
+    """Busca vetorial de mentira: devolve os trechos na ordem e conta as consultas."""
+
+    def __init__(self):
+        self.consultas = 0
+
+    def query(self, query_texts=None, query_embeddings=None, n_results=10, where=None, **_):
+        self.consultas += 1
+        n = len(query_embeddings if query_embeddings is not None else query_texts)
+        return {"ids": [IDS[:n_results]] * n, "documents": [TEXTOS[:n_results]] * n,
+                "metadatas": [[{}] * n_results] * n}
+
+
+class EmbeddingContado:
+    def __init__(self):
+        self.textos = []
+
+    def __call__(self, textos):
+        self.textos += list(textos)
+        return [np.array([len(t), t.count("a") + 1.0, 1.0]) for t in textos]
+
+
+def _cache(**kwargs):
+    busca = BuscaHibrida(ColecaoFalsa(), IndiceBM25(IDS, TEXTOS, [{}] * len(IDS)))
+    embedding = EmbeddingContado()
+    return CacheConsultas(busca, embedding, **kwargs), busca, embedding
+
+
+def test_resultado_lexical_decisivo_nao_vetoriza():
+    cache, busca, embedding = _cache()
+    resposta = cache.query(query_texts=["Phakopsora pachyrhizi"], n_results=1)
+    assert resposta["ids"] == [["ferrugem"]]
+    assert embedding.textos == []
+    assert busca.colecao.consultas == 0
+
+    cache.query(query_texts=["phakopsora  PACHYRHIZI"], n_results=1)
+    assert embedding.textos == []
+    assert cache.estatisticas()["lexicais"] == 1
+    assert cache.estatisticas()["acertos"] == 1
+
+
+def test_so_a_busca_vetorial_vetoriza():
+    cache, busca, embedding = _cache()
+    cache.query(query_texts=["Phakopsora pachyrhizi", "como está o tempo hoje"], n_results=1)
+    assert embedding.textos == ["como está o tempo hoje"]
+    assert busca.colecao.consultas == 1
+
+    cache.query(query_texts=["como está o tempo hoje"], n_results=1)
+    assert embedding.textos == ["como está o tempo hoje"]
+
+
+def test_versao_nova_troca_a_busca_e_esvazia(tmp_path):
+    arquivo = caminho_versao(str(tmp_path), "teste")
+    marcar_versao(str(tmp_path), "teste")
+    reaberturas = []
+
+    def reabrir():
+        reaberturas.append(1)
+        return BuscaHibrida(ColecaoFalsa(), IndiceBM25(IDS, TEXTOS, [{}] * len(IDS)))
+
+    cache = CacheConsultas(reabrir(), EmbeddingContado(), arquivo_versao=arquivo, reabrir=reabrir)
+    cache.query(query_texts=["Phakopsora pachyrhizi"], n_results=1)
+    marcar_versao(str(tmp_path), "teste")
+
+    erros = []
+
+    def consultar():
+        try:
+            for _ in range(20):
+                assert cache.query(query_texts=["Phakopsora pachyrhizi"], n_results=1)["ids"] == [["ferrugem"]]
+        except Exception as erro:
+            erros.append(erro)
+
+    threads = [threading.Thread(target=consultar) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert erros == []
+    assert len(reaberturas) == 2  # A inicial + uma única troca, mesmo com 8 threads vendo a versão nova
+    assert cache.estatisticas()["invalidacoes"] == 1
@@ -0,0 +1,65 @@
+import hashlib
+import multiprocessing
+
+import numpy as np
+
+from cache_vetores import CacheVetores
+
+DIMENSAO = 8
+
+
+def vetor(texto):
+    return np.frombuffer(hashlib.sha256(texto.encode()).digest(), dtype=np.uint8)[:DIMENSAO].astype(np.float32)
+
+
+def codificar(textos):
+    return np.stack([vetor(t) for t in textos])
+
+
+def _usar_cache(pasta, semente, capacidade=300, rodadas=200):
+    """Processo do teste: devolve quantos vetores vieram trocados (de outro texto)."""
+    cache = CacheVetores(pasta, "teste", DIMENSAO, capacidade=capacidade)
+    rng = np.random.default_rng(semente)
+    errados = 0
+    for _ in range(rodadas):
+        textos = [f"texto {i}" for i in rng.integers(0, 1000, 8)]
+        vetores = cache.codificar(textos, codificar)
+        errados += sum(not np.array_equal(v, vetor(t)) for v, t in zip(vetores, textos))
+    cache.salvar()
+    return errados
+
+
+def test_acerto_nao_chama_o_modelo(tmp_path):
+    cache = CacheVetores(str(tmp_path), "teste", DIMENSAO)
+    cache.codificar(["a", "b"], codificar)
+
+    def falhar(textos):
+        raise AssertionError(f"não devia vetorizar {textos}")
+
+    reaberto = CacheVetores(str(tmp_path), "teste", DIMENSAO)
+    np.testing.assert_array_equal(reaberto.codificar(["b", "a"], falhar), codificar(["b", "a"]))
+    assert reaberto.acertos == 2
+
+
+def test_despejo_respeita_capacidade(tmp_path):
+    cache = CacheVetores(str(tmp_path), "teste", DIMENSAO, capacidade=50)
+    for inicio in range(0, 200, 20):
+        textos = [f"t{i}" for i in range(inicio, inicio + 20)]
+        np.testing.assert_array_equal(cache.codificar(textos, codificar), codificar(textos))
+    assert len(cache._indice) <= 50
+    assert cache.n <= 50
+
+
+def test_varios_processos_nunca_devolvem_vetor_de_outro_texto(tmp_path):
+    # Capacidade pequena: os processos despejam e reaproveitam linhas uns dos outros o tempo todo
+    contexto = multiprocessing.get_context("spawn")
+    with contexto.Pool(4) as pool:
+        errados = pool.starmap(_usar_cache, [(str(tmp_path), semente) for semente in range(4)])
+    assert errados == [0, 0, 0, 0]
+
+    cache = CacheVetores(str(tmp_path), "teste", DIMENSAO, capacidade=300)
+    for chave, linha in cache._indice.items():
+        assert bytes(cache._chaves[linha]) == chave
+    textos = [f"texto {i}" for i in range(1000)]
+    presentes = [t for t in textos if cache.chave(t) in cache._indice]
+    np.testing.assert_array_equal(cache.codificar(presentes, codificar), codificar(presentes))
@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+from clima import ClienteClima
+
+
+class ServidorClima:
+    """Stand-in local da API do Open-Meteo: conta requisições, simultaneidade e falhas programadas."""
+
+    def __init__(self, atraso_s=0.0):
+        self.atraso_s = atraso_s
+        self.requisicoes = 0
+        self.em_voo = 0
+        self.max_em_voo = 0
+        self.falhas = []      # Status devolvidos antes das respostas normais (ex: [503, 503])
+        self.nulos = False    # Último dia sem dado (ainda não consolidado)
+        self._trava = threading.Lock()
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with servidor._trava:
+                    servidor.requisicoes += 1
+                    servidor.em_voo += 1
+                    servidor.max_em_voo = max(servidor.max_em_voo, servidor.em_voo)
+                    status = servidor.falhas.pop(0) if servidor.falhas else 200
+                try:
+                    time.sleep(servidor.atraso_s)
+                    params = parse_qs(urlparse(self.path).query)
+                    dias = [params["start_date"][0], params["end_date"][0]]
+                    chuva = [1.5, None if servidor.nulos else 2.0]
+                    corpo = json.dumps({"daily": {"time": dias, "temperature_2m_mean": [24.0, 25.0],
+                                                  "precipitation_sum": chuva}}).encode()
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(corpo)))
+                    self.end_headers()
+                    self.wfile.write(corpo)
+                finally:
+                    with servidor._trava:
+                        servidor.em_voo -= 1
+
+        self.http = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.http.server_address[1]}/v1/archive"
+        self._thread = threading.Thread(target=self.http.serve_forever, daemon=True)
+        self._thread.start()
+
+    def fechar(self):
+        self.http.shutdown()
+        self.http.server_close()
+
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorClima()
+    yield servidor
+    servidor.fechar()
+
+
+def _cliente(pasta, servidor, **kwargs):
+    return ClienteClima(str(pasta), url=servidor.url, timeout=5, **kwargs)
+
+
+def test_cache_evita_nova_requisicao(tmp_path, servidor):
+    cliente = _cliente(tmp_path, servidor)
+    primeiro = cliente.buscar_diario(-16.7, -49.3, "2024-01-01", "2024-01-02")
+    segundo = _cliente(tmp_path, servidor).buscar_diario(-16.7, -49.3, "2024-01-01", "2024-01-02")
+    assert primeiro == segundo
+    assert servidor.requisicoes == 1
+
+    cliente.buscar_diario(-16.7, -49.3, "2024-01-01", "2024-01-03")  # Outro período = outra chave
+    assert servidor.requisicoes == 2
+
+
+def test_resposta_com_nulos_expira(tmp_path, servidor):
+    servidor.nulos = True
+    cliente = _cliente(tmp_path, servidor, validade_incompleta_s=60)
+    assert cliente.buscar_diario(-16.7, -49.3, "2024-01-01", "2024-01-02")["precipitation_sum"][1] is None
+    cliente.buscar_diario(-16.7, -49.3, "2024-01-01", "2024-01-02")
+    assert servidor.requisicoes == 1  # Ainda dentro da validade
+
+    caminho = cliente._caminho_cache(cliente.chave_cache(-16.7, -49.3, "2024-01-01", "2024-01-02"))
+    antigo = time.time() - 120
+    os.utime(caminho, (antigo, antigo))
+    servidor.nulos = False
+    assert cliente.buscar_diario(-16.7, -49.3, "2024-01-01", "2024-01-02")["precipitation_sum"][1] == 2.0
+    assert servidor.requisicoes == 2
+
+    os.utime(caminho, (antigo, antigo))  # Completa: vale para sempre
+    cliente.buscar_diario(-16.7, -49.3, "2024-01-01", "2024-01-02")
+    assert servidor.requisicoes == 2
+
+
+def test_retry_em_erro_temporario(tmp_path, servidor):
+    servidor.falhas = [503]
+    cliente = _cliente(tmp_path, servidor, tentativas=2)
+    assert cliente.buscar_diario(-16.7, -49.3, "2024-01-01", "2024-01-02")["temperature_2m_mean"] == [24.0, 25.0]
+    assert servidor.requisicoes == 2
+
+    # Falha que persiste além das tentativas: erro para quem chamou e nada no cache
+    servidor.falhas = [500, 500]
+    cliente = _cliente(tmp_path / "outro", servidor, tentativas=1)
+    with pytest.raises(Exception):
+        cliente.buscar_diario(-16.7, -49.3, "2024-02-01", "2024-02-02")
+    assert not any(nome.endswith(".gz") for _, _, nomes in os.walk(tmp_path / "outro") for nome in nomes)
+
+
+def test_limite_de_requisicoes_simultaneas(tmp_path):
+    servidor = ServidorClima(atraso_s=0.05)
+    try:
+        cliente = _cliente(tmp_path, servidor, max_requisicoes=3)
+        locais = {f"cidade {i}": (-16.0 - i / 10, -49.0) for i in range(12)}
+        resultados, erros = cliente.buscar_varios(locais, "2024-01-01", "2024-01-02")
+        assert erros == {}
+        assert len(resultados) == 12
+        assert servidor.requisicoes == 12
+        assert 1 < servidor.max_em_voo <= 3
+    finally:
+        servidor.fechar()
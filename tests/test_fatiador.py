@@ -0,0 +1,38 @@
+import pickle
+
+import fatiador
+from fatiador import Fatiador, tokenizar_regex, MAX_TOKENS_REGEX, MAX_WORDPIECES_MODELO, FATOR_SEGURANCA_REGEX
+
+TEXTO = ("CULTURA: SOJA (Glycine max)\n1. PRINCIPAIS DOENÇAS\n"
+         + "A ferrugem asiática (Phakopsora pachyrhizi) exige monitoramento e fungicida preventivo. " * 40)
+
+
+def test_regex_usa_orcamento_com_margem(monkeypatch):
+    monkeypatch.setattr(fatiador, "_TOKENIZADOR_PADRAO", [tokenizar_regex])
+    padrao = Fatiador()
+    fragmentos = padrao.fatiar(TEXTO)
+    assert padrao.max_tokens == MAX_TOKENS_REGEX
+    assert MAX_TOKENS_REGEX * FATOR_SEGURANCA_REGEX <= MAX_WORDPIECES_MODELO - 2
+    assert len(fragmentos) > 1
+    assert max(len(tokenizar_regex(f)) for f in fragmentos) <= MAX_TOKENS_REGEX
+
+
+def test_tokenizador_do_modelo_usa_orcamento_em_wordpieces(monkeypatch):
+    def wordpieces(texto):  # Stand-in do TokenizadorHF: cada palavra vira dois pedaços
+        spans = []
+        for inicio, fim in tokenizar_regex(texto):
+            meio = (inicio + fim + 1) // 2 if fim - inicio > 1 else fim
+            spans += [(inicio, meio)] + ([(meio, fim)] if meio < fim else [])
+        return spans
+
+    monkeypatch.setattr(fatiador, "_TOKENIZADOR_PADRAO", [wordpieces])
+    padrao = Fatiador()
+    assert max(len(wordpieces(f)) for f in padrao.fatiar(TEXTO)) <= fatiador.MAX_TOKENS
+    assert padrao.max_tokens == fatiador.MAX_TOKENS
+    assert "wordpieces" in padrao.assinatura()
+
+
+def test_resolvido_antes_de_ir_para_outro_processo(monkeypatch):
+    monkeypatch.setattr(fatiador, "_TOKENIZADOR_PADRAO", [tokenizar_regex])
+    copia = pickle.loads(pickle.dumps(Fatiador()))
+    assert (copia.tokenizar, copia.max_tokens) == (tokenizar_regex, MAX_TOKENS_REGEX)
@@ -0,0 +1,54 @@
+import numpy as np
+
+import ingestao_documentos
+from armazem_vetores import ColecaoNumpy
+from fatiador import Fatiador, tokenizar_regex
+from indice_incremental import sincronizar_colecao
+
+TEXTO_PDF = "Manejo da ferrugem asiatica na soja com fungicida preventivo e monitoramento semanal."
+
+
+def _pdf(caminho, texto=TEXTO_PDF):
+    """PDF mínimo de uma página com um texto (offsets do xref calculados)."""
+    conteudo = f"BT /F1 12 Tf 72 720 Td ({texto}) Tj ET".encode()
+    objetos = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+               b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+               b"/Resources << /Font << /F1 5 0 R >> >> >>",
+               b"<< /Length %d >>\nstream\n" % len(conteudo) + conteudo + b"\nendstream",
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    saida, offsets = bytearray(b"%PDF-1.4\n"), []
+    for i, objeto in enumerate(objetos, 1):
+        offsets.append(len(saida))
+        saida += b"%d 0 obj\n" % i + objeto + b"\nendobj\n"
+    xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    saida += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    saida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, xref)
+    caminho.write_bytes(bytes(saida))
+
+
+def _embedding(textos):
+    return np.ones((len(textos), 4), dtype=np.float32)
+
+
+def test_pdf_sem_fragmentos_e_relido_na_proxima_vez(tmp_path, monkeypatch):
+    pasta = tmp_path / "knowledge"
+    pasta.mkdir()
+    _pdf(pasta / "soja_manejo.pdf")
+    colecao = ColecaoNumpy(embedding_function=_embedding)
+    manifesto = str(tmp_path / "manifesto.json")
+    fatiador = Fatiador(tokenizar=tokenizar_regex)
+
+    importar = ingestao_documentos._importar_pypdf
+    monkeypatch.setattr(ingestao_documentos, "_importar_pypdf", lambda: None)
+    resumo = sincronizar_colecao(colecao, str(pasta), manifesto, max_processos=1, fatiador=fatiador)
+    assert (resumo["documentos_relidos"], resumo["novos"]) == (1, 0)
+
+    monkeypatch.setattr(ingestao_documentos, "_importar_pypdf", importar)
+    resumo = sincronizar_colecao(colecao, str(pasta), manifesto, max_processos=1, fatiador=fatiador)
+    assert resumo["documentos_relidos"] == 1
+    assert resumo["novos"] >= 1 and colecao.count() == resumo["novos"]
+
+    resumo = sincronizar_colecao(colecao, str(pasta), manifesto, max_processos=1, fatiador=fatiador)
+    assert (resumo["documentos_relidos"], resumo["novos"]) == (0, 0)
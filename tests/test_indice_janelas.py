@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from indice_janelas import IndiceJanelas, gerar_indice_janelas, NUM_DECENDIOS
+
+
+def _dataset():
+    linhas = []
+    for municipio, cultura, riscos in (("Rio Verde", "Soja", {5: 30, 12: 20, 20: 20}), ("Jataí", "Milho", {3: 40})):
+        for decendio, risco in riscos.items():
+            for solo, extra in (("AD1", 10), ("AD3", 0)):
+                linhas.append({"municipio": municipio, "cultura": cultura, "decendio": decendio, "solo": solo,
+                               "risco_numerico": risco + extra, "custo_ha_est": 1000.0})
+    return pd.DataFrame(linhas)
+
+
+def test_melhor_janela_e_consultas():
+    indice = IndiceJanelas(gerar_indice_janelas(_dataset()))
+    assert len(indice) == 4
+
+    melhor = indice.melhor("Rio Verde", "Soja")
+    assert (melhor["decendio"], melhor["risco_numerico"], melhor["solo"]) == (12, 20, "AD3")  # Empate: o mais cedo
+    assert indice.janela("Rio Verde", "Soja", 5)["risco_numerico"] == 30
+    assert indice.janela("Rio Verde", "Soja", 6) is None
+
+    riscos = indice.riscos("Jataí", "Milho")
+    assert riscos.shape == (NUM_DECENDIOS,)
+    assert riscos[2] == 40 and np.isnan(riscos).sum() == NUM_DECENDIOS - 1
+
+
+def test_par_inexistente():
+    indice = IndiceJanelas(gerar_indice_janelas(_dataset()))
+    assert indice.melhor("Rio Verde", "Milho") is None
+    assert indice.melhor("Goiânia", "Soja") is None
+    assert indice.riscos("Jataí", "Soja") is None
+    assert indice.janela("Jataí", "Milho", 99) is None
@@ -0,0 +1,31 @@
+from indice_lexical import IndiceBM25, BuscaHibrida
+
+IDS = ["ferrugem", "plantio"]
+TEXTOS = ["Ferrugem asiática (Phakopsora pachyrhizi) na soja.", "Janela de plantio do milho safrinha."]
+
+
+class ColecaoFalsa:
+    def __init__(self):
+        self.entradas = []
+
+    def query(self, query_texts=None, query_embeddings=None, n_results=10, where=None, **_):
+        self.entradas.append((query_texts, query_embeddings))
+        n = len(query_embeddings if query_embeddings is not None else query_texts)
+        return {"ids": [IDS[::-1]] * n, "documents": [TEXTOS[::-1]] * n, "metadatas": [[{}, {}]] * n}
+
+
+def _busca():
+    return BuscaHibrida(ColecaoFalsa(), IndiceBM25(IDS, TEXTOS, [{}, {}]))
+
+
+def test_so_vetores_vai_direto_para_a_colecao():
+    busca = _busca()
+    resposta = busca.query(query_embeddings=[[0.1, 0.2]], n_results=1)
+    assert resposta["ids"] == [["plantio", "ferrugem"]]
+    assert busca.colecao.entradas == [(None, [[0.1, 0.2]])]
+
+
+def test_termo_raro_responde_sem_a_colecao():
+    busca = _busca()
+    assert busca.query(query_texts=["phakopsora"], n_results=1)["ids"] == [["ferrugem"]]
+    assert busca.colecao.entradas == []
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from armazem_vetores import ColecaoNumpy
+from indice_quantizado import IndiceQuantizado, IndiceSomenteLeitura, exportar_colecao
+
+
+@pytest.mark.parametrize("tipo", ["int8", "float16"])
+def test_exportado_busca_e_recusa_escrita(tmp_path, tipo):
+    vetores = np.random.default_rng(0).normal(size=(50, 8)).astype(np.float32)
+    colecao = ColecaoNumpy()
+    colecao.upsert([f"id{i}" for i in range(50)], [f"trecho {i}" for i in range(50)],
+                   [{"cultura": "soja" if i % 2 else "milho"} for i in range(50)], embeddings=vetores)
+    assert exportar_colecao(colecao, str(tmp_path), tipo=tipo, tamanho_pagina=7) == 50
+
+    indice = IndiceQuantizado(str(tmp_path))
+    assert indice.count() == 50
+    resposta = indice.query(query_embeddings=vetores[[3]], n_results=2, where={"cultura": "soja"})
+    assert resposta["ids"][0][0] == "id3"
+
+    with pytest.raises(IndiceSomenteLeitura, match="só leitura"):
+        indice.upsert(["novo"], ["texto"])
+    with pytest.raises(IndiceSomenteLeitura):
+        indice.delete(["id3"])
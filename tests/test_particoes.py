@@ -0,0 +1,28 @@
+import pandas as pd
+import pyarrow.parquet as pq
+import pyarrow as pa
+
+from particoes import abrir_dataset, ler_fatias
+
+DF = pd.DataFrame({"uf": ["GO", "GO", "MT", "GO"], "cultura": ["Soja", "Milho", "Soja", "Soja"],
+                   "municipio": ["Rio Verde", "Jataí", "Sorriso", "Jataí"], "decendio": [1, 2, 3, 4]})
+
+
+def _fatias(caminho):
+    return {valores: sorted(df["decendio"]) for valores, df in ler_fatias(abrir_dataset(caminho), ["uf", "cultura"])}
+
+
+def test_fatias_de_csv_e_parquet(tmp_path):
+    esperado = {("GO", "Milho"): [2], ("GO", "Soja"): [1, 4], ("MT", "Soja"): [3]}
+    DF.to_csv(tmp_path / "bruto.csv", sep=";", index=False)
+    DF.to_parquet(tmp_path / "bruto.parquet")
+    assert _fatias(str(tmp_path / "bruto.csv")) == esperado
+    assert _fatias(str(tmp_path / "bruto.parquet")) == esperado
+
+
+def test_fatias_de_pasta_hive(tmp_path):
+    pq.write_to_dataset(pa.Table.from_pandas(DF, preserve_index=False), str(tmp_path / "ds"),
+                        partition_cols=["uf", "cultura"])
+    fatias = list(ler_fatias(abrir_dataset(str(tmp_path / "ds")), ["uf", "cultura"]))
+    assert [valores for valores, _ in fatias] == [("GO", "Milho"), ("GO", "Soja"), ("MT", "Soja")]
+    assert sorted(fatias[1][1]["municipio"]) == ["Jataí", "Rio Verde"]
@@ -0,0 +1,15 @@
+from ingestao_documentos import metadados_do_arquivo
+from indice_lexical import IndiceBM25, BuscaHibrida
+from respostas_lote import buscar_trechos_lote
+
+ARQUIVOS = ["soja_manual_tecnico.txt", "soja_manejo.pdf", "milho_tecnologia.pdf"]
+TEXTOS = ["Soja: semeadura em outubro.", "Ferrugem asiática (Phakopsora pachyrhizi) na soja: fungicida preventivo.",
+          "Milho safrinha: controle da cigarrinha."]
+MAPA_CULTURAS = {"Soja": "soja", "Milho": "milho"}
+
+
+def test_trechos_dos_pdfs_entram_no_filtro_por_cultura():
+    busca = BuscaHibrida(None, IndiceBM25(ARQUIVOS, TEXTOS, [metadados_do_arquivo(a) for a in ARQUIVOS]))
+    trechos = buscar_trechos_lote(busca, None, ["Phakopsora pachyrhizi", "cigarrinha", "cigarrinha"],
+                                  ["Soja", "Milho", "Banana"], MAPA_CULTURAS, n_results=1)
+    assert trechos == [[TEXTOS[1]], [TEXTOS[2]], None]
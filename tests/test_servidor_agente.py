@@ -0,0 +1,100 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from servidor_agente import AgrupadorLotes, Histograma, ServidorHTTP, criar_handler
+
+
+def test_agrupador_junta_chamadas_num_lote():
+    lotes = []
+    liberar = threading.Event()
+
+    def dobrar(itens):
+        liberar.wait(5)  # Segura o primeiro lote para os demais se acumularem na fila
+        lotes.append(list(itens))
+        return [2 * item for item in itens]
+
+    agrupador = AgrupadorLotes("teste", dobrar, janela_ms=50, max_lote=64)
+    futuros = [agrupador.enviar(i) for i in range(10)]
+    liberar.set()
+    assert [futuro.result(5) for futuro in futuros] == [2 * i for i in range(10)]
+    assert sorted(i for lote in lotes for i in lote) == list(range(10))
+    assert len(lotes) < 10
+    assert agrupador.estatisticas()["itens"] == 10
+
+
+def test_agrupador_repassa_erro_a_todos():
+    def falhar(itens):
+        raise RuntimeError("modelo indisponível")
+
+    agrupador = AgrupadorLotes("erro", falhar, janela_ms=50)
+    futuros = [agrupador.enviar(i) for i in range(5)]
+    for futuro in futuros:
+        with pytest.raises(RuntimeError, match="modelo indisponível"):
+            futuro.result(5)
+    assert agrupador.estatisticas()["lotes"] == 0
+
+
+def test_histograma_percentil():
+    histograma = Histograma(limites=(1, 10, 100))
+    assert histograma.percentil(99) == 0.0
+    for ms in [0.5] * 50 + [5] * 45 + [50] * 4 + [500]:
+        histograma.observar(ms / 1000)
+    assert histograma.percentil(50) == 1
+    assert histograma.percentil(95) == 10
+    assert histograma.percentil(99) == 100
+    assert histograma.percentil(100) is None  # Acima do maior limite
+    assert histograma.resumo()["faixas_ms"] == {"<=1": 50, "<=10": 45, "<=100": 4, ">100": 1}
+
+
+class ServicoFalso:
+    def __init__(self):
+        self.perguntas = []
+
+    def responder(self, pergunta, cidade, cultura):
+        self.perguntas.append((pergunta, cidade, cultura))
+        return f"{cultura} em {cidade}"
+
+    def metricas(self):
+        return {"latencias": {}}
+
+
+@pytest.fixture
+def servidor():
+    servico = ServicoFalso()
+    http = ServidorHTTP(("127.0.0.1", 0), criar_handler(servico))
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{http.server_address[1]}", servico
+    http.shutdown()
+    http.server_close()
+
+
+def _post(url, dados):
+    requisicao = urllib.request.Request(url, data=dados, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(requisicao, timeout=5) as resposta:
+            return resposta.status, json.loads(resposta.read())
+    except urllib.error.HTTPError as erro:
+        return erro.code, json.loads(erro.read())
+
+
+def test_handler_responde_e_valida(servidor):
+    url, servico = servidor
+    pergunta = {"pergunta": "Quando plantar?", "cidade": "Rio Verde", "cultura": "Soja"}
+    assert _post(url + "/perguntar", json.dumps(pergunta).encode()) == (200, {"resposta": "Soja em Rio Verde"})
+
+    for corpo in (b"[1, 2]", b'"x"', b"{nada", json.dumps({"pergunta": "?"}).encode()):
+        status, resposta = _post(url + "/perguntar", corpo)
+        assert status == 400
+        assert "erro" in resposta
+    assert len(servico.perguntas) == 1
+
+    assert _post(url + "/outra", b"{}")[0] == 404
+    with pytest.raises(urllib.error.HTTPError) as erro:
+        urllib.request.urlopen(url + "/nada", timeout=5)
+    assert erro.value.code == 404
+    with urllib.request.urlopen(url + "/saude", timeout=5) as resposta:
+        assert json.loads(resposta.read()) == {"status": "ok"}
@@ -0,0 +1,41 @@
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from zarc_streaming import ingerir_zarc_streaming
+
+LINHAS = [f"GO;Cidade {i};{5200000 + i};Soja;2024/2025;AD{i % 3 + 1};{i % 36 + 1};{(i % 3 + 2) * 10}" for i in range(10)]
+
+
+def _tabua(pasta, linhas=LINHAS):
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, "zarc_soja.csv")
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write("uf;municipio;cod_ibge;cultura;safra;solo;decendio;risco\n" + "\n".join(linhas) + "\n")
+    return caminho
+
+
+def _linhas(destino):
+    return pq.read_table(destino).num_rows
+
+
+def test_reingestao_com_menos_chunks_nao_duplica(tmp_path):
+    tabua, destino = _tabua(tmp_path / "origem"), str(tmp_path / "dataset")
+    ingerir_zarc_streaming([tabua], destino, tamanho_chunk=2)   # 5 chunks
+    ingerir_zarc_streaming([tabua], destino, tamanho_chunk=100)  # 1 chunk
+    assert _linhas(destino) == len(LINHAS)
+
+    _tabua(tmp_path / "origem", LINHAS[:4])
+    ingerir_zarc_streaming([tabua], destino)
+    assert _linhas(destino) == 4
+
+
+def test_tabuas_homonimas_em_pastas_diferentes(tmp_path):
+    primeira, segunda = _tabua(tmp_path / "2024"), _tabua(tmp_path / "2025", LINHAS[:3])
+    destino = str(tmp_path / "dataset")
+    ingerir_zarc_streaming([primeira, segunda], destino, tamanho_chunk=100)
+    assert _linhas(destino) == len(LINHAS) + 3
+
+    df = pd.read_parquet(destino)
+    assert set(df["uf"].astype(str)) == {"GO"}